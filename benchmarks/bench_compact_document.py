@@ -0,0 +1,48 @@
+"""
+Memory held by a parsed SedDocument against its CompactDocument form, and the cost of
+converting between them.
+
+    python benchmarks/bench_compact_document.py [variables]
+"""
+
+import gc
+import sys
+import tracemalloc
+from typing import Callable
+
+from generators import make_sed_bytes
+from timing import best_of
+
+from sed_tooling.sed_model.compact_document import CompactDocument
+from sed_tooling.sed_model.sed_document import SedDocument, get_correct_doc_json
+
+
+def retained_bytes(build: Callable[[], object]) -> int:
+    # Memory still allocated once `build` returns, with its temporaries collected
+    gc.collect()
+    tracemalloc.start()
+    kept: object = build()
+    gc.collect()
+    size: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def main() -> None:
+    variables: int = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    contents: bytes = make_sed_bytes(models=10, variables=variables, constants=variables // 4)
+    document: SedDocument = get_correct_doc_json(contents)
+    compact: CompactDocument = CompactDocument(document)
+
+    full: int = retained_bytes(lambda: get_correct_doc_json(contents))
+    small: int = retained_bytes(lambda: CompactDocument(get_correct_doc_json(contents)))
+    print(f"{variables} variables, {variables // 4} constants")
+    print(f"  SedDocument:      {full / 2**20:8.1f} MiB")
+    print(f"  CompactDocument:  {small / 2**20:8.1f} MiB   ({full / small:.1f}x smaller)")
+    print(f"  compact:          {best_of(3, lambda: CompactDocument(document)) * 1000:8.1f} ms")
+    print(f"  to_document:      {best_of(3, compact.to_document) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Validation time of large `Declarations` lists: the shared constrained types against the
+per-model Python validators they replaced.
+
+    python benchmarks/bench_declarations.py [count]
+"""
+
+import re
+import sys
+from typing import Any, List
+
+from pydantic import BaseModel, field_validator
+from timing import best_of
+
+from sed_tooling.sed_model.declarations import Declarations
+
+
+class LegacyMixin(BaseModel):
+    @field_validator("identifier", check_fields=False)
+    @classmethod
+    def legal_id(cls, v: str) -> str:
+        assert re.match("[A-Za-z0-9_-]+", v) is not None
+        return v
+
+    @field_validator("type", check_fields=False)
+    @classmethod
+    def type_must_be_properly_formed(cls, v: str) -> str:
+        parts: List[str] = re.split("::", v)
+        assert len(parts) >= 2
+        for element in parts:
+            assert re.match("[><A-Za-z0-9_-]+", element) is not None
+        return v
+
+
+class LegacyConstant(LegacyMixin):
+    name: str
+    identifier: str
+    type: str
+    value: str
+
+
+class LegacyVariable(LegacyMixin):
+    name: str
+    identifier: str
+    type: str
+
+
+class LegacyDeclarations(BaseModel):
+    constants: List[LegacyConstant]
+    variables: List[LegacyVariable]
+
+
+def make_declarations(count: int) -> dict[str, Any]:
+    return {
+        "constants": [
+            {"name": f"c{i}", "identifier": f"c_{i}", "type": "sed::float", "value": str(i)}
+            for i in range(count)
+        ],
+        "variables": [
+            {"name": f"v{i}", "identifier": f"v_{i}", "type": "Model<sbml::SBMLFile>"}
+            for i in range(count)
+        ],
+    }
+
+
+def main() -> None:
+    count: int = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    payload: dict[str, Any] = make_declarations(count)
+    legacy: float = best_of(5, lambda: LegacyDeclarations.model_validate(payload))
+    shared: float = best_of(5, lambda: Declarations.model_validate(payload))
+    print(f"{2 * count} declarations")
+    print(f"  python validators:  {legacy * 1000:8.1f} ms")
+    print(f"  constrained types:  {shared * 1000:8.1f} ms")
+    print(f"  speedup:            {legacy / shared:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
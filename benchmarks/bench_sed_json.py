@@ -0,0 +1,31 @@
+"""
+Parsing time of multi-megabyte .sed files: raw bytes straight into the release model
+against json.loads followed by validating the intermediate dict.
+
+    python benchmarks/bench_sed_json.py [variables]
+"""
+
+import json
+import sys
+
+from generators import make_sed_bytes
+from timing import best_of
+
+from sed_tooling.sed_model.sed_document import get_correct_doc, get_correct_doc_json
+
+
+def main() -> None:
+    variables: int = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    contents: bytes = make_sed_bytes(
+        models=variables // 4, variables=variables, constants=variables // 4
+    )
+    through_dict: float = best_of(5, lambda: get_correct_doc(json.loads(contents)))
+    from_bytes: float = best_of(5, lambda: get_correct_doc_json(contents))
+    print(f"{len(contents) / 1_000_000:.1f} MB .sed file")
+    print(f"  json.loads + dict:  {through_dict * 1000:8.1f} ms")
+    print(f"  bytes to model:     {from_bytes * 1000:8.1f} ms")
+    print(f"  speedup:            {through_dict / from_bytes:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Deterministic generators of synthetic Sed documents, SED-ML documents and OMEX archives.
+The same arguments always produce byte-identical output.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Union
+from zipfile import ZIP_DEFLATED, ZipFile, ZipInfo
+
+import libsedml
+
+SBML_LANGUAGE = "urn:sedml:language:sbml.level-3.version-1"
+# Stand-in model contents; the converter never reads model files
+SBML_MODEL = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<sbml xmlns="http://www.sbml.org/sbml/level3/version1/core" level="3" version="1">\n'
+    '  <model id="{model_id}"/>\n'
+    "</sbml>\n"
+)
+
+
+def make_sed_document(
+    models: int = 1, variables: int = 100, constants: int = 25, outputs: int = 1
+) -> dict[str, Any]:
+    return {
+        "metadata": {"name": "synthetic", "level": 1, "version": 1, "ontologies": ["sed", "sbml"]},
+        "dependencies": [
+            {
+                "name": f"model {m}",
+                "identifier": f"dep_model{m}",
+                "type": "sbml::SBMLFile",
+                "source": f"models/model{m}.xml",
+            }
+            for m in range(models)
+        ],
+        "declarations": {
+            "constants": [
+                {"name": f"c{i}", "identifier": f"c_{i}", "type": "sed::float", "value": str(i)}
+                for i in range(constants)
+            ],
+            "variables": [
+                {"name": f"model {m}", "identifier": f"model{m}", "type": "Model<sbml::SBMLFile>"}
+                for m in range(models)
+            ]
+            + [
+                {"name": f"v{i}", "identifier": f"v_{i}", "type": "sed::float"}
+                for i in range(variables)
+            ],
+        },
+        "actions": [
+            {
+                "name": f"load model {m}",
+                "identifier": f"load_model{m}",
+                "type": "sbml::load_sbml",
+                "source": f"#dep_model{m}",
+                "target": f"#model{m}",
+            }
+            for m in range(models)
+        ],
+        "outputs": [
+            {
+                "name": f"report {o}",
+                "identifier": f"report{o}",
+                "type": "output::csv",
+                "interval": 1,
+            }
+            for o in range(outputs)
+        ],
+    }
+
+
+def make_sed_bytes(**scale: int) -> bytes:
+    return json.dumps(make_sed_document(**scale)).encode()
+
+
+def make_sedml_document(
+    models: int = 1,
+    data_generators: int = 10,
+    outputs: int = 1,
+    nesting_depth: int = 0,
+) -> str:
+    """
+    One model, simulation and task per model; with `nesting_depth` > 0, every task is wrapped
+    in that many levels of repeated tasks. Data generators are spread round-robin over the
+    top-level tasks, and their data sets round-robin over the reports.
+    """
+    doc = libsedml.SedDocument(1, 4)
+    top_tasks: list[str] = []
+    for m in range(models):
+        model = doc.createModel()
+        model.setId(f"model{m}")
+        model.setName(f"model {m}")
+        model.setLanguage(SBML_LANGUAGE)
+        model.setSource(f"models/model{m}.xml")
+        sim = doc.createUniformTimeCourse()
+        sim.setId(f"sim{m}")
+        sim.setInitialTime(0)
+        sim.setOutputStartTime(0)
+        sim.setOutputEndTime(100)
+        sim.setNumberOfPoints(1000)
+        sim.createAlgorithm().setKisaoID("KISAO:0000019")
+        task = doc.createTask()
+        task.setId(f"task{m}")
+        task.setModelReference(f"model{m}")
+        task.setSimulationReference(f"sim{m}")
+        task_id: str = f"task{m}"
+        for level in range(nesting_depth):
+            repeated = doc.createRepeatedTask()
+            repeated.setId(f"repeat{m}_{level}")
+            repeated.setResetModel(False)
+            repeated.setRangeId(f"range{m}_{level}")
+            scan = repeated.createUniformRange()
+            scan.setId(f"range{m}_{level}")
+            scan.setStart(0)
+            scan.setEnd(1)
+            scan.setNumberOfPoints(2)
+            scan.setType("linear")
+            subtask = repeated.createSubTask()
+            subtask.setTask(task_id)
+            subtask.setOrder(0)
+            task_id = f"repeat{m}_{level}"
+        top_tasks.append(task_id)
+
+    reports = []
+    for o in range(outputs):
+        report = doc.createReport()
+        report.setId(f"report{o}")
+        reports.append(report)
+    for d in range(data_generators):
+        data_gen = doc.createDataGenerator()
+        data_gen.setId(f"dg{d}")
+        variable = data_gen.createVariable()
+        variable.setId(f"var{d}")
+        variable.setTaskReference(top_tasks[d % len(top_tasks)])
+        if d == 0:
+            variable.setSymbol("urn:sedml:symbol:time")
+        else:
+            variable.setTarget(
+                f"/sbml:sbml/sbml:model/sbml:listOfSpecies/sbml:species[@id='S{d}']"
+            )
+        parameter = data_gen.createParameter()
+        parameter.setId(f"scale{d}")
+        parameter.setValue(2.0)
+        data_gen.setMath(libsedml.parseL3Formula(f"scale{d} * var{d}"))
+        if reports:
+            data_set = reports[d % len(reports)].createDataSet()
+            data_set.setId(f"ds{d}")
+            data_set.setLabel(f"data set {d}")
+            data_set.setDataReference(f"dg{d}")
+    return libsedml.writeSedMLToString(doc)
+
+
+def make_omex_archive(
+    path: Path,
+    sed_documents: int = 0,
+    sedml_documents: int = 1,
+    filler_bytes: int = 0,
+    **scale: int,
+) -> Path:
+    """
+    Write an archive with the requested documents, one SBML stand-in per model, and an
+    optional data member of `filler_bytes` that no conversion needs
+    """
+    models: int = scale.get("models", 1)
+    sed_scale: dict[str, int] = {
+        key: value for key, value in scale.items() if key in ("models", "variables", "outputs")
+    }
+    sedml_scale: dict[str, int] = {
+        key: value
+        for key, value in scale.items()
+        if key in ("models", "data_generators", "outputs", "nesting_depth")
+    }
+    with ZipFile(path, "w") as omex:
+        _write_member(omex, "manifest.xml", make_manifest(sed_documents, sedml_documents, models))
+        for m in range(models):
+            _write_member(omex, f"models/model{m}.xml", SBML_MODEL.format(model_id=f"model{m}"))
+        for i in range(sed_documents):
+            _write_member(omex, f"experiments/simulation{i}.sed", make_sed_bytes(**sed_scale))
+        for i in range(sedml_documents):
+            _write_member(
+                omex, f"experiments/simulation{i}.sedml", make_sedml_document(**sedml_scale)
+            )
+        if filler_bytes:
+            _write_member(omex, "data/filler.bin", bytes(i % 251 for i in range(filler_bytes)))
+    return path
+
+
+def _write_member(omex: ZipFile, name: str, data: Union[str, bytes]) -> None:
+    # A fixed timestamp keeps the archive bytes identical between runs
+    member = ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+    member.compress_type = ZIP_DEFLATED
+    omex.writestr(member, data)
+
+
+def make_manifest(sed_documents: int, sedml_documents: int, models: int) -> str:
+    entries: list[str] = [
+        '  <content location="." format="http://identifiers.org/combine.specifications/omex"/>'
+    ]
+    entries += [
+        f'  <content location="./models/model{m}.xml" '
+        'format="http://identifiers.org/combine.specifications/sbml"/>'
+        for m in range(models)
+    ]
+    entries += [
+        f'  <content location="./experiments/simulation{i}.sedml" '
+        'format="http://identifiers.org/combine.specifications/sed-ml" master="true"/>'
+        for i in range(sedml_documents)
+    ]
+    entries += [
+        f'  <content location="./experiments/simulation{i}.sed" format="application/json"/>'
+        for i in range(sed_documents)
+    ]
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<omexManifest xmlns="http://identifiers.org/combine.specifications/omex-manifest">\n'
+        + "\n".join(entries)
+        + "\n</omexManifest>\n"
+    )
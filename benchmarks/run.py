@@ -0,0 +1,158 @@
+"""
+Benchmark suite over synthetic corpora: times the model layer and the converter at a chosen
+scale. With `--against`, the same suite is first run on a reference source tree (e.g. a
+worktree of the main branch), so both timings come from the same machine and run.
+
+    python benchmarks/run.py --scale small
+    python benchmarks/run.py --scale small --against ../main/src
+"""
+
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Callable
+
+from generators import make_omex_archive, make_sed_bytes, make_sed_document, make_sedml_document
+from timing import best_of
+
+from sed_tooling.sed_converter.core import SED_MODE, SEDML_MODE, setup
+from sed_tooling.sed_converter.sedml_core import SedMLCore
+from sed_tooling.sed_converter.sedml_document import SedMLDocument
+from sed_tooling.sed_model.sed_document import get_correct_doc, get_correct_doc_json
+
+SCALES: dict[str, dict[str, int]] = {
+    "small": {
+        "models": 5,
+        "variables": 1_000,
+        "data_generators": 100,
+        "outputs": 5,
+        "nesting_depth": 2,
+    },
+    "medium": {
+        "models": 50,
+        "variables": 20_000,
+        "data_generators": 2_000,
+        "outputs": 20,
+        "nesting_depth": 4,
+    },
+    "large": {
+        "models": 200,
+        "variables": 200_000,
+        "data_generators": 20_000,
+        "outputs": 100,
+        "nesting_depth": 8,
+    },
+}
+DEFAULT_TOLERANCE = 0.5
+BENCH_DIR = str(Path(__file__).resolve().parent)
+
+
+def quiet(run: Callable[[], object]) -> Callable[[], object]:
+    # The cores report progress with print, which would dominate the timings
+    def silenced() -> object:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return run()
+
+    return silenced
+
+
+def run_suite(scale: dict[str, int], repeats: int, workdir: Path) -> dict[str, float]:
+    sed_scale: dict[str, int] = {k: scale[k] for k in ("models", "variables", "outputs")}
+    sedml_scale: dict[str, int] = {
+        k: scale[k] for k in ("models", "data_generators", "outputs", "nesting_depth")
+    }
+    sed_dict: dict[str, Any] = make_sed_document(**sed_scale)
+    sed_bytes: bytes = make_sed_bytes(**sed_scale)
+    sedml_bytes: bytes = make_sedml_document(**sedml_scale).encode()
+    sedml_doc: SedMLDocument = SedMLDocument("synthetic.sedml", sedml_bytes)
+    sed_archive: Path = make_omex_archive(
+        workdir / "sed.omex", sed_documents=4, sedml_documents=0, **scale
+    )
+    sedml_archive: Path = make_omex_archive(
+        workdir / "sedml.omex", sed_documents=0, sedml_documents=4, **scale
+    )
+
+    cases: dict[str, Callable[[], object]] = {
+        "get_correct_doc": lambda: get_correct_doc(sed_dict),
+        "get_correct_doc_json": lambda: get_correct_doc_json(sed_bytes),
+        "SedMLDocument": lambda: SedMLDocument("synthetic.sedml", sedml_bytes),
+        "SedMLCore.convert_to_sed": lambda: SedMLCore.convert_to_sed(sedml_doc),
+        "setup[Sed]": quiet(lambda: setup(str(sed_archive), False, SED_MODE)),
+        "setup[SedML]": quiet(lambda: setup(str(sedml_archive), True, SEDML_MODE)),
+    }
+    return {name: best_of(repeats, case) for name, case in cases.items()}
+
+
+def run_reference(source: str, scale: str, repeats: int) -> dict[str, float]:
+    """
+    Time the suite in a child process importing `sed_tooling` from the `source` tree instead
+    """
+    env: dict[str, str] = {**os.environ, "PYTHONPATH": os.pathsep.join([source, BENCH_DIR])}
+    command: list[str] = [sys.executable, __file__, "--scale", scale, "--repeats", str(repeats)]
+    completed = subprocess.run(
+        [*command, "--json"], env=env, stdout=subprocess.PIPE, check=True, text=True
+    )
+    # The suite itself may print, so the timings are the last line
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def compare(results: dict[str, float], reference: dict[str, float], tolerance: float) -> bool:
+    ok: bool = True
+    for name, seconds in results.items():
+        if name not in reference:
+            print(f"{name:28} {seconds * 1000:10.2f} ms   (not in the reference)")
+            continue
+        ratio: float = seconds / reference[name]
+        regressed: bool = ratio > 1 + tolerance
+        ok = ok and not regressed
+        print(
+            f"{name:28} {seconds * 1000:10.2f} ms   {ratio:5.2f}x reference"
+            + ("   REGRESSION" if regressed else "")
+        )
+    return ok
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Benchmark the converter and model layer")
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument(
+        "--against",
+        metavar="SRC",
+        help="the source directory of a reference `sed_tooling` to time first and compare with",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="fail when a case is slower than the reference by more than this fraction",
+    )
+    parser.add_argument("--json", action="store_true", help="print the timings as JSON")
+    args: Namespace = parser.parse_args()
+
+    reference: dict[str, float] = {}
+    if args.against is not None:
+        reference = run_reference(str(Path(args.against).resolve()), args.scale, args.repeats)
+    with TemporaryDirectory() as workdir:
+        results: dict[str, float] = run_suite(SCALES[args.scale], args.repeats, Path(workdir))
+
+    if args.json:
+        print(json.dumps(results))
+        return
+    if not args.against:
+        # Absolute timings only mean something on this machine, so there is nothing to gate on
+        for name, seconds in results.items():
+            print(f"{name:28} {seconds * 1000:10.2f} ms")
+        return
+    if not compare(results, reference, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+import time
+from typing import Callable
+
+
+def best_of(repeats: int, run: Callable[[], object]) -> float:
+    timings: list[float] = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
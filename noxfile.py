@@ -36,3 +36,10 @@ def mypy(session: Session) -> None:
     """Type-check using mypy."""
     args = session.posargs or locations
     session.run("mypy", *args)
+
+
+@session(python="3.11")
+def bench(s: Session) -> None:
+    """Time the benchmark suite; pass `-- --against <src>` to gate on a reference tree."""
+    s.install(".")
+    s.run("python", "benchmarks/run.py", *s.posargs)
@@ -0,0 +1,352 @@
+import copy
+import posixpath
+import re
+import shutil
+import struct
+import sys
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from types import TracebackType
+from typing import IO, Any, Container, Iterable, Iterator, NamedTuple, Optional, Type
+from zipfile import ZIP_DEFLATED, ZipFile, ZipInfo
+
+from sed_tooling.sed_converter.profiling import span
+
+SED_EXTENSION = ".sed"
+SEDML_EXTENSION = ".sedml"
+MANIFEST = "manifest.xml"
+MANIFEST_NAMESPACE = "http://identifiers.org/combine.specifications/omex-manifest"
+SEDML_FORMAT = "http://identifiers.org/combine.specifications/sed-ml"
+
+# A source with a scheme (urn:, http:, ...) or a `#model` reference is not an archive member
+_EXTERNAL_SOURCE = re.compile(r"^(?:#|[A-Za-z][A-Za-z0-9+.-]*:)")
+
+_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+_LOCAL_HEADER_SIZE = 30
+_DATA_DESCRIPTOR_FLAG = 0x08
+_ZIP64_EXTRA_ID = 0x0001
+_COPY_CHUNK_SIZE = 1 << 20
+# What `write_raw` uses of ZipFile, and the versions it was checked against
+_RAW_WRITE_ATTRIBUTES = (
+    "NameToInfo",
+    "_didModify",
+    "_lock",
+    "_seekable",
+    "_writecheck",
+    "_writing",
+    "filelist",
+    "fp",
+    "start_dir",
+)
+_RAW_WRITE_VERSIONS = ((3, 9), (3, 14))
+
+
+class MemberEntry(NamedTuple):
+    format: Optional[str]  # as declared in the manifest, if it lists the member
+    size: int
+    crc: int
+
+
+def manifest_member(location: str) -> str:
+    """
+    The archive member a manifest `location` names, or "" for none
+    """
+    return posixpath.normpath(location.lstrip("/")) if location else ""
+
+
+def manifest_formats(manifest: bytes) -> dict[str, str]:
+    """
+    The declared format of every member the manifest lists, by member path
+    """
+    formats: dict[str, str] = {}
+    for content in ET.fromstring(manifest).iter(f"{{{MANIFEST_NAMESPACE}}}content"):
+        location: str = content.get("location", "")
+        format_: Optional[str] = content.get("format")
+        member: str = manifest_member(location)
+        if format_ is not None and member not in ("", "."):
+            formats[member] = format_
+    return formats
+
+
+def source_candidates(document: str, source: str) -> list[str]:
+    """
+    The archive members `source`, as written in `document`, may point at, in order: relative
+    to the document, then to the root of the archive
+    """
+    return [
+        posixpath.normpath(candidate)
+        for candidate in (posixpath.join(posixpath.dirname(document), source), source.lstrip("/"))
+    ]
+
+
+def resolve_source(document: str, source: str, members: Container[str]) -> Optional[str]:
+    """
+    The archive member `source`, as written in `document`, points at. None if it points at no
+    member.
+    """
+    for candidate in source_candidates(document, source):
+        if candidate in members:
+            return candidate
+    return None
+
+
+def is_external_source(source: str) -> bool:
+    return _EXTERNAL_SOURCE.match(source) is not None
+
+
+def converted_archive_path(archive_path: Path) -> Path:
+    return archive_path.with_name(f"{archive_path.stem}_sedml{archive_path.suffix}")
+
+
+class ArchiveIndex:
+    """
+    Every member of an archive with its declared format, size and CRC, built once from the
+    manifest and the zip central directory, without reading any other member
+    """
+
+    def __init__(self, infos: Iterable[ZipInfo], manifest: Optional[bytes]) -> None:
+        formats: dict[str, str] = {}
+        if manifest is not None:
+            try:
+                formats = manifest_formats(manifest)
+            except ET.ParseError as e:
+                print(f"Ignoring the unreadable manifest: {e}")
+        self.entries: dict[str, MemberEntry] = {
+            info.filename: MemberEntry(formats.get(info.filename), info.file_size, info.CRC)
+            for info in infos
+            if not info.is_dir()
+        }
+
+    def __contains__(self, member: object) -> bool:
+        return member in self.entries
+
+    def format_of(self, member: str) -> Optional[str]:
+        entry: Optional[MemberEntry] = self.entries.get(member)
+        return None if entry is None else entry.format
+
+    def documents(self, extension: str, format_: Optional[str] = None) -> list[str]:
+        """
+        Members declared in the manifest with a format starting with `format_`, and members the
+        manifest declares no format for that end with `extension`
+        """
+        documents: list[str] = []
+        for member, entry in self.entries.items():
+            if entry.format is None or format_ is None:
+                if member.endswith(extension) and member != MANIFEST:
+                    documents.append(member)
+            elif entry.format.startswith(format_):
+                documents.append(member)
+        return documents
+
+    def resolve(self, document: str, source: str) -> Optional[str]:
+        return resolve_source(document, source, self.entries)
+
+    def missing_sources(self, document: str, sources: Iterable[str]) -> list[str]:
+        """
+        The `sources` of `document` that should be archive members, but are not
+        """
+        return [
+            source
+            for source in sources
+            if not is_external_source(source) and self.resolve(document, source) is None
+        ]
+
+
+class OmexArchive:
+    """
+    Read-only view of a COMBINE archive that reads members straight out of the zip,
+    without extracting anything to disk
+    """
+
+    def __init__(self, archive_location: str) -> None:
+        self.path: Path = Path(archive_location).resolve()
+        self._zip: ZipFile = ZipFile(self.path, "r")
+        self.members: list[str] = [name for name in self._zip.namelist() if not name.endswith("/")]
+        self._index: Optional[ArchiveIndex] = None
+
+    @property
+    def index(self) -> ArchiveIndex:
+        if self._index is None:
+            manifest: Optional[bytes] = self.read(MANIFEST) if MANIFEST in self.members else None
+            self._index = ArchiveIndex(self._zip.infolist(), manifest)
+        return self._index
+
+    @property
+    def sed_members(self) -> list[str]:
+        return [name for name in self.members if name.endswith(SED_EXTENSION)]
+
+    @property
+    def sedml_members(self) -> list[str]:
+        return [name for name in self.members if name.endswith(SEDML_EXTENSION)]
+
+    def read(self, member: str) -> bytes:
+        with span("archive.read", member):
+            return self._zip.read(member)
+
+    def open(self, member: str) -> IO[bytes]:
+        return self._zip.open(member, "r")
+
+    def info(self, member: str) -> ZipInfo:
+        return self._zip.getinfo(member)
+
+    def iter_compressed(self, member: str) -> Iterator[bytes]:
+        """
+        Yield the stored (still compressed) bytes of `member`, in chunks
+        """
+        info: ZipInfo = self._zip.getinfo(member)
+        # A handle of its own, so raw reads never move the position ZipFile reads from
+        with self.path.open("rb") as source:
+            source.seek(info.header_offset)
+            header: bytes = source.read(_LOCAL_HEADER_SIZE)
+            if header[:4] != _LOCAL_HEADER_SIGNATURE:
+                raise ValueError(f"Member `{member}` has a bad local header")
+            name_length, extra_length = struct.unpack("<HH", header[26:30])
+            source.seek(name_length + extra_length, 1)
+            remaining: int = info.compress_size
+            while remaining > 0:
+                chunk: bytes = source.read(min(remaining, _COPY_CHUNK_SIZE))
+                if not chunk:
+                    raise ValueError(f"Member `{member}` is truncated")
+                remaining -= len(chunk)
+                yield chunk
+
+    def close(self) -> None:
+        self._zip.close()
+
+    def __enter__(self) -> "OmexArchive":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+class OmexWriter:
+    """
+    Write-only COMBINE archive that new members are streamed into one at a time, and that
+    members of another archive are copied into without decompressing them
+    """
+
+    def __init__(self, archive_location: str) -> None:
+        self.path: Path = Path(archive_location).resolve()
+        self._zip: ZipFile = ZipFile(self.path, "w", ZIP_DEFLATED)
+
+    @property
+    def members(self) -> list[str]:
+        return self._zip.namelist()
+
+    def write(self, member: str, data: bytes) -> None:
+        with span("archive.write", member):
+            self._zip.writestr(member, data)
+
+    def copy_compressed(self, source: OmexArchive, member: str) -> None:
+        """
+        Copy `member` of `source` over with its stored bytes, or, where ZipFile can't be
+        written to raw (see `can_write_raw`), by recompressing it
+        """
+        with span("archive.copy", member):
+            if not can_write_raw(self._zip):
+                self._recompress(source, member)
+                return
+            info: ZipInfo = copy.copy(source.info(member))
+            # CRC and sizes are known, so they go in the local header instead of a descriptor
+            info.flag_bits &= ~_DATA_DESCRIPTOR_FLAG
+            info.extra = _strip_zip64_extra(info.extra)
+            write_raw(self._zip, info, source.iter_compressed(member))
+
+    def _recompress(self, source: OmexArchive, member: str) -> None:
+        stored: ZipInfo = source.info(member)
+        info = ZipInfo(member, stored.date_time)
+        info.compress_type = ZIP_DEFLATED
+        info.external_attr = stored.external_attr
+        info.comment = stored.comment
+        info.file_size = stored.file_size  # lets ZipFile decide whether zip64 is needed
+        with source.open(member) as reader, self._zip.open(info, "w") as writer:
+            shutil.copyfileobj(reader, writer, _COPY_CHUNK_SIZE)
+
+    def close(self) -> None:
+        self._zip.close()
+
+    def __enter__(self) -> "OmexWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+def can_write_raw(zip_file: ZipFile) -> bool:
+    """
+    Whether `write_raw` can append to `zip_file`: it mirrors what `ZipFile.open(..., "w")`
+    does for a new member, through ZipFile internals CPython has kept unchanged in every
+    version tested here
+    """
+    return _RAW_WRITE_VERSIONS[0] <= sys.version_info[:2] < _RAW_WRITE_VERSIONS[1] and all(
+        hasattr(zip_file, name) for name in _RAW_WRITE_ATTRIBUTES
+    )
+
+
+def write_raw(zip_file: ZipFile, info: ZipInfo, data: Iterable[bytes]) -> None:
+    """
+    Append a member described by `info` (with its CRC and sizes) to `zip_file`, with `data`
+    as its stored bytes. ZipFile has no public API for this, so this is the one place that
+    writes through its internals; check `can_write_raw` first.
+    """
+    zip_any: Any = zip_file
+    with zip_any._lock:
+        if zip_any._writing:
+            raise ValueError("Can't write to the zip while another write handle is open on it")
+        target: IO[bytes] = zip_any.fp
+        if zip_any._seekable:
+            target.seek(zip_any.start_dir)
+        info.header_offset = target.tell()
+        zip_any._writecheck(info)
+        zip_any._didModify = True
+        target.write(info.FileHeader())
+        for chunk in data:
+            target.write(chunk)
+        zip_any.start_dir = target.tell()
+        zip_any.filelist.append(info)
+        zip_any.NameToInfo[info.filename] = info
+
+
+def _strip_zip64_extra(extra: bytes) -> bytes:
+    # FileHeader and the central directory add their own zip64 record when one is needed
+    kept: list[bytes] = []
+    offset: int = 0
+    while offset + 4 <= len(extra):
+        header_id, size = struct.unpack("<HH", extra[offset : offset + 4])
+        if header_id != _ZIP64_EXTRA_ID:
+            kept.append(extra[offset : offset + 4 + size])
+        offset += 4 + size
+    return b"".join(kept)
+
+
+def update_manifest(manifest: bytes, renamed: dict[str, str], format_: str) -> bytes:
+    """
+    Point the manifest entries of the `renamed` members (old -> new name) at their new
+    location and `format_`; renamed members without an entry get one
+    """
+    ET.register_namespace("", MANIFEST_NAMESPACE)
+    root: ET.Element = ET.fromstring(manifest)
+    pending: dict[str, str] = dict(renamed)
+    for content in root.iter(f"{{{MANIFEST_NAMESPACE}}}content"):
+        member: str = manifest_member(content.get("location", ""))
+        if member in pending:
+            content.set("location", f"./{pending.pop(member)}")
+            content.set("format", format_)
+    for new_name in pending.values():
+        ET.SubElement(
+            root,
+            f"{{{MANIFEST_NAMESPACE}}}content",
+            {"location": f"./{new_name}", "format": format_},
+        )
+    return ET.tostring(root, encoding="utf-8", xml_declaration=True)
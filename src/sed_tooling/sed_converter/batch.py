@@ -0,0 +1,186 @@
+import contextlib
+import io
+import json
+import time
+from argparse import ArgumentParser, Namespace
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from sed_tooling.sed_converter.cache import ResultCache
+from sed_tooling.sed_converter.core import STARTING_TYPES, add_cache_arguments, get_mode, setup
+
+ARCHIVE_EXTENSION = ".omex"
+GLOB_CHARACTERS = ("*", "?", "[")
+
+# Each worker process opens the validation cache once and reuses it for all its archives
+_worker_caches: dict[Optional[str], ResultCache] = {}
+
+
+def collect_archives(target: str) -> list[str]:
+    """
+    Resolve `target` to a sorted list of archives; `target` may be a directory (searched
+    recursively for .omex files), a glob pattern, a single archive, or a list file with one
+    archive path per line
+    """
+    if any(character in target for character in GLOB_CHARACTERS):
+        pattern: Path = Path(target)
+        matches = Path(pattern.anchor).glob(str(pattern.relative_to(pattern.anchor)))
+        return sorted(str(match.resolve()) for match in matches)
+    path: Path = Path(target)
+    if path.is_dir():
+        return sorted(str(archive.resolve()) for archive in path.rglob(f"*{ARCHIVE_EXTENSION}"))
+    if path.suffix == ARCHIVE_EXTENSION:
+        return [str(path.resolve())]
+    if path.is_file():
+        with path.open("r") as list_file:
+            lines = [line.strip() for line in list_file]
+        return [str((path.parent / line).resolve()) for line in lines if line]
+    raise FileNotFoundError(f"`{target}` is not a directory, glob, archive, or list file")
+
+
+def load_checkpoint(checkpoint: Path) -> set[str]:
+    if not checkpoint.is_file():
+        return set()
+    with checkpoint.open("r") as completed:
+        return {line.strip() for line in completed if line.strip()}
+
+
+def _worker_cache(cache_dir: Optional[str]) -> ResultCache:
+    if cache_dir not in _worker_caches:
+        _worker_caches[cache_dir] = ResultCache(cache_dir)
+    return _worker_caches[cache_dir]
+
+
+def process_archive(
+    archive: str,
+    convert: bool,
+    mode: str,
+    use_cache: bool = False,
+    cache_dir: Optional[str] = None,
+    output_location: Optional[str] = None,
+) -> dict[str, Any]:
+    result: dict[str, Any] = {"archive": archive}
+    start: float = time.perf_counter()
+    try:
+        cache: Optional[ResultCache] = _worker_cache(cache_dir) if use_cache else None
+        # The cores report progress with print; a batch run only keeps the JSONL result
+        with contextlib.redirect_stdout(io.StringIO()):
+            errors: dict[str, str] = setup(
+                archive, convert, mode, cache=cache, output_location=output_location
+            )
+        result["status"] = "invalid" if errors else "valid"
+        result["errors"] = errors
+    except Exception as e:
+        result["status"] = "failed"
+        result["errors"] = {archive: f"{type(e).__name__}: {e}"}
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def run_batch(
+    archives: list[str],
+    output: str,
+    convert: bool,
+    mode: str,
+    jobs: int = 1,
+    checkpoint: Optional[str] = None,
+    use_cache: bool = False,
+    cache_dir: Optional[str] = None,
+) -> int:
+    """
+    Process every archive not yet recorded in the checkpoint, appending one JSONL line per
+    archive to `output`; returns the number of archives processed by this run
+    """
+    checkpoint_path: Path = Path(checkpoint if checkpoint is not None else f"{output}.checkpoint")
+    completed: set[str] = load_checkpoint(checkpoint_path)
+    pending: list[str] = [archive for archive in archives if archive not in completed]
+    processed: int = 0
+    with Path(output).open("a") as results, checkpoint_path.open("a") as checkpoint_file:
+        for result in _run_archives(pending, convert, mode, jobs, use_cache, cache_dir):
+            results.write(json.dumps(result) + "\n")
+            results.flush()
+            # Only checkpoint an archive once its result line is safely written
+            checkpoint_file.write(result["archive"] + "\n")
+            checkpoint_file.flush()
+            processed += 1
+    return processed
+
+
+def _run_archives(
+    archives: list[str],
+    convert: bool,
+    mode: str,
+    jobs: int,
+    use_cache: bool,
+    cache_dir: Optional[str],
+) -> Iterator[dict[str, Any]]:
+    if jobs <= 1:
+        for archive in archives:
+            yield process_archive(archive, convert, mode, use_cache, cache_dir)
+        return
+    # Bound the number of queued archives so huge corpora don't build huge future lists
+    max_in_flight: int = jobs * 4
+    remaining: Iterator[str] = iter(archives)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        in_flight: set[Future[dict[str, Any]]] = set()
+        for archive in remaining:
+            in_flight.add(
+                executor.submit(process_archive, archive, convert, mode, use_cache, cache_dir)
+            )
+            if len(in_flight) < max_in_flight:
+                continue
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+        for future in in_flight:
+            yield future.result()
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description="Verify or Convert a corpus of COMBINE archives, one JSONL result per archive"
+    )
+    parser.add_argument("starting_type", choices=STARTING_TYPES)
+    parser.add_argument(
+        "archives", help="a directory, a glob pattern, or a file listing one archive per line"
+    )
+    parser.add_argument("--output", required=True, help="the JSONL file results are appended to")
+    parser.add_argument(
+        "--checkpoint",
+        default=None,
+        help="the file recording completed archives (default: <output>.checkpoint); "
+        "archives listed in it are skipped, so an interrupted run resumes where it stopped.",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="do not convert the archives, "
+        "just confirm if the archives contain verified Sed/SED-ML documents.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="process the archives in N worker processes.",
+    )
+    add_cache_arguments(parser)
+    args: Namespace = parser.parse_args()
+
+    archives: list[str] = collect_archives(args.archives)
+    processed: int = run_batch(
+        archives,
+        args.output,
+        not args.verify,
+        get_mode(args.starting_type),
+        args.jobs,
+        args.checkpoint,
+        not args.no_cache,
+        args.cache_dir,
+    )
+    print(f"processed {processed} of {len(archives)} archives")
+
+
+if __name__ == "__main__":
+    main()
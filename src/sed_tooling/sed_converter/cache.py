@@ -0,0 +1,223 @@
+import hashlib
+import os
+import sqlite3
+import time
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Optional
+
+from sed_tooling.sed_converter.executor import FileResult, FileTask, iter_per_file, run_per_file
+from sed_tooling.sed_converter.profiling import span
+
+CACHE_DIR_ENV = "SED_TOOLING_CACHE_DIR"
+CACHE_FILE_NAME = "validation_cache.sqlite3"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Hits whose use is recorded in one write, rather than each with its own transaction
+TOUCH_BATCH_SIZE = 256
+# How results are stored; entries stored any other way are never looked up
+CACHE_FORMAT = 2
+# Stands for the file's name in cached errors, since files with the same contents share them
+FILE_PLACEHOLDER = "<cached file>"
+
+
+def get_tool_version() -> str:
+    try:
+        return version("sed-tooling")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def default_cache_dir() -> Path:
+    configured: Optional[str] = os.environ.get(CACHE_DIR_ENV)
+    if configured:
+        return Path(configured)
+    return Path.home() / ".cache" / "sed_tooling"
+
+
+class CachedResult(NamedTuple):
+    # Exactly one of these is set: the validated document's JSON, or why validation failed
+    document: Optional[str]
+    error: Optional[str]
+
+
+class ResultCache:
+    """
+    On-disk, content-addressed cache of validation results, evicting the least recently used
+    entries once the stored results grow past `max_bytes`
+    """
+
+    def __init__(
+        self, directory: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES
+    ) -> None:
+        self.directory: Path = Path(directory) if directory is not None else default_cache_dir()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes: int = max_bytes
+        self.tool_version: str = get_tool_version()
+        self._connection: sqlite3.Connection = sqlite3.connect(
+            str(self.directory / CACHE_FILE_NAME), timeout=30
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, document TEXT, error TEXT, "
+            "size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)"
+        )
+        self._connection.commit()
+        # Hits not yet recorded in the database: key -> when it was last used
+        self._touched: dict[str, float] = {}
+
+    def key(self, schema_version: str, contents: bytes) -> str:
+        digest = hashlib.sha256(contents)
+        digest.update(f"\0{CACHE_FORMAT}\0{self.tool_version}\0{schema_version}".encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[CachedResult]:
+        row = self._connection.execute(
+            "SELECT document, error FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        # Hits are only read; their use is recorded with the next write, or once enough pile up
+        self._touched[key] = time.time()
+        if len(self._touched) >= TOUCH_BATCH_SIZE:
+            self.flush()
+        return CachedResult(row[0], row[1])
+
+    def put(self, key: str, result: CachedResult) -> None:
+        size: int = len(result.document or "") + len(result.error or "")
+        self._touched.pop(key, None)
+        self._write_touches()
+        self._connection.execute(
+            "INSERT OR REPLACE INTO results (key, document, error, size, last_used) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, result.document, result.error, size, time.time()),
+        )
+        self._evict()
+        self._connection.commit()
+
+    def flush(self) -> None:
+        """
+        Record when every hit since the last write was used, in one transaction
+        """
+        if self._touched:
+            self._write_touches()
+            self._connection.commit()
+
+    def _write_touches(self) -> None:
+        self._connection.executemany(
+            "UPDATE results SET last_used = ? WHERE key = ?",
+            [(last_used, key) for key, last_used in self._touched.items()],
+        )
+        self._touched.clear()
+
+    def _evict(self) -> None:
+        total: int = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        stale: list[str] = []
+        for key, size in self._connection.execute(
+            "SELECT key, size FROM results ORDER BY last_used"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            stale.append(key)
+            total -= size
+        self._connection.executemany("DELETE FROM results WHERE key = ?", [(k,) for k in stale])
+
+    def close(self) -> None:
+        self.flush()
+        self._connection.close()
+
+
+def iter_per_file_cached(
+    task: FileTask,
+    files: Iterable[tuple[str, Optional[bytes]]],
+    jobs: int,
+    cache: Optional[ResultCache],
+    schema_version: str,
+    to_cache: Callable[[Any], Optional[str]],
+    from_cache: Callable[[str], Any],
+) -> Iterator[FileResult]:
+    """
+    Like `iter_per_file`, but results of files whose contents were seen before come from
+    the cache; `to_cache`/`from_cache` turn a task's value into its cached JSON and back.
+    Serially, each file is looked up (and run on a miss) only when its result is asked for.
+    """
+    if cache is None:
+        yield from iter_per_file(task, files, jobs)
+        return
+    if jobs <= 1:
+        for file, contents in files:
+            yield from _run_cached(
+                task, [(file, contents)], jobs, cache, schema_version, to_cache, from_cache
+            )
+        return
+    yield from _run_cached(task, files, jobs, cache, schema_version, to_cache, from_cache)
+
+
+def _run_cached(
+    task: FileTask,
+    files: Iterable[tuple[str, Optional[bytes]]],
+    jobs: int,
+    cache: ResultCache,
+    schema_version: str,
+    to_cache: Callable[[Any], Optional[str]],
+    from_cache: Callable[[str], Any],
+) -> list[FileResult]:
+    results: dict[str, FileResult] = {}
+    keys: dict[str, str] = {}
+    order: list[str] = []
+    misses: list[tuple[str, Optional[bytes]]] = []
+    for file, contents in files:
+        order.append(file)
+        if contents is None and Path(file).is_file():
+            contents = Path(file).read_bytes()
+        if contents is None:
+            misses.append((file, None))  # let the task report the missing file
+            continue
+        with span("cache.lookup", file):
+            keys[file] = cache.key(schema_version, contents)
+            hit: Optional[CachedResult] = cache.get(keys[file])
+        if hit is None:
+            misses.append((file, contents))
+        elif hit.error is not None:
+            results[file] = FileResult(file, None, hit.error.replace(FILE_PLACEHOLDER, file))
+        else:
+            try:
+                results[file] = FileResult(file, from_cache(hit.document or ""), None)
+            except (ValueError, KeyError, TypeError):
+                # A damaged entry: run the task again, and store its result in its place
+                misses.append((file, contents))
+
+    for result in run_per_file(task, misses, jobs):
+        results[result.file] = result
+        if result.file not in keys:
+            continue
+        if result.error is not None:
+            error: str = result.error.replace(result.file, FILE_PLACEHOLDER)
+            cache.put(keys[result.file], CachedResult(None, error))
+        else:
+            cache.put(keys[result.file], CachedResult(to_cache(result.value), None))
+    return [results[file] for file in order]
+
+
+def run_per_file_cached(
+    task: FileTask,
+    files: Iterable[tuple[str, Optional[bytes]]],
+    jobs: int,
+    cache: Optional[ResultCache],
+    schema_version: str,
+    to_cache: Callable[[Any], Optional[str]],
+    from_cache: Callable[[str], Any],
+) -> list[FileResult]:
+    """
+    Every result of `iter_per_file_cached`, in the order of `files`
+    """
+    return list(
+        iter_per_file_cached(task, files, jobs, cache, schema_version, to_cache, from_cache)
+    )
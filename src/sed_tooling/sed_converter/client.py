@@ -0,0 +1,127 @@
+"""
+Send an archive to a running `sed_tooling.sed_converter.server` and print its JSON result.
+
+    python -m sed_tooling.sed_converter.client sed archive.omex --socket /tmp/sed_tooling.sock
+"""
+
+import base64
+import http.client
+import json
+import socket
+import sys
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from typing import Any, Optional
+
+HOST = "127.0.0.1"
+PROCESS_PATH = "/process"
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: Optional[float] = None) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path: str = socket_path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def send_request(
+    request: dict[str, Any],
+    socket_path: Optional[str] = None,
+    port: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> dict[str, Any]:
+    connection: http.client.HTTPConnection
+    if socket_path is not None:
+        connection = UnixHTTPConnection(socket_path, timeout)
+    elif port is not None:
+        connection = http.client.HTTPConnection(HOST, port, timeout=timeout)
+    else:
+        raise ValueError("Connect to either a Unix socket or a localhost port")
+    try:
+        connection.request(
+            "POST",
+            PROCESS_PATH,
+            json.dumps(request).encode(),
+            {"Content-Type": "application/json"},
+        )
+        response: http.client.HTTPResponse = connection.getresponse()
+        body: dict[str, Any] = json.loads(response.read())
+    finally:
+        connection.close()
+    if response.status != 200:
+        raise RuntimeError(f"Server rejected the request: {body.get('error', response.status)}")
+    return body
+
+
+def process_remotely(
+    archive: str,
+    starting_type: str,
+    convert: bool,
+    socket_path: Optional[str] = None,
+    port: Optional[int] = None,
+    upload: bool = False,
+    output: Optional[str] = None,
+) -> dict[str, Any]:
+    """
+    Have the server process `archive`, by path, or by its contents when `upload` is set
+    (e.g. when the server can not see the client's files)
+    """
+    request: dict[str, Any] = {"starting_type": starting_type, "convert": convert}
+    if upload:
+        request["archive_base64"] = base64.b64encode(Path(archive).read_bytes()).decode("ascii")
+    else:
+        request["archive"] = str(Path(archive).resolve())
+        if output is not None:
+            request["output"] = str(Path(output).resolve())
+    result: dict[str, Any] = send_request(request, socket_path, port)
+    converted: Optional[str] = result.pop("converted_base64", None)
+    if converted is not None and output is not None:
+        Path(output).write_bytes(base64.b64decode(converted))
+    return result
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Verify or Convert a COMBINE archive on a running server")
+    # The server checks the starting type, so the client never imports the converters
+    parser.add_argument("starting_type", help="Sed or SED-ML (checked by the server)")
+    parser.add_argument("archive_location")
+    transport = parser.add_mutually_exclusive_group(required=True)
+    transport.add_argument("--socket", default=None, help="the server's Unix socket.")
+    transport.add_argument("--port", type=int, default=None, help="the server's localhost port.")
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="do not convert the archive, "
+        "just confirm if the archive contains verified Sed/SED-ML documents.",
+    )
+    parser.add_argument(
+        "--upload",
+        action="store_true",
+        help="send the archive's contents instead of its path.",
+    )
+    parser.add_argument(
+        "--output", default=None, help="where the converted archive is written (Sed archives)."
+    )
+    args: Namespace = parser.parse_args()
+
+    result: dict[str, Any] = process_remotely(
+        args.archive_location,
+        args.starting_type,
+        not args.verify,
+        args.socket,
+        args.port,
+        args.upload,
+        args.output,
+    )
+    print(json.dumps(result, indent=2))
+    if result["status"] != "valid":
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,186 @@
-import os
+import importlib
+import json
 from argparse import ArgumentParser, Namespace
 from pathlib import Path
-from tempfile import TemporaryDirectory
-from typing import List
-from zipfile import ZipFile
+from typing import Any, Callable, Iterator, Optional, Protocol
 
-from sed_tooling.sed_converter.sed_core import SedCore
-from sed_tooling.sed_converter.sedml_core import SedMLCore
+from sed_tooling.sed_converter.archive import (
+    SED_EXTENSION,
+    SEDML_EXTENSION,
+    SEDML_FORMAT,
+    OmexArchive,
+)
+from sed_tooling.sed_converter.cache import ResultCache
+from sed_tooling.sed_converter.executor import FileResult
+from sed_tooling.sed_converter.incremental import (
+    IncrementalState,
+    MemberState,
+    member_states,
+    state_path,
+)
+from sed_tooling.sed_converter.profiling import Profiler, SpanRecord, span
 
 SED_MODE = "Sed"
 SEDML_MODE = "SedML"
+STARTING_TYPES = ["Sed", "sed", "SED-ML", "SedML", "sedml"]
 
+# The core class handling each mode, as "module:Class", the extension of its documents and
+# the manifest format declaring them, if there is one.
+# Backends are only imported once a run needs them, so Sed runs never load libsedml.
+BACKENDS: dict[str, tuple[str, str, Optional[str]]] = {
+    SED_MODE: ("sed_tooling.sed_converter.sed_core:SedCore", SED_EXTENSION, None),
+    SEDML_MODE: (
+        "sed_tooling.sed_converter.sedml_core:SedMLCore",
+        SEDML_EXTENSION,
+        SEDML_FORMAT,
+    ),
+}
 
-def setup(archive_location: str, convert: bool, mode: str) -> None:
-    abs_archive_path: Path = Path(archive_location).resolve()
-    with TemporaryDirectory() as temp_dir:
-        sed_files: List[str] = []
-        sedml_files: List[str] = []
-
-        with ZipFile(abs_archive_path, "r") as original_omex:
-            original_omex.extractall(temp_dir)
-        for root, _, files in os.walk(temp_dir, topdown=False, followlinks=False):
-            for file in files:
-                full_path: str = str((Path(root) / file).resolve())
-                if full_path.endswith(".sed"):
-                    sed_files.append(full_path)
-                elif full_path.endswith(".sedml"):
-                    sedml_files.append(full_path)
-
-        if mode == SED_MODE:
-            sed_core = SedCore(sed_files=sed_files)
-            sed_core.validate_all_files()
-            if convert:
-                # call convertToSedML() on sed_core
-                pass
-
-        if mode == SEDML_MODE:
-            sedml_core = SedMLCore(sedml_files=sedml_files)
-            sedml_core.validate_all_files()
-            if convert:
-                sedml_core.convert_all_to_sed()
+
+class DocumentCore(Protocol):
+    """
+    What `setup` needs of the core class of each mode, see `BACKENDS`
+    """
+
+    files: list[str]
+    errors: dict[str, str]
+    # Valid documents that failed to convert, and results reused from an earlier run
+    conversion_errors: dict[str, str]
+    reused: dict[str, Optional[str]]
+
+    def schema_version(self) -> str: ...
+
+    def reuse_results(self, results: dict[str, Optional[str]]) -> None: ...
+
+    def document_dependencies(self, file: str) -> Optional[list[str]]: ...
+
+    def iter_validate(self, retain: bool = False) -> Iterator[FileResult]: ...
+
+    def convert_all(self, output_location: Optional[str] = None) -> None: ...
+
+
+def get_mode(starting_type: str) -> str:
+    if starting_type == "Sed" or starting_type == "sed":
+        return SED_MODE
+    return SEDML_MODE
+
+
+def add_cache_arguments(parser: ArgumentParser) -> None:
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always re-validate documents instead of reusing cached validation results.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="the directory of the validation cache "
+        "(default: $SED_TOOLING_CACHE_DIR or ~/.cache/sed_tooling).",
+    )
+
+
+def register_backend(mode: str, core: str, extension: str, format_: Optional[str] = None) -> None:
+    """
+    `core` ("module:Class") handles the members the manifest declares with a format starting
+    with `format_`, and members without a declared format that end with `extension`
+    """
+    BACKENDS[mode] = (core, extension, format_)
+
+
+def load_backend(mode: str) -> Callable[..., DocumentCore]:
+    """
+    Import and return the core class of `mode`
+    """
+    if mode not in BACKENDS:
+        raise ValueError(f"No backend for mode `{mode}` (known: {', '.join(BACKENDS)})")
+    module_name, _, class_name = BACKENDS[mode][0].partition(":")
+    core: Callable[..., DocumentCore] = getattr(importlib.import_module(module_name), class_name)
+    return core
+
+
+def setup(
+    archive_location: str,
+    convert: bool,
+    mode: str,
+    jobs: int = 1,
+    cache: Optional[ResultCache] = None,
+    output_location: Optional[str] = None,
+    incremental: bool = False,
+    plan: bool = False,
+    outputs: Optional[list[str]] = None,
+) -> dict[str, str]:
+    """
+    Validate (and optionally convert) every document of the archive;
+    returns the error of every document that failed, keyed by archive member.
+    With `incremental`, results stored next to the archive by an earlier run are reused for
+    every document that, like the members it depends on, has not changed since.
+    With `plan`, the action plan of every valid Sed document is printed as JSON.
+    With `outputs`, SED-ML documents only index and convert those outputs and what they need.
+    """
+    errors: dict[str, str] = {}
+    with span("open_archive"):
+        archive = OmexArchive(archive_location)
+    with archive:
+        with span("load_backend"):
+            if outputs is not None and mode != SEDML_MODE:
+                raise ValueError("Outputs can only be chosen for SED-ML archives")
+            document_core = load_backend(mode)(
+                archive.index.documents(*BACKENDS[mode][1:]),
+                archive=archive,
+                jobs=jobs,
+                cache=cache,
+                **({} if outputs is None else {"output_ids": outputs}),
+            )
+        if incremental:
+            current: dict[str, MemberState] = member_states(archive)
+            state = IncrementalState.load(
+                state_path(archive.path), mode, document_core.schema_version()
+            )
+            document_core.reuse_results(state.reusable(document_core.files, current))
+        if convert:
+            with span("convert"):
+                # Each document is converted as soon as it is validated, then let go
+                document_core.convert_all(output_location)
+        else:
+            with span("validate"):
+                # Each document is let go as soon as it is validated
+                for _ in document_core.iter_validate():
+                    pass
+        if incremental:
+            state.update(document_core, current)
+            state.save(state_path(archive.path))
+        if plan:
+            if not hasattr(document_core, "action_plans"):
+                raise ValueError(f"Action plans are only available for Sed archives, not {mode}")
+            print(json.dumps(document_core.action_plans(), indent=2))
+        errors.update(document_core.errors)
+    if cache is not None:
+        cache.flush()  # the hits of this run, in one write
+    return errors
+
+
+def profile_setup(archive_location: str, *args: Any, **kwargs: Any) -> dict[str, Any]:
+    """
+    Run `setup` under a Profiler and return its breakdown for the archive and each file
+    """
+    with Profiler() as profiler:
+        with span("setup"):
+            errors: dict[str, str] = setup(archive_location, *args, **kwargs)
+    root: SpanRecord = profiler.records[-1]
+    return {
+        "archive": str(Path(archive_location).resolve()),
+        "seconds": root.seconds,
+        "peak_bytes": root.peak_bytes,
+        "errors": errors,
+        **profiler.report(),
+    }
 
 
 def main() -> None:
     parser = ArgumentParser(
         description="Verify or Convert a COMBINE archive with either Sed or SED_ML documents"
     )
-    parser.add_argument("starting_type", choices=["Sed", "sed", "SED-ML", "SedML", "sedml"])
+    parser.add_argument("starting_type", choices=STARTING_TYPES)
     parser.add_argument("archive_location", help="The path to the archive to execute")
     parser.add_argument(
         "--verify",
@@ -54,15 +188,85 @@ def main() -> None:
         help="do not convert the archive, "
         "just confirm if the archive contains verified Sed/SED-ML documents.",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="validate and convert the documents of the archive in N worker processes.",
+    )
+    add_cache_arguments(parser)
+    parser.add_argument(
+        "--output",
+        default=None,
+        metavar="OUT_OMEX",
+        help="where to write the converted archive when converting Sed documents "
+        "(default: <archive>_sedml.omex next to the archive).",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only re-validate documents that changed since the last --incremental run "
+        "(or whose dependencies did); results are kept in <archive>.validation.json.",
+    )
+    parser.add_argument(
+        "--profile",
+        default=None,
+        metavar="OUT_JSON",
+        help="write a per-phase, per-file timing and peak-memory breakdown to OUT_JSON.",
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="print, as JSON, the stages in which the actions of each valid Sed document "
+        "can run (each stage's actions are independent of each other).",
+    )
+    parser.add_argument(
+        "--outputs",
+        default=None,
+        metavar="ID,ID",
+        help="only index and convert these outputs of SED-ML documents (e.g. report1,plot2), "
+        "with the data generators, tasks, models and simulations they need. A document "
+        "missing any of them is an error.",
+    )
     args: Namespace = parser.parse_args()
+    if args.plan and get_mode(args.starting_type) != SED_MODE:
+        parser.error("--plan only applies to Sed archives")
+    if args.output is not None and get_mode(args.starting_type) != SED_MODE:
+        parser.error("--output only applies to Sed archives")
+    outputs: Optional[list[str]] = None
+    if args.outputs is not None:
+        if get_mode(args.starting_type) != SEDML_MODE:
+            parser.error("--outputs only applies to SED-ML archives")
+        outputs = [output.strip() for output in args.outputs.split(",") if output.strip()]
+        if not outputs:
+            parser.error("--outputs needs at least one output ID")
 
-    mode: str
-    if args.starting_type == "Sed" or args.starting_type == "sed":
-        mode = SED_MODE
-    else:
-        mode = SEDML_MODE
-
-    setup(args.archive_location, not args.verify, mode)
+    cache: Optional[ResultCache] = None if args.no_cache else ResultCache(args.cache_dir)
+    run_args = (args.archive_location, not args.verify, get_mode(args.starting_type), args.jobs)
+    try:
+        if args.profile is None:
+            setup(
+                *run_args,
+                cache=cache,
+                output_location=args.output,
+                incremental=args.incremental,
+                plan=args.plan,
+                outputs=outputs,
+            )
+            return
+        report: dict[str, Any] = profile_setup(
+            *run_args,
+            cache=cache,
+            output_location=args.output,
+            incremental=args.incremental,
+            plan=args.plan,
+            outputs=outputs,
+        )
+        Path(args.profile).write_text(json.dumps(report, indent=2) + "\n")
+    finally:
+        if cache is not None:
+            cache.close()
 
 
 if __name__ == "__main__":
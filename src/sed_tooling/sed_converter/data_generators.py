@@ -0,0 +1,314 @@
+"""
+Vectorized evaluation of SED-ML data generators. Each generator's math is compiled once into a
+single NumPy expression over its variables and parameters, which then evaluates whole result
+arrays (or chunks of them) per call instead of one time point at a time.
+"""
+
+import csv
+import math
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Union,
+)
+
+import numpy as np
+from libsedml import ASTNode, formulaToL3String  # type: ignore
+from libsedml import SedDataGenerator as SedMLDataGenerator
+
+# Elementwise functions of one argument
+UNARY_FUNCTIONS: dict[str, str] = {
+    "abs": "np.abs",
+    "exp": "np.exp",
+    "ln": "np.log",
+    "floor": "np.floor",
+    "ceil": "np.ceil",
+    "ceiling": "np.ceil",
+    "sin": "np.sin",
+    "cos": "np.cos",
+    "tan": "np.tan",
+    "arcsin": "np.arcsin",
+    "arccos": "np.arccos",
+    "arctan": "np.arctan",
+    "sinh": "np.sinh",
+    "cosh": "np.cosh",
+    "tanh": "np.tanh",
+    "arcsinh": "np.arcsinh",
+    "arccosh": "np.arccosh",
+    "arctanh": "np.arctanh",
+}
+# Elementwise functions of two arguments
+BINARY_FUNCTIONS: dict[str, str] = {
+    # MathML <power/> is read as a function, not as the ^ operator
+    "power": "np.power",
+    "pow": "np.power",
+    "quotient": "np.floor_divide",
+    "rem": "np.remainder",
+}
+# Functions of two or more arguments, folded pairwise
+FOLDED_FUNCTIONS: dict[str, str] = {
+    "max": "np.maximum",
+    "min": "np.minimum",
+    "and": "np.logical_and",
+    "or": "np.logical_or",
+    "xor": "np.logical_xor",
+}
+# SED-ML aggregates over a whole result array, when given a single argument
+AGGREGATES: dict[str, str] = {
+    "max": "np.max",
+    "min": "np.min",
+    "sum": "np.sum",
+    "product": "np.prod",
+}
+RELATIONS: dict[str, str] = {
+    "eq": "np.equal",
+    "neq": "np.not_equal",
+    "gt": "np.greater",
+    "lt": "np.less",
+    "geq": "np.greater_equal",
+    "leq": "np.less_equal",
+}
+CONSTANTS: dict[str, str] = {
+    "pi": "np.pi",
+    "exponentiale": "np.e",
+    "true": "True",
+    "false": "False",
+    "avogadro": "6.02214076e23",
+}
+OPERATORS: dict[str, str] = {"+": " + ", "*": " * "}
+# What an n-ary operator applied to no arguments evaluates to
+IDENTITIES: dict[str, str] = {"+": "0.0", "*": "1.0"}
+
+
+class _Compiler:
+    def __init__(self, names: Mapping[str, str]) -> None:
+        self.names: Mapping[str, str] = names
+        # Set when the expression reduces over its inputs, so chunks can't be evaluated apart
+        self.aggregates: bool = False
+
+    def compile(self, node: ASTNode) -> str:
+        children: list[str] = [
+            self.compile(node.getChild(i)) for i in range(node.getNumChildren())
+        ]
+        name: Optional[str] = node.getName()
+        if node.isNumber():
+            return _number(node.getValue())
+        if node.isOperator():
+            operator: str = node.getCharacter()
+            if operator in OPERATORS:
+                if not children:
+                    return IDENTITIES[operator]
+                return f"({OPERATORS[operator].join(children)})"
+            if operator == "-":
+                return (
+                    f"(-{children[0]})"
+                    if len(children) == 1
+                    else f"({children[0]} - {children[1]})"
+                )
+            if operator == "/":
+                return f"np.true_divide({children[0]}, {children[1]})"
+            if operator == "^":
+                return f"np.power({children[0]}, {children[1]})"
+        elif node.isConstant() and name in CONSTANTS:
+            return CONSTANTS[name]
+        elif node.isName():
+            if name is None or name not in self.names:
+                raise ValueError(f"`{name}` is neither a variable nor a parameter")
+            return self.names[name]
+        elif name == "not":
+            return f"np.logical_not({children[0]})"
+        elif name in RELATIONS:
+            if len(children) == 2:
+                return f"{RELATIONS[name]}({children[0]}, {children[1]})"
+            # a < b < c: every neighbouring pair holds
+            pairs: list[str] = [
+                f"{RELATIONS[name]}({left}, {right})"
+                for left, right in zip(children, children[1:])
+            ]
+            return _fold("np.logical_and", pairs)
+        elif name in AGGREGATES and len(children) == 1:
+            self.aggregates = True
+            return f"{AGGREGATES[name]}({children[0]})"
+        elif name in FOLDED_FUNCTIONS:
+            return _fold(FOLDED_FUNCTIONS[name], children)
+        elif name in UNARY_FUNCTIONS and len(children) == 1:
+            return f"{UNARY_FUNCTIONS[name]}({children[0]})"
+        elif name in BINARY_FUNCTIONS and len(children) == 2:
+            return f"{BINARY_FUNCTIONS[name]}({children[0]}, {children[1]})"
+        elif name == "log":
+            # libsedml always gives the base, 10 when none was written
+            return f"np.true_divide(np.log({children[1]}), np.log({children[0]}))"
+        elif name == "root":
+            if len(children) == 1:
+                return f"np.sqrt({children[0]})"
+            return f"np.power({children[1]}, np.true_divide(1.0, {children[0]}))"
+        elif name == "piecewise":
+            # Values alternate with their conditions, then an optional value otherwise
+            values: list[str] = children[0::2][: len(children) // 2]
+            conditions: list[str] = children[1::2]
+            otherwise: str = children[-1] if len(children) % 2 else "np.nan"
+            return f"np.select([{', '.join(conditions)}], [{', '.join(values)}], {otherwise})"
+        raise ValueError(f"Unsupported math `{formulaToL3String(node)}`")
+
+
+def _number(value: float) -> str:
+    if math.isnan(value):
+        return "np.nan"
+    if math.isinf(value):
+        return "np.inf" if value > 0 else "(-np.inf)"
+    return repr(float(value))
+
+
+def _fold(function: str, arguments: list[str]) -> str:
+    folded: str = arguments[0]
+    for argument in arguments[1:]:
+        folded = f"{function}({folded}, {argument})"
+    return folded
+
+
+class CompiledMath(NamedTuple):
+    expression: str
+    # Whether the expression reduces over its inputs, so chunks can't be evaluated apart
+    aggregates: bool
+    function: Callable[..., Any]
+
+
+def compile_math(math_node: ASTNode, identifiers: Sequence[str], label: str) -> CompiledMath:
+    """
+    Compile `math_node` into a NumPy function taking the values of `identifiers`, in order
+    """
+    # Ids become positional arguments, so any SId is a valid Python name in the expression
+    arguments: list[str] = [f"_{i}" for i in range(len(identifiers))]
+    compiler = _Compiler(dict(zip(identifiers, arguments)))
+    expression: str = compiler.compile(math_node)
+    # The source is generated from the AST, never taken from the document as text
+    function: Callable[..., Any] = eval(
+        compile(f"lambda {', '.join(arguments)}: {expression}", label, "eval"),
+        {"np": np, "__builtins__": {}},
+    )
+    return CompiledMath(expression, compiler.aggregates, function)
+
+
+class CompiledDataGenerator:
+    """
+    The math of one data generator as a NumPy function of its variables' result arrays
+    """
+
+    __slots__ = ("_function", "aggregates", "expression", "identifier", "parameters", "variables")
+
+    def __init__(self, data_gen: SedMLDataGenerator) -> None:
+        self.identifier: str = data_gen.getId()
+        math_node: Optional[ASTNode] = data_gen.getMath()
+        if math_node is None:
+            raise ValueError(f"Data generator `{self.identifier}` has no math")
+        self.variables: tuple[str, ...] = tuple(
+            data_gen.getVariable(i).getId() for i in range(data_gen.getNumVariables())
+        )
+        self.parameters: dict[str, float] = {
+            data_gen.getParameter(i).getId(): data_gen.getParameter(i).getValue()
+            for i in range(data_gen.getNumParameters())
+        }
+        compiled: CompiledMath = compile_math(
+            math_node, (*self.variables, *self.parameters), self.identifier
+        )
+        self.expression: str = compiled.expression
+        self.aggregates: bool = compiled.aggregates
+        self._function: Callable[..., Any] = compiled.function
+
+    def _arrays(self, results: Mapping[str, np.ndarray]) -> list[np.ndarray]:
+        missing: list[str] = [variable for variable in self.variables if variable not in results]
+        if missing:
+            raise ValueError(
+                f"No results for variables {', '.join(missing)} of `{self.identifier}`"
+            )
+        return [np.asarray(results[variable], dtype=float) for variable in self.variables]
+
+    def _call(self, arrays: list[np.ndarray]) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            value: np.ndarray = np.asarray(
+                self._function(*arrays, *self.parameters.values()), dtype=float
+            )
+        if value.ndim == 0 and arrays and not self.aggregates:
+            # Math that ignores its variables still gives one value per point
+            value = np.full(arrays[0].shape, value)
+        return value
+
+    def evaluate(self, results: Mapping[str, np.ndarray]) -> np.ndarray:
+        """
+        The generator's values for whole result arrays, keyed by variable id
+        """
+        return self._call(self._arrays(results))
+
+    def evaluate_chunks(
+        self, results: Mapping[str, np.ndarray], chunk_size: int
+    ) -> Iterator[np.ndarray]:
+        """
+        The generator's values `chunk_size` points at a time, for results too long to evaluate
+        at once; aggregates need every point, so they can't be chunked
+        """
+        if self.aggregates:
+            raise ValueError(f"`{self.identifier}` aggregates its results and can't be chunked")
+        if chunk_size < 1:
+            raise ValueError("Chunks must hold at least one point")
+        arrays: list[np.ndarray] = self._arrays(results)
+        length: int = len(arrays[0]) if arrays else 1
+        for start in range(0, length, chunk_size):
+            yield self._call([array[start : start + chunk_size] for array in arrays])
+
+
+class DataGeneratorEngine:
+    """
+    Every data generator compiled once, evaluated together over one set of results
+    """
+
+    def __init__(self, data_gens: Iterable[SedMLDataGenerator]) -> None:
+        self.generators: dict[str, CompiledDataGenerator] = {}
+        for data_gen in data_gens:
+            compiled = CompiledDataGenerator(data_gen)
+            self.generators[compiled.identifier] = compiled
+
+    def evaluate(self, results: Mapping[str, np.ndarray]) -> dict[str, np.ndarray]:
+        return {
+            identifier: generator.evaluate(results)
+            for identifier, generator in self.generators.items()
+        }
+
+    def evaluate_chunks(
+        self, results: Mapping[str, np.ndarray], chunk_size: int
+    ) -> Iterator[dict[str, np.ndarray]]:
+        chunks: dict[str, Iterator[np.ndarray]] = {
+            identifier: generator.evaluate_chunks(results, chunk_size)
+            for identifier, generator in self.generators.items()
+        }
+        while chunks:
+            chunk: dict[str, np.ndarray] = {}
+            for identifier, generator_chunks in chunks.items():
+                value: Optional[np.ndarray] = next(generator_chunks, None)
+                if value is None:
+                    return
+                chunk[identifier] = value
+            yield chunk
+
+
+def load_results(path: Union[str, Path]) -> dict[str, np.ndarray]:
+    """
+    Stand-in simulation results, keyed by variable id: the arrays of an .npz file, or the
+    columns of a .csv file whose header row holds the ids
+    """
+    path = Path(path)
+    if path.suffix == ".npz":
+        with np.load(path) as arrays:
+            return {name: arrays[name] for name in arrays.files}
+    if path.suffix == ".csv":
+        with path.open(newline="") as file:
+            header: list[str] = [name.strip() for name in next(csv.reader(file))]
+            values: np.ndarray = np.loadtxt(file, delimiter=",", ndmin=2)
+        return {name: values[:, column] for column, name in enumerate(header)}
+    raise ValueError(f"Results must be an .npz or .csv file, not `{path.name}`")
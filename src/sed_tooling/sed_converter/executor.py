@@ -0,0 +1,52 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Optional
+
+# A per-file task receives the file name and, when already in memory, its contents
+FileTask = Callable[[str, Optional[bytes]], Any]
+
+
+class FileResult(NamedTuple):
+    file: str
+    value: Any
+    error: Optional[str]
+
+
+def run_file_task(task: FileTask, file: str, contents: Optional[bytes]) -> FileResult:
+    try:
+        return FileResult(file, task(file, contents), None)
+    except Exception as e:
+        return FileResult(file, None, f"{type(e).__name__}: {e}")
+
+
+def iter_per_file(
+    task: FileTask, files: Iterable[tuple[str, Optional[bytes]]], jobs: int = 1
+) -> Iterator[FileResult]:
+    """
+    Like `run_per_file`, but yields each result as soon as it is ready, in the order of
+    `files`; serially, nothing is read or run ahead of the consumer
+    """
+    if jobs <= 1:
+        for file, contents in files:
+            yield run_file_task(task, file, contents)
+        return
+    items: list[tuple[str, Optional[bytes]]] = list(files)
+    if not items:
+        return
+    with ProcessPoolExecutor(max_workers=min(jobs, len(items))) as executor:
+        yield from executor.map(
+            run_file_task,
+            [task] * len(items),
+            [file for file, _ in items],
+            [contents for _, contents in items],
+        )
+
+
+def run_per_file(
+    task: FileTask, files: Iterable[tuple[str, Optional[bytes]]], jobs: int = 1
+) -> list[FileResult]:
+    """
+    Run `task` over every file, in a process pool when `jobs` > 1.
+    Results keep the order of `files`, and a failing file only records its own error.
+    When running in a pool, `task` and its return value must be picklable.
+    """
+    return list(iter_per_file(task, files, jobs))
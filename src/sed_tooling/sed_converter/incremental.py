@@ -0,0 +1,164 @@
+"""
+State kept next to an archive between runs, so that only documents that changed (or whose
+dependencies changed) are validated again. Changes are detected from the CRC-32 and size
+each member has in the zip central directory, so unchanged members are never even read.
+"""
+
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, NamedTuple, Optional
+
+from sed_tooling.sed_converter.archive import (
+    OmexArchive,
+    is_external_source,
+    resolve_source,
+    source_candidates,
+)
+from sed_tooling.sed_converter.cache import get_tool_version
+
+if TYPE_CHECKING:
+    from sed_tooling.sed_converter.core import DocumentCore
+
+STATE_SUFFIX = ".validation.json"
+STATE_FORMAT = 1
+
+
+class MemberState(NamedTuple):
+    crc: int
+    size: int
+
+
+class DocumentResult(NamedTuple):
+    error: Optional[str]
+    # Archive members the document depends on; None when they could not be determined
+    dependencies: Optional[list[str]]
+
+
+def state_path(archive_path: Path) -> Path:
+    return archive_path.with_name(archive_path.name + STATE_SUFFIX)
+
+
+def member_states(archive: OmexArchive) -> dict[str, MemberState]:
+    return {
+        member: MemberState(entry.crc, entry.size)
+        for member, entry in archive.index.entries.items()
+    }
+
+
+def resolve_dependencies(document: str, sources: list[str], members: set[str]) -> list[str]:
+    """
+    The archive members `sources` point at; a source may be relative to the document or to
+    the root of the archive. A source that points at no member depends on every member it
+    could point at, so adding any of them changes the result.
+    """
+    resolved: set[str] = set()
+    for source in sources:
+        if is_external_source(source):
+            continue
+        member: Optional[str] = resolve_source(document, source, members)
+        if member is not None:
+            resolved.add(member)
+        else:
+            resolved.update(source_candidates(document, source))
+    return sorted(resolved)
+
+
+class IncrementalState:
+    def __init__(
+        self,
+        key: dict[str, str],
+        members: Optional[dict[str, MemberState]] = None,
+        results: Optional[dict[str, DocumentResult]] = None,
+    ) -> None:
+        # Results only carry over between runs with the same mode, schema and tool version
+        self.key: dict[str, str] = key
+        self.members: dict[str, MemberState] = members or {}
+        self.results: dict[str, DocumentResult] = results or {}
+
+    @classmethod
+    def load(cls, path: Path, mode: str, schema_version: str) -> "IncrementalState":
+        """
+        The state stored at `path`, or an empty one if there is none or it no longer applies
+        """
+        key: dict[str, str] = {
+            "mode": mode,
+            "schema": schema_version,
+            "tool_version": get_tool_version(),
+        }
+        try:
+            stored: Any = json.loads(path.read_text())
+            if stored.get("format") != STATE_FORMAT or stored.get("key") != key:
+                return cls(key)
+            members: dict[str, MemberState] = {
+                member: MemberState(*state) for member, state in stored["members"].items()
+            }
+            results: dict[str, DocumentResult] = {
+                file: DocumentResult(result["error"], result["dependencies"])
+                for file, result in stored["results"].items()
+            }
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return cls(key)  # missing or unreadable: start over
+        return cls(key, members, results)
+
+    def save(self, path: Path) -> None:
+        stored: dict[str, Any] = {
+            "format": STATE_FORMAT,
+            "key": self.key,
+            "members": {member: list(state) for member, state in self.members.items()},
+            "results": {file: result._asdict() for file, result in self.results.items()},
+        }
+        try:
+            path.write_text(json.dumps(stored, indent=1, sort_keys=True) + "\n")
+        except OSError as e:
+            # e.g. a read-only archive directory: the run's results stand, the next one
+            # just starts over
+            print(f"Could not save the incremental state to {path}: {e}")
+
+    def reusable(
+        self, documents: list[str], current: dict[str, MemberState]
+    ) -> dict[str, Optional[str]]:
+        """
+        The stored error (or None) of every document whose result is still current
+        """
+        others_changed: bool = {
+            member: state for member, state in self.members.items() if member not in self.results
+        } != {member: state for member, state in current.items() if member not in documents}
+        reusable: dict[str, Optional[str]] = {}
+        for document in documents:
+            result: Optional[DocumentResult] = self.results.get(document)
+            if result is None or self.members.get(document) != current.get(document):
+                continue
+            if result.dependencies is None:
+                # Unknown dependencies: any change outside the documents may matter
+                if others_changed:
+                    continue
+            elif any(
+                self.members.get(member) != current.get(member) for member in result.dependencies
+            ):
+                continue
+            reusable[document] = result.error
+        return reusable
+
+    def update(self, document_core: "DocumentCore", current: dict[str, MemberState]) -> None:
+        """
+        Record the results `document_core` reused or produced for the archive's `current` members
+        """
+        members: set[str] = set(current)
+        results: dict[str, DocumentResult] = {}
+        for document in document_core.files:
+            if document in document_core.reused:
+                results[document] = self.results[document]
+                continue
+            sources: Optional[list[str]] = document_core.document_dependencies(document)
+            # A valid document that failed to convert is still valid
+            error: Optional[str] = (
+                None
+                if document in document_core.conversion_errors
+                else document_core.errors.get(document)
+            )
+            results[document] = DocumentResult(
+                error,
+                None if sources is None else resolve_dependencies(document, sources, members),
+            )
+        self.members = current
+        self.results = results
@@ -0,0 +1,157 @@
+"""
+Named, nestable timing spans with optional tracemalloc peak memory.
+
+Code marks its phases with `span("name", file=...)`; that is a no-op unless a Profiler is
+active. Spans only record work done in this process, so with `--jobs N` the per-file spans
+of pool workers are not part of the report.
+"""
+
+import contextlib
+import time
+import tracemalloc
+from types import TracebackType
+from typing import Any, Callable, ContextManager, NamedTuple, Optional, Type
+
+
+class SpanRecord(NamedTuple):
+    name: str
+    file: Optional[str]
+    depth: int
+    start: float  # seconds since the profiler started
+    seconds: float
+    peak_bytes: Optional[int]  # peak traced memory above what was allocated at span start
+
+
+SpanHook = Callable[[SpanRecord], None]
+
+
+class _Frame:
+    def __init__(self, name: str, file: Optional[str], start: float, current: int) -> None:
+        self.name: str = name
+        self.file: Optional[str] = file
+        self.start: float = start
+        self.current_at_start: int = current
+        self.peak: int = current
+
+
+class _Span:
+    def __init__(self, profiler: "Profiler", name: str, file: Optional[str]) -> None:
+        self.profiler: "Profiler" = profiler
+        self.name: str = name
+        self.file: Optional[str] = file
+
+    def __enter__(self) -> None:
+        self.profiler._push(self.name, self.file)
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.profiler._pop()
+
+
+class Profiler:
+    """
+    Collects the spans run while it is active; `hooks` are called with every finished span
+    """
+
+    def __init__(self, trace_memory: bool = True, hooks: Optional[list[SpanHook]] = None) -> None:
+        self.trace_memory: bool = trace_memory
+        self.hooks: list[SpanHook] = list(hooks or [])
+        self.records: list[SpanRecord] = []
+        self._stack: list[_Frame] = []
+        self._origin: float = 0.0
+        self._started_tracing: bool = False
+        self._previous: Optional[Profiler] = None
+
+    def __enter__(self) -> "Profiler":
+        global _active
+        self._previous, _active = _active, self
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._origin = time.perf_counter()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        global _active
+        _active = self._previous
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def span(self, name: str, file: Optional[str] = None) -> ContextManager[None]:
+        return _Span(self, name, file)
+
+    def _memory(self) -> tuple[int, int]:
+        if not self.trace_memory or not tracemalloc.is_tracing():
+            return 0, 0
+        return tracemalloc.get_traced_memory()
+
+    def _push(self, name: str, file: Optional[str]) -> None:
+        current, peak = self._memory()
+        if self._stack:
+            parent: _Frame = self._stack[-1]
+            parent.peak = max(parent.peak, peak)
+            file = file if file is not None else parent.file
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        self._stack.append(_Frame(name, file, time.perf_counter(), current))
+
+    def _pop(self) -> None:
+        end: float = time.perf_counter()
+        frame: _Frame = self._stack.pop()
+        _, peak = self._memory()
+        frame.peak = max(frame.peak, peak)
+        if self._stack:
+            self._stack[-1].peak = max(self._stack[-1].peak, frame.peak)
+        record = SpanRecord(
+            frame.name,
+            frame.file,
+            len(self._stack),
+            frame.start - self._origin,
+            end - frame.start,
+            frame.peak - frame.current_at_start if self.trace_memory else None,
+        )
+        self.records.append(record)
+        for hook in self.hooks:
+            hook(record)
+
+    def report(self) -> dict[str, Any]:
+        """
+        Machine-readable breakdown: every span, plus per-file totals for each span name
+        """
+        files: dict[str, dict[str, Any]] = {}
+        for record in self.records:
+            if record.file is None:
+                continue
+            breakdown = files.setdefault(record.file, {"spans": {}, "peak_bytes": None})
+            breakdown["spans"][record.name] = (
+                breakdown["spans"].get(record.name, 0.0) + record.seconds
+            )
+            if record.peak_bytes is not None:
+                breakdown["peak_bytes"] = max(breakdown["peak_bytes"] or 0, record.peak_bytes)
+        return {
+            "spans": [record._asdict() for record in sorted(self.records, key=lambda r: r.start)],
+            "files": files,
+        }
+
+
+_active: Optional[Profiler] = None
+_NULL_SPAN: ContextManager[None] = contextlib.nullcontext()
+
+
+def span(name: str, file: Optional[str] = None) -> ContextManager[None]:
+    """
+    Time the enclosed block as `name` when a Profiler is active; nested spans inherit `file`
+    """
+    if _active is None:
+        return _NULL_SPAN
+    return _active.span(name, file)
@@ -0,0 +1,226 @@
+"""
+Lazy expansion of SED-ML repeated tasks into scan points.
+
+Within a repeated task, every range (and every setValue change computed from them) advances
+in step with the master range: the ranges are zipped. Each point of a repeated task then runs
+its subtasks in order, so a nested repeated task multiplies out: a Cartesian product. Only the
+ranges of each task are held in memory; points are computed block by block from their index.
+"""
+
+from typing import Iterator, NamedTuple, Optional, Union
+
+import numpy as np
+from libsedml import SedAbstractTask as SedMLAbstractTask  # type: ignore
+from libsedml import SedDocument as SedMLDoc
+from libsedml import SedFunctionalRange as SedMLFunctionalRange
+from libsedml import SedRepeatedTask as SedMLRepeatedTask
+from libsedml import SedSetValue as SedMLSetValue
+from libsedml import SedUniformRange as SedMLUniformRange
+from libsedml import SedVectorRange as SedMLVectorRange
+
+from sed_tooling.sed_converter.data_generators import CompiledMath, compile_math
+
+# A model change: (model reference, target or symbol)
+ChangeKey = tuple[str, str]
+
+
+class ScanBlock(NamedTuple):
+    start: int  # index of the block's first point in the whole scan
+    # For each point, the index in RangeScan.leaf_tasks of the (non-repeated) task it runs
+    leaves: np.ndarray
+    # Range id -> value at each point; NaN at points the range's task does not enclose
+    ranges: dict[str, np.ndarray]
+    # Value each change sets at each point; NaN where it does not apply
+    changes: dict[ChangeKey, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.leaves)
+
+
+def _parameters(element: Union[SedMLFunctionalRange, SedMLSetValue]) -> dict[str, float]:
+    return {
+        element.getParameter(i).getId(): element.getParameter(i).getValue()
+        for i in range(element.getNumParameters())
+    }
+
+
+def _evaluate(
+    element: Union[SedMLFunctionalRange, SedMLSetValue],
+    label: str,
+    ranges: dict[str, np.ndarray],
+    length: int,
+) -> np.ndarray:
+    if element.getNumVariables() > 0:
+        raise ValueError(f"`{label}` depends on model variables, only known while simulating")
+    parameters: dict[str, float] = _parameters(element)
+    compiled: CompiledMath = compile_math(element.getMath(), (*ranges, *parameters), label)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        values = np.asarray(compiled.function(*ranges.values(), *parameters.values()), dtype=float)
+    return np.broadcast_to(values, (length,))
+
+
+class _Level:
+    """
+    One repeated task: its zipped ranges and changes, and the subtasks each point runs
+    """
+
+    __slots__ = ("changes", "children", "count", "inner", "length", "offsets", "ranges", "task_id")
+
+    def __init__(self, task: SedMLRepeatedTask, children: list[Union["_Level", int]]) -> None:
+        self.task_id: str = task.getId()
+        uniform_and_vector: dict[str, np.ndarray] = {}
+        functional: list[SedMLFunctionalRange] = []
+        for i in range(task.getNumRanges()):
+            range_ = task.getRange(i)
+            if isinstance(range_, SedMLUniformRange):
+                points: int = range_.getNumberOfSteps() + 1
+                space = np.geomspace if range_.getType() == "log" else np.linspace
+                uniform_and_vector[range_.getId()] = space(
+                    range_.getStart(), range_.getEnd(), points
+                )
+            elif isinstance(range_, SedMLVectorRange):
+                uniform_and_vector[range_.getId()] = np.asarray(range_.getValues(), dtype=float)
+            elif isinstance(range_, SedMLFunctionalRange):
+                functional.append(range_)
+            else:
+                raise ValueError(f"Unknown kind of range in repeated task `{self.task_id}`")
+
+        master: str = task.getRangeId()
+        if master not in uniform_and_vector:
+            raise ValueError(f"Master range `{master}` of `{self.task_id}` is not a fixed range")
+        self.length: int = len(uniform_and_vector[master])
+        self.ranges: dict[str, np.ndarray] = {}
+        for range_id, values in uniform_and_vector.items():
+            if len(values) < self.length:
+                raise ValueError(f"Range `{range_id}` is shorter than master range `{master}`")
+            self.ranges[range_id] = values[: self.length]
+        # Functional ranges may build on each other, in any order
+        while functional:
+            resolvable = [r for r in functional if r.getRange() in self.ranges]
+            if not resolvable:
+                unresolved: str = ", ".join(r.getId() for r in functional)
+                raise ValueError(f"Functional ranges {unresolved} refer to no known range")
+            for range_ in resolvable:
+                self.ranges[range_.getId()] = _evaluate(
+                    range_, range_.getId(), self.ranges, self.length
+                )
+                functional.remove(range_)
+
+        self.changes: dict[ChangeKey, np.ndarray] = {}
+        for i in range(task.getNumTaskChanges()):
+            change: SedMLSetValue = task.getTaskChange(i)
+            key: ChangeKey = (change.getModelReference(), change.getTarget() or change.getSymbol())
+            self.changes[key] = _evaluate(change, f"setValue {key[1]}", self.ranges, self.length)
+
+        self.children: list[Union[_Level, int]] = children
+        child_counts: list[int] = [1 if isinstance(c, int) else c.count for c in children]
+        # Points each iteration of the master range runs, and where each subtask's start
+        self.inner: int = sum(child_counts)
+        self.offsets: list[int] = [sum(child_counts[:i]) for i in range(len(child_counts))]
+        # Python ints, so counting never overflows however large the product
+        self.count: int = self.length * self.inner
+
+
+class RangeScan:
+    """
+    Every point the repeated task `task_id` runs, without enumerating them: `count` is
+    computed from the range lengths, and points come in NumPy blocks from `block` or
+    `iter_blocks`
+    """
+
+    def __init__(self, sedml: SedMLDoc, task_id: str) -> None:
+        self.tasks: dict[str, SedMLAbstractTask] = {
+            sedml.getTask(i).getId(): sedml.getTask(i) for i in range(sedml.getNumTasks())
+        }
+        self.leaf_tasks: list[str] = []
+        self._leaf_index: dict[str, int] = {}
+        self._levels: dict[str, _Level] = {}
+        self.range_ids: dict[str, None] = {}
+        self.change_keys: dict[ChangeKey, None] = {}
+        root: Union[_Level, int] = self._build(task_id, [])
+        if isinstance(root, int):
+            raise ValueError(f"`{task_id}` is not a repeated task")
+        self.root: _Level = root
+        self.count: int = root.count
+
+    def _build(self, task_id: str, path: list[str]) -> Union[_Level, int]:
+        task: Optional[SedMLAbstractTask] = self.tasks.get(task_id)
+        if task is None:
+            raise ValueError(f"Subtask `{task_id}` refers to no task")
+        if not isinstance(task, SedMLRepeatedTask):
+            if task_id not in self._leaf_index:
+                self._leaf_index[task_id] = len(self.leaf_tasks)
+                self.leaf_tasks.append(task_id)
+            return self._leaf_index[task_id]
+        if task_id in path:
+            cycle: list[str] = path[path.index(task_id) :] + [task_id]
+            raise ValueError(f"Repeated tasks form a cycle: {' -> '.join(cycle)}")
+        if task_id not in self._levels:
+            subtasks = sorted(
+                (task.getSubTask(i) for i in range(task.getNumSubTasks())),
+                key=lambda subtask: subtask.getOrder(),
+            )
+            children: list[Union[_Level, int]] = [
+                self._build(subtask.getTask(), [*path, task_id]) for subtask in subtasks
+            ]
+            level = _Level(task, children)
+            self._levels[task_id] = level
+            self.range_ids.update(dict.fromkeys(level.ranges))
+            self.change_keys.update(dict.fromkeys(level.changes))
+        return self._levels[task_id]
+
+    def block(self, start: int, stop: int) -> ScanBlock:
+        """
+        Points `start` up to `stop`, in the order they run
+        """
+        stop = min(stop, self.count)
+        if not 0 <= start <= stop:
+            raise ValueError(f"No block of points from {start} to {stop}")
+        if self.count > np.iinfo(np.int64).max:
+            raise ValueError(f"{self.count} points are too many to index")
+        size: int = stop - start
+        scan_block = ScanBlock(
+            start,
+            np.empty(size, dtype=np.int64),
+            {range_id: np.full(size, np.nan) for range_id in self.range_ids},
+            {key: np.full(size, np.nan) for key in self.change_keys},
+        )
+        self._fill(
+            self.root,
+            np.arange(start, stop, dtype=np.int64),
+            np.arange(size, dtype=np.int64),
+            scan_block,
+        )
+        return scan_block
+
+    def iter_blocks(self, chunk_size: int) -> Iterator[ScanBlock]:
+        if chunk_size < 1:
+            raise ValueError("Blocks must hold at least one point")
+        for start in range(0, self.count, chunk_size):
+            yield self.block(start, start + chunk_size)
+
+    def _fill(
+        self, level: _Level, indexes: np.ndarray, positions: np.ndarray, scan_block: ScanBlock
+    ) -> None:
+        # Split each point's index within `level` into its master range iteration and
+        # the point within that iteration's subtasks
+        iteration, within = np.divmod(indexes, level.inner)
+        for range_id, values in level.ranges.items():
+            scan_block.ranges[range_id][positions] = values[iteration]
+        for key, values in level.changes.items():
+            scan_block.changes[key][positions] = values[iteration]
+        offsets: np.ndarray = np.asarray(level.offsets, dtype=np.int64)
+        child_of: np.ndarray = np.searchsorted(offsets, within, side="right") - 1
+        for child_number, child in enumerate(level.children):
+            selected: np.ndarray = child_of == child_number
+            if not selected.any():
+                continue
+            if isinstance(child, int):
+                scan_block.leaves[positions[selected]] = child
+            else:
+                self._fill(
+                    child,
+                    within[selected] - offsets[child_number],
+                    positions[selected],
+                    scan_block,
+                )
@@ -1,35 +1,413 @@
+import hashlib
 import json
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List
+from typing import TYPE_CHECKING, Any, Dict, Generator, Iterator, List, Optional, Tuple
 
-from sed_tooling.sed_model.sed_document import SedDocument, get_correct_doc
-from sed_tooling.sed_converter.sedml_document import SedMLDocument
+from sed_tooling.sed_model.dependency import Dependency
+from sed_tooling.sed_model.identifier_index import REFERENCE_PREFIX
+from sed_tooling.sed_model.load_action import Load
+from sed_tooling.sed_model.sed_document import (
+    DOCUMENT_RELEASES,
+    SedDocument,
+    get_correct_doc_json,
+    rebuild_validated_doc,
+)
+from sed_tooling.sed_converter.archive import (
+    MANIFEST,
+    SED_EXTENSION,
+    SEDML_EXTENSION,
+    SEDML_FORMAT,
+    OmexArchive,
+    OmexWriter,
+    converted_archive_path,
+    update_manifest,
+)
+from sed_tooling.sed_converter.cache import ResultCache, iter_per_file_cached
+from sed_tooling.sed_converter.executor import FileResult, run_file_task
+from sed_tooling.sed_converter.profiling import span
+
+if TYPE_CHECKING:
+    from libsedml import SedDocument as SedMLDoc  # type: ignore
+
+
+def parse_sed_file(file: str, contents: Optional[bytes]) -> SedDocument:
+    if contents is None:
+        path: Path = Path(file)
+        if not path.is_file():
+            raise FileNotFoundError(f"File `{file}` could not be parsed as a file.")
+        with span("read", file):
+            contents = path.read_bytes()
+    with span("sed.validate", file):
+        return get_correct_doc_json(contents)
+
+
+@lru_cache(maxsize=None)
+def sed_schema_version() -> str:
+    schemas: Dict[str, object] = {
+        f"L{level}V{version}": release.model_json_schema()
+        for (level, version), release in DOCUMENT_RELEASES.items()
+    }
+    return hashlib.sha256(json.dumps(schemas, sort_keys=True).encode()).hexdigest()
+
+
+def sedml_member_name(file: str) -> str:
+    return file[: -len(SED_EXTENSION)] + SEDML_EXTENSION
+
+
+def _sedml_bytes(sedml: "SedMLDoc") -> bytes:
+    from sed_tooling.sed_converter.sedml_writer import sedml_bytes
+
+    return sedml_bytes(sedml)
+
+
+class _Combiner:
+    """
+    Merges documents one at a time. Dependencies with the same type and source, and loads of
+    the same type from the same dependency, are kept once; any other identifier already taken
+    gets the first free `_2`, `_3`, ... suffix, so the result only depends on document order.
+    """
+
+    def __init__(self) -> None:
+        self.used: set[str] = set()
+        self.dependencies: dict[tuple[str, str], Dependency] = {}
+        self.loads: dict[tuple[str, str], Load] = {}
+        self.combined: dict[str, list[Any]] = {
+            "dependencies": [],
+            "constants": [],
+            "variables": [],
+            "actions": [],
+            "inputs": [],
+            "outputs": [],
+        }
+
+    def _claim(self, identifier: str) -> str:
+        unique: str = identifier
+        suffix: int = 2
+        while unique in self.used:
+            unique = f"{identifier}_{suffix}"
+            suffix += 1
+        self.used.add(unique)
+        return unique
+
+    def add(self, document: SedDocument) -> None:
+        renamed: dict[str, str] = {}
+        for dependency in document.dependencies:
+            key: tuple[str, str] = (dependency.type, dependency.source)
+            if key not in self.dependencies:
+                self.dependencies[key] = dependency.model_copy(
+                    update={"identifier": self._claim(dependency.identifier)}
+                )
+                self.combined["dependencies"].append(self.dependencies[key])
+            renamed[dependency.identifier] = self.dependencies[key].identifier
+
+        # A repeated load shares the first one's target variable too
+        merged: set[str] = set()
+        for action in document.actions:
+            if not isinstance(action, Load):
+                continue
+            source: str = _rename_reference(action.source, renamed)
+            existing: Optional[Load] = self.loads.get((action.type, source))
+            if existing is not None:
+                renamed[action.identifier] = existing.identifier
+                renamed[action.target[len(REFERENCE_PREFIX) :]] = existing.target[
+                    len(REFERENCE_PREFIX) :
+                ]
+                merged.update((action.identifier, action.target[len(REFERENCE_PREFIX) :]))
+
+        elements: dict[str, list[Any]] = {
+            "constants": document.declarations.constants,
+            "variables": document.declarations.variables,
+            "actions": document.actions,
+            "inputs": document.inputs or [],
+            "outputs": document.outputs or [],
+        }
+        kept: dict[str, list[Any]] = {
+            field: [element for element in values if element.identifier not in merged]
+            for field, values in elements.items()
+        }
+        for values in kept.values():
+            for element in values:
+                renamed[element.identifier] = self._claim(element.identifier)
+
+        for field, values in kept.items():
+            for element in values:
+                update: dict[str, str] = {"identifier": renamed[element.identifier]}
+                if isinstance(element, Load):
+                    update["source"] = _rename_reference(element.source, renamed)
+                    update["target"] = _rename_reference(element.target, renamed)
+                    self.loads[(element.type, update["source"])] = element.model_copy(
+                        update=update
+                    )
+                    self.combined[field].append(self.loads[(element.type, update["source"])])
+                    continue
+                reference_field: Optional[str] = {"inputs": "target", "outputs": "interval"}.get(
+                    field
+                )
+                if reference_field is not None:
+                    update[reference_field] = _rename_reference(
+                        getattr(element, reference_field), renamed
+                    )
+                self.combined[field].append(element.model_copy(update=update))
+
+
+def _rename_reference(reference: str, renamed: dict[str, str]) -> str:
+    if not reference.startswith(REFERENCE_PREFIX):
+        return reference
+    identifier: str = reference[len(REFERENCE_PREFIX) :]
+    return REFERENCE_PREFIX + renamed.get(identifier, identifier)
+
+
+def combine_sed_documents(sed_documents: List[SedDocument], name: str = "combined") -> SedDocument:
+    """
+    Merge documents of the same release into one, see `_Combiner`
+    """
+    if not sed_documents:
+        raise ValueError("There are no documents to combine")
+    release = type(sed_documents[0])
+    if any(type(document) is not release for document in sed_documents):
+        raise ValueError("Only documents of the same level and version can be combined")
+    combiner = _Combiner()
+    for document in sed_documents:
+        combiner.add(document)
+    first: SedDocument = sed_documents[0]
+    ontologies: list[str] = list(
+        dict.fromkeys(
+            ontology for document in sed_documents for ontology in document.metadata.ontologies
+        )
+    )
+    combined: dict[str, list[Any]] = combiner.combined
+    return release.model_validate(
+        {
+            "metadata": first.metadata.model_copy(update={"name": name, "ontologies": ontologies}),
+            "dependencies": combined["dependencies"],
+            "declarations": {
+                "constants": combined["constants"],
+                "variables": combined["variables"],
+            },
+            "actions": combined["actions"],
+            "inputs": (
+                combined["inputs"] if any(d.inputs is not None for d in sed_documents) else None
+            ),
+            "outputs": (
+                combined["outputs"] if any(d.outputs is not None for d in sed_documents) else None
+            ),
+        }
+    )
+
+
+def _load_cached_sed(document: str) -> SedDocument:
+    # Cached documents were validated before they were dumped
+    return rebuild_validated_doc(document)
+
+
+def _dump_sed(document: SedDocument) -> str:
+    return document.model_dump_json()
 
 
 class SedCore:
-    def __init__(self, sed_files: List[str]) -> None:
+    def __init__(
+        self,
+        sed_files: List[str],
+        archive: Optional[OmexArchive] = None,
+        jobs: int = 1,
+        cache: Optional[ResultCache] = None,
+    ) -> None:
+        # When an archive is given, `sed_files` are member names read straight out of the zip
         self.files: List[str] = sed_files
+        self.archive: Optional[OmexArchive] = archive
+        self.jobs: int = jobs
+        self.cache: Optional[ResultCache] = cache
+        # Only filled by `validate_all_files`; `iter_validate` lets each document go
         self.parsed_files: Dict[str, SedDocument] = {}
+        # Dependency sources of every document parsed in this run
+        self.dependencies: Dict[str, List[str]] = {}
+        self.errors: Dict[str, str] = {}
+        # The errors of documents that are valid, but could not be converted
+        self.conversion_errors: Dict[str, str] = {}
+        # Files validated in this run, so none is validated twice
+        self.validated: set[str] = set()
+        # Files whose result from an earlier run is still current: file -> its error, if any
+        self.reused: Dict[str, Optional[str]] = {}
+
+    def _read(self, file: str) -> Optional[bytes]:
+        return self.archive.read(file) if self.archive is not None else None
+
+    def _file_contents(self) -> Iterator[Tuple[str, Optional[bytes]]]:
+        for file in self.files:
+            if file in self.reused or file in self.validated:
+                continue
+            yield file, self._read(file)
+
+    def schema_version(self) -> str:
+        return sed_schema_version()
+
+    def reuse_results(self, results: Dict[str, Optional[str]]) -> None:
+        for file, error in results.items():
+            print(f"reusing the result of unchanged {file}")
+            self.reused[file] = error
+            if error is not None:
+                self.errors[file] = error
+
+    def document_dependencies(self, file: str) -> Optional[List[str]]:
+        """
+        The sources `file` depends on, or None when it was not parsed in this run
+        """
+        return self.dependencies.get(file)
+
+    def iter_validate(self, retain: bool = False) -> Iterator[FileResult]:
+        """
+        Validate the documents one at a time, yielding each result as it is ready. Parsed
+        documents are only kept in `parsed_files` with `retain`, so otherwise each one can be
+        freed once the caller is done with it.
+        """
+        for result in iter_per_file_cached(
+            parse_sed_file,
+            self._file_contents(),
+            self.jobs,
+            self.cache,
+            self.schema_version(),
+            _dump_sed,
+            _load_cached_sed,
+        ):
+            print(f"parsing {result.file}:\n\n\n")
+            self.validated.add(result.file)
+            if result.error is not None:
+                print(f"File `{result.file}` could not be validated: {result.error}")
+                self.errors[result.file] = result.error
+            else:
+                self.dependencies[result.file] = [
+                    dependency.source for dependency in result.value.dependencies
+                ]
+                if retain:
+                    self.parsed_files[result.file] = result.value
+            yield result
 
     def validate_all_files(self) -> None:
+        for _ in self.iter_validate(retain=True):
+            pass
+
+    def action_plans(self) -> Dict[str, Dict[str, Any]]:
+        """
+        The action plan of every valid document, or the reason it has none
+        """
+        plans: Dict[str, Dict[str, Any]] = {}
         for file in self.files:
-            print(f"parsing {file}:\n\n\n")
-            path: Path = Path(file)
-            if path.is_file():
-                with path.open("r") as sed:
-                    contents = sed.read()
-                    self.parsed_files[file] = get_correct_doc(json.loads(contents))
+            if file in self.errors and file not in self.conversion_errors:
+                continue
+            sed_doc: Optional[SedDocument] = self.parsed_files.get(file)
+            if sed_doc is None:  # validated by a pool worker or straight from the cache
+                sed_doc = parse_sed_file(file, self._read(file))
+            try:
+                plans[file] = sed_doc.action_plan().to_json()
+            except ValueError as e:
+                plans[file] = {"error": f"{type(e).__name__}: {e}"}
+        return plans
+
+    def convert_all(self, output_location: Optional[str] = None) -> None:
+        """
+        Convert every valid document into a new archive at `output_location`, by default
+        `<archive>_sedml.omex` next to the archive
+        """
+        if self.archive is None:
+            raise ValueError("Only documents read from an archive can be converted to one")
+        location: str = output_location or str(converted_archive_path(self.archive.path))
+        for _ in self.iter_convert(location):
+            pass
+
+    def convert_all_to_sedml(self, output_location: str) -> list[str]:
+        """
+        Convert every valid document into a new archive at `output_location`, see
+        `iter_convert`. Returns the names of the converted members.
+        """
+        return [
+            result.value for result in self.iter_convert(output_location) if result.error is None
+        ]
+
+    def iter_convert(self, output_location: str) -> Generator[FileResult, None, None]:
+        """
+        Stream every valid document, converted to SED-ML, into a new archive at
+        `output_location`, yielding the result (the converted member's name) of each.
+        Documents not validated yet are validated on the way, each converted as soon as it is
+        valid, so every document is parsed once. All other members, and documents that fail
+        to convert, are copied over still compressed, and the manifest is pointed at the
+        converted members once the generator is exhausted or closed. If it fails, the partial
+        archive is deleted.
+        """
+        if self.archive is None:
+            raise ValueError("Only documents read from an archive can be converted to one")
+        archive: OmexArchive = self.archive
+        renamed: dict[str, str] = {}
+        writer = OmexWriter(output_location)
+        failed: bool = False
+        try:
+            # Each converted document is written out before the next one is converted
+            for file, sed_doc in self._valid_documents():
+                print(f"converting {file} to SED-ML")
+                result: FileResult = self._convert_document(archive, file, sed_doc)
+                if result.error is not None:
+                    print(f"File `{file}` could not be converted: {result.error}")
+                    self.errors[file] = self.conversion_errors[file] = result.error
+                    yield result
+                    continue
+                renamed[file] = sedml_member_name(file)
+                writer.write(renamed[file], result.value)
+                yield FileResult(file, renamed[file], None)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            if failed:
+                writer.close()
+                writer.path.unlink()
             else:
-                print(f"File `{file}` could not be parsed as a file.")
-
-    def convert_to_sedml(self, sed_doc: SedDocument, export_path: str = None) -> SedMLDocument:
-        ontologies: list[str] = sed_doc.Metadata.ontologies
-        # unsupported ontologies
-        if {"pe", "cosim"}.intersection(set(ontologies)):
-            raise NotImplementedError(
-                "File contains ontologies that can not currently be converted to SedML"
+                # Also when the caller stops early: what was not converted is copied as it is
+                with writer:
+                    for member in archive.members:
+                        if member not in renamed and member != MANIFEST:
+                            writer.copy_compressed(archive, member)
+                    if MANIFEST in archive.members:
+                        writer.write(
+                            MANIFEST,
+                            update_manifest(archive.read(MANIFEST), renamed, SEDML_FORMAT),
+                        )
+
+    def _valid_documents(self) -> Iterator[Tuple[str, Optional[SedDocument]]]:
+        # Documents validated (or reused) before, then each other one as soon as it is valid;
+        # None when the parsed document was not kept
+        earlier: List[str] = [
+            file for file in self.files if file in self.validated or file in self.reused
+        ]
+        for file in earlier:
+            if file not in self.errors:
+                yield file, self.parsed_files.pop(file, None)
+        for result in self.iter_validate():
+            if result.error is None:
+                yield result.file, result.value
+
+    def _convert_document(
+        self, archive: OmexArchive, file: str, sed_doc: Optional[SedDocument]
+    ) -> FileResult:
+        def convert(_: str, __: Optional[bytes]) -> bytes:
+            if sedml_member_name(file) in archive.index:
+                raise ValueError(f"`{sedml_member_name(file)}` already exists")
+            document: SedDocument = (
+                sed_doc if sed_doc is not None else parse_sed_file(file, archive.read(file))
             )
-        print("converting Sed to SedML")
+            with span("sed.convert", file):
+                return _sedml_bytes(self.convert_to_sedml(document))
+
+        return run_file_task(convert, file, None)
+
+    @classmethod
+    def convert_to_sedml(
+        cls, sed_doc: SedDocument, export_path: Optional[str] = None
+    ) -> "SedMLDoc":
+        # libsedml is only loaded to convert, so validating Sed documents never imports it
+        from sed_tooling.sed_converter.sedml_writer import convert_to_sedml
+
+        return convert_to_sedml(sed_doc, export_path)
 
-    def _combine_sed_documents(self, sed_documents: List[SedDocument]):
-        pass  # Not yet implemented
+    def _combine_sed_documents(self, sed_documents: List[SedDocument]) -> SedDocument:
+        name: str = self.archive.path.stem if self.archive is not None else "combined"
+        return combine_sed_documents(sed_documents, name)
@@ -1,84 +1,378 @@
+import json
 import re
+from functools import partial
+from pathlib import Path
 from re import Match
-from typing import Union
+from typing import Any, Collection, Iterator, NamedTuple, Optional, Union
 
-from sed_tooling.sed_model.sed_document import SedDocument
-from sed_converter.sedml_document import SedMLDocument
+from sed_tooling.sed_model.sed_document import SedDocument, get_release_class
+from sed_tooling.sed_converter.archive import OmexArchive
+from sed_tooling.sed_converter.cache import ResultCache, iter_per_file_cached
+from sed_tooling.sed_converter.executor import FileResult, FileTask, run_file_task
+from sed_tooling.sed_converter.profiling import span
+from sed_tooling.sed_converter.sedml_document import Pruning, SedMLDocument
+from sed_tooling.sed_model.action import Action
+from sed_tooling.sed_model.identifier_index import REFERENCE_PREFIX, Element
 from sed_tooling.sed_model.load_action import Load
 from sed_tooling.sed_model.dependency import Dependency
 from sed_tooling.sed_model.metadata import Metadata
 
-from libsedml import XMLNamespaces
+from libsedml import getLibSEDMLDottedVersion
 from libsedml import SedModel as SedMLModel
 from libsedml import SedSimulation as SedMLSimulation
 from libsedml import SedAbstractTask as SedMLAbstractTask
 from libsedml import SedTask as SedMLTask
 
+# What a valid document is cached as; entries of any other format are never looked up
+CACHE_FORMAT = 2
+
+
+def parse_sedml_file(
+    file: str, contents: Optional[bytes], output_ids: Optional[Collection[str]] = None
+) -> SedMLDocument:
+    with span("sedml.parse", file):
+        return SedMLDocument(file, contents, output_ids)
+
+
+class CheckedSedML(NamedTuple):
+    # What validating a SED-ML document leaves to keep, without its libsedml tree
+    pruning: Pruning
+    sources: list[str]  # the source of every indexed model
+    # When a pool worker converts the document too: the result, or why it failed
+    converted: Optional[SedDocument] = None
+    conversion_error: Optional[str] = None
+
+
+def model_sources(sedml_doc: SedMLDocument) -> list[str]:
+    # Only the models that were indexed: with chosen outputs, those the outputs need
+    return [model.getSource() for model in sedml_doc.model_dict.values()]
+
+
+def check_sedml_file(
+    file: str,
+    contents: Optional[bytes],
+    output_ids: Optional[Collection[str]] = None,
+    convert: bool = False,
+    export: bool = False,
+) -> CheckedSedML:
+    # libsedml documents can not be pickled, so pool workers only report what validation
+    # needs, and convert the document while they still have it parsed
+    sedml_doc: SedMLDocument = parse_sedml_file(file, contents, output_ids)
+    checked = CheckedSedML(sedml_doc.pruning, model_sources(sedml_doc))
+    if not convert:
+        return checked
+    converted: FileResult = run_file_task(
+        lambda _, __: convert_sedml_document(sedml_doc, export), file, None
+    )
+    return checked._replace(converted=converted.value, conversion_error=converted.error)
+
+
+def convert_sedml_document(sedml_doc: SedMLDocument, export: bool = False) -> SedDocument:
+    with span("sedml.convert", sedml_doc.file_path):
+        return SedMLCore.convert_to_sed(sedml_doc, _export_path(sedml_doc.file_path, export))
+
+
+def share_dependencies(
+    sed_doc: SedDocument, shared: dict[tuple[str, str], Dependency]
+) -> SedDocument:
+    """
+    Swap each dependency for the first one converted with the same type and source, so a
+    model several documents load is kept once for the whole archive
+    """
+    renamed: dict[str, str] = {}
+    dependencies: list[Dependency] = []
+    for dependency in sed_doc.dependencies:
+        first: Dependency = shared.setdefault((dependency.type, dependency.source), dependency)
+        taken: Optional[Element] = sed_doc.identifier_index.elements.get(first.identifier)
+        if taken is not None and taken is not dependency:
+            # The shared identifier already names something else in this document
+            dependencies.append(dependency)
+            continue
+        renamed[dependency.identifier] = first.identifier
+        dependencies.append(first)
+    actions: list[Union[Load, Action]] = [
+        (
+            action.model_copy(update={"source": _rename_reference(action.source, renamed)})
+            if isinstance(action, Load)
+            else action
+        )
+        for action in sed_doc.actions
+    ]
+    return sed_doc.model_copy(update={"dependencies": dependencies, "actions": actions})
+
+
+def _rename_reference(reference: str, renamed: dict[str, str]) -> str:
+    identifier: str = reference[len(REFERENCE_PREFIX) :]
+    if not reference.startswith(REFERENCE_PREFIX) or identifier not in renamed:
+        return reference
+    return REFERENCE_PREFIX + renamed[identifier]
+
+
+def _dump_sources(value: Union[SedMLDocument, CheckedSedML]) -> str:
+    # A valid SED-ML file is cached with its model sources and pruning statistics only; it
+    # is re-parsed on demand
+    if isinstance(value, SedMLDocument):
+        value = CheckedSedML(value.pruning, model_sources(value))
+    return json.dumps({"sources": value.sources, "pruning": value.pruning})
+
+
+def _load_cached_sources(document: str) -> CheckedSedML:
+    cached: dict[str, Any] = json.loads(document)
+    pruning: Pruning = Pruning(*(tuple(counts) for counts in cached["pruning"]))
+    return CheckedSedML(pruning, cached["sources"])
+
+
+def _export_path(file: str, export: bool) -> Optional[str]:
+    return file.replace(".sedml", ".sed") if export else None
+
 
 class SedMLCore:
-    def __init__(self, sedml_files: list[str]):
+    def __init__(
+        self,
+        sedml_files: list[str],
+        archive: Optional[OmexArchive] = None,
+        jobs: int = 1,
+        cache: Optional[ResultCache] = None,
+        output_ids: Optional[Collection[str]] = None,
+    ):
+        # When an archive is given, `sedml_files` are member names read straight out of the zip
         self.files: list[str] = sedml_files
+        # When set, only these outputs (and what they need) are indexed and converted
+        self.output_ids: Optional[frozenset[str]] = (
+            None if output_ids is None else frozenset(output_ids)
+        )
+        self.pruning: dict[str, Pruning] = {}
+        self.archive: Optional[OmexArchive] = archive
+        self.jobs: int = jobs
+        self.cache: Optional[ResultCache] = cache
+        # Only filled by `validate_all_files`; `iter_validate` lets each document go
         self.parsed_files: dict[str, SedMLDocument] = {}
+        # Model sources of every document parsed in this run
+        self.dependencies: dict[str, list[str]] = {}
+        self.errors: dict[str, str] = {}
+        # The errors of documents that are valid, but could not be converted
+        self.conversion_errors: dict[str, str] = {}
+        # Files validated in this run, so none is validated twice
+        self.validated: set[str] = set()
+        # Files whose result from an earlier run is still current: file -> its error, if any
+        self.reused: dict[str, Optional[str]] = {}
 
-    def validate_all_files(self):
+    def _read(self, file: str) -> Optional[bytes]:
+        return self.archive.read(file) if self.archive is not None else None
+
+    def _file_contents(self) -> Iterator[tuple[str, Optional[bytes]]]:
         for file in self.files:
-            print(f"parsing {file}:\n\n\n")
-            self.parsed_files[file] = SedMLDocument(file)
-
-    def convert_all_to_sed(self, export: bool = False):
-        sed_docs: list[SedDocument] = []
-        for filepath in self.parsed_files.keys():
-            if export:
-                sed_docs.append(self.convert_to_sed(self.parsed_files[filepath],
-                                                    filepath.replace(".sedml", ".sed")))
-            else:
-                sed_docs.append(self.convert_to_sed(self.parsed_files[filepath]))
+            if file in self.errors or file in self.reused or file in self.validated:
+                continue
+            yield file, self._read(file)
+
+    def schema_version(self) -> str:
+        # Which outputs are indexed changes the result, so each choice is cached on its own
+        version: str = f"libsedml-{getLibSEDMLDottedVersion()};format={CACHE_FORMAT}"
+        if self.output_ids is None:
+            return version
+        return f"{version};outputs={','.join(sorted(self.output_ids))}"
+
+    def reuse_results(self, results: dict[str, Optional[str]]) -> None:
+        for file, error in results.items():
+            print(f"reusing the result of unchanged {file}")
+            self.reused[file] = error
+            if error is not None:
+                self.errors[file] = error
+
+    def document_dependencies(self, file: str) -> Optional[list[str]]:
+        """
+        The model sources `file` depends on, or None when it was not parsed in this run
+        """
+        return self.dependencies.get(file)
+
+    def _record(self, results: list[FileResult], action: str) -> None:
+        for result in results:
+            if result.error is not None:
+                print(f"File `{result.file}` could not be {action}: {result.error}")
+                self.errors[result.file] = result.error
+                if action == "converted":
+                    self.conversion_errors[result.file] = result.error
+
+    def iter_validate(self, retain: bool = False) -> Iterator[FileResult]:
+        """
+        Validate the documents one at a time, yielding each result as it is ready. Parsed
+        documents (and their libsedml trees) are only kept in `parsed_files` with `retain`,
+        so otherwise each one can be freed once the caller is done with it.
+        """
+        return self._iter_validate(retain)
+
+    def _iter_validate(
+        self, retain: bool = False, convert: bool = False, export: bool = False
+    ) -> Iterator[FileResult]:
+        # With `convert`, pool workers also convert each document they validate
+        task: FileTask = (
+            partial(parse_sedml_file, output_ids=self.output_ids)
+            if self.jobs <= 1
+            else partial(
+                check_sedml_file, output_ids=self.output_ids, convert=convert, export=export
+            )
+        )
+        for result in iter_per_file_cached(
+            task,
+            self._file_contents(),
+            self.jobs,
+            self.cache,
+            self.schema_version(),
+            _dump_sources,
+            _load_cached_sources,
+        ):
+            print(f"parsing {result.file}:\n\n\n")
+            self.validated.add(result.file)
+            checked: Optional[CheckedSedML] = result.value
+            if isinstance(result.value, SedMLDocument):
+                checked = CheckedSedML(result.value.pruning, model_sources(result.value))
+            if checked is not None:
+                self._record_pruning(result.file, checked.pruning)
+                self.dependencies[result.file] = checked.sources
+                result = self._check_sources(result, checked.sources)
+            if retain and isinstance(result.value, SedMLDocument):
+                self.parsed_files[result.file] = result.value
+            self._record([result], "validated")
+            yield result
+
+    def _check_sources(self, result: FileResult, sources: list[str]) -> FileResult:
+        # Checked here rather than in the cached task: the same document may be valid in one
+        # archive and point at missing members in another
+        if self.archive is None:
+            return result
+        missing: list[str] = self.archive.index.missing_sources(result.file, sources)
+        if not missing:
+            return result
+        listed: str = ", ".join(f"`{source}`" for source in missing)
+        return FileResult(
+            result.file, None, f"ValueError: model sources {listed} are not in the archive"
+        )
+
+    def _record_pruning(self, file: str, pruning: Pruning) -> None:
+        self.pruning[file] = pruning
+        if self.output_ids is not None:
+            print(f"indexed for outputs {', '.join(sorted(self.output_ids))} of {file}: {pruning}")
+
+    def validate_all_files(self) -> None:
+        for _ in self.iter_validate(retain=True):
+            pass
+
+    def convert_all(self, output_location: Optional[str] = None) -> None:
+        # Converted Sed documents are not written out yet, so there is no output archive
+        if output_location is not None:
+            raise ValueError(
+                f"SED-ML archives are only converted in memory, not written to {output_location}"
+            )
+        for _ in self.iter_convert():
+            pass
+
+    def convert_all_to_sed(self, export: bool = False) -> list[SedDocument]:
+        return [result.value for result in self.iter_convert(export) if result.error is None]
+
+    def iter_convert(self, export: bool = False) -> Iterator[FileResult]:
+        """
+        Convert the valid documents one at a time, yielding each result as it is ready.
+        Documents not validated yet are validated on the way, each converted as soon as it is
+        valid, so every document is parsed once; a document retained by `validate_all_files`
+        is let go once converted.
+        """
+        # Models several documents load are kept once for the whole archive
+        shared_models: dict[tuple[str, str], Dependency] = {}
+        for file, value in self._valid_documents(export):
+            result: FileResult = self._convert_document(file, value, export)
+            if result.error is None:
+                result = result._replace(value=share_dependencies(result.value, shared_models))
+            self._record([result], "converted")
+            yield result
+
+    def _valid_documents(self, export: bool) -> Iterator[tuple[str, object]]:
+        # Documents validated (or reused) before, then each other one as soon as it is valid,
+        # with whatever validating it left: a parsed document, a CheckedSedML, or None
+        earlier: list[str] = [
+            file for file in self.files if file in self.validated or file in self.reused
+        ]
+        for file in earlier:
+            if file not in self.errors:
+                yield file, self.parsed_files.pop(file, None)
+        for result in self._iter_validate(convert=True, export=export):
+            if result.error is None:
+                yield result.file, result.value
+
+    def _convert_document(self, file: str, value: object, export: bool) -> FileResult:
+        if isinstance(value, CheckedSedML) and value.conversion_error is not None:
+            return FileResult(file, None, value.conversion_error)
+        if isinstance(value, CheckedSedML) and value.converted is not None:
+            return FileResult(file, value.converted, None)
+
+        def convert(_: str, __: Optional[bytes]) -> SedDocument:
+            sedml_doc: SedMLDocument = (
+                value
+                if isinstance(value, SedMLDocument)
+                else parse_sedml_file(file, self._read(file), self.output_ids)
+            )
+            return convert_sedml_document(sedml_doc, export)
+
+        return run_file_task(convert, file, None)
+
+    def convert_archive_to_sed(self) -> SedDocument:
+        """
+        Every convertible document of the archive, combined into one Sed document
+        """
+        # Imported here: sed_core is a sibling backend, loaded on demand
+        from sed_tooling.sed_converter.sed_core import combine_sed_documents
+
+        name: str = self.archive.path.stem if self.archive is not None else "combined"
+        return combine_sed_documents(self.convert_all_to_sed(), name)
 
     @classmethod
-    def convert_to_sed(cls, sedml_doc: SedMLDocument, export_path: str = None) -> SedDocument:
-        proto_sed: dict[str, Union[Metadata, list, dict[str, list]]] = {
-            "Metadata": None,
-            "Dependencies": [],
-            "Declarations": {"Constants": [], "Variables": []},
-            "Actions": [],
-            "Inputs": [],
-            "Outputs": []
+    def convert_to_sed(
+        cls, sedml_doc: SedMLDocument, export_path: Optional[str] = None
+    ) -> SedDocument:
+        """
+        A Sed L1V1 document named after the SED-ML file: each SBML model becomes a dependency
+        on its source, a model variable, and a load action from `#dep_<model>` into
+        `#<model>`.
+        """
+        proto_sed: dict[str, Any] = {
+            "metadata": None,
+            "dependencies": [],
+            "declarations": {"constants": [], "variables": []},
+            "actions": [],
+            "inputs": [],
+            "outputs": [],
         }
-        variables: list[dict] = []
         ontologies: list[str] = ["KiSAO"]
-        # Start with Namespaces
-        xmlns: XMLNamespaces = sedml_doc.sedml.getNamespaces()
-        for namespace in [xmlns.getPrefix(i) for i in range(0, xmlns.getNumNamespaces())]:
-            namespace: str
-            if namespace == "sbml":
-                sbml_level: int = -1
-                sbml_version: int = -1
-                separator = ("/" if "/" in namespace else "\\")
-                for part in namespace.split(separator):
-                    if "level" in part:
-                        sbml_level = int(part[-1])
-                    if "version" in part:
-                        sbml_version = int(part[-1])
-                if sbml_level == -1 and sbml_version == -1:
-                    raise ValueError(f"Unable to determine level and version of sbml.")
-                if sbml_level == -1 or sbml_version == -1:
-                    raise ValueError(f"Unable to determine {'level' if sbml_level < 0 else 'version'} of sbml")
-                ontologies.append(f"sbml<{sbml_level},{sbml_version}>")
-
-        # Then Models
-        cls._convert_models(proto_sed, list(sedml_doc.model_dict.values()))
-        cls._convert_sims(proto_sed, list(sedml_doc.simulation_dict.values()), list(sedml_doc.task_dict.values()))
+        # Models
+        proto_sed["declarations"]["variables"].extend(
+            cls._convert_models(proto_sed, list(sedml_doc.model_dict.values()))
+        )
+        if proto_sed["dependencies"]:
+            # Metadata only knows the unversioned sbml ontology
+            ontologies.append("sbml")
+        cls._convert_sims(
+            proto_sed, list(sedml_doc.simulation_dict.values()), list(sedml_doc.task_dict.values())
+        )
+        proto_sed["metadata"] = Metadata(
+            name=Path(sedml_doc.file_path).stem, level=1, version=1, ontologies=ontologies
+        )
+        return get_release_class(1, 1).model_validate(proto_sed)
 
     @classmethod
-    def _convert_models(cls, proto_sed: dict[str, Union[Metadata, list, dict[str, list]]],
-                        models: list[SedMLModel]) -> list[dict]:
-        variables_to_return: list[dict] = []
+    def _convert_models(cls, proto_sed: dict[str, Any],
+                        models: list[SedMLModel]) -> list[dict[str, Any]]:
+        variables_to_return: list[dict[str, Any]] = []
+        dependencies: dict[str, Dependency] = {}
         for model in models:
             if "language:sbml" in model.getLanguage():
-                # Add Dependency
-                proto_sed["Dependencies"].append(
-                    Dependency(name=f"Dependency: `{model.getName()}`", identifier=f"dep_{model.getId()}",
-                               type=f"sbml::SBMLFile", source=f"{model.getSource()}"))
+                # Add Dependency, once for every model with the same source
+                dependency: Optional[Dependency] = dependencies.get(model.getSource())
+                if dependency is None:
+                    dependency = Dependency(name=f"Dependency: `{model.getName()}`",
+                                            identifier=f"dep_{model.getId()}",
+                                            type=f"sbml::SBMLFile", source=f"{model.getSource()}")
+                    dependencies[model.getSource()] = dependency
+                    proto_sed["dependencies"].append(dependency)
 
                 # "Add" Variable
                 variables_to_return.append(
@@ -86,9 +380,9 @@ class SedMLCore:
                      "type": f"Model<sbml::SBMLFile>", "bindings": {}})
 
                 # Add Load Action
-                proto_sed["Actions"].append(Load(name=f"Load Model: {model.getId()}",
+                proto_sed["actions"].append(Load(name=f"Load Model: {model.getId()}",
                                                  identifier=f"load_{model.getId()}", type=f"sbml::load_sbml",
-                                                 source=f"dep_{model.getId()}", target=f"{model.getId()}"))
+                                                 source=f"#{dependency.identifier}", target=f"#{model.getId()}"))
             else:
                 raise ValueError("Unknown type of model was attempted to be parsed. "
                                  "Only SBML is supported at this time.")
@@ -96,9 +390,9 @@ class SedMLCore:
         return variables_to_return
 
     @classmethod
-    def _convert_sims(cls, proto_sed: dict[str, Union[Metadata, list, dict[str, list]]],
-                      sims: list[SedMLSimulation], tasks: list[SedMLAbstractTask]) -> list[dict]:
-        variables_to_return: list[dict] = []
+    def _convert_sims(cls, proto_sed: dict[str, Any],
+                      sims: list[SedMLSimulation], tasks: list[SedMLAbstractTask]) -> list[dict[str, Any]]:
+        variables_to_return: list[dict[str, Any]] = []
         for task in tasks:
             if isinstance(task, SedMLTask):
                 pass
@@ -1,3 +1,5 @@
+from typing import TYPE_CHECKING, Collection, NamedTuple, Optional
+
 import libsedml # type: ignore
 from libsedml import SedDataGenerator as SedMLDataGenerator
 from libsedml import SedDataSet as SedMLDataSet
@@ -9,22 +11,57 @@ from libsedml import SedParameter as SedMLParameter
 from libsedml import SedPlot as SedMLPlot
 from libsedml import SedPlot2D as SedMLPlot2D
 from libsedml import SedPlot3D as SedMLPlot3D
-from libsedml import SedRepeatedTask as SedMLRepeatedTask
 from libsedml import SedReport as SedMLReport
 from libsedml import SedSimulation as SedMLSimulation
-from libsedml import SedSubTask as SedMLSubTask
-from libsedml import SedTask as SedMLTask
 from libsedml import SedAbstractTask as SedMLAbstractTask
 from libsedml import SedSurface as SedMLSurface
 from libsedml import SedCurve as SedMLCurve
 from libsedml import SedVariable as SedMLVariable
 
 from sed_tooling.sed_model.sed_document import SedDocument
+from sed_tooling.sed_converter.profiling import span
+from sed_tooling.sed_converter.task_graph import TaskGraph
+
+if TYPE_CHECKING:
+    from sed_tooling.sed_converter.data_generators import DataGeneratorEngine
+    from sed_tooling.sed_converter.repeated_tasks import RangeScan
+
+
+class Pruning(NamedTuple):
+    # Per kind of element: how many were indexed, out of how many in the document
+    outputs: tuple[int, int]
+    data_generators: tuple[int, int]
+    variables: tuple[int, int]
+    tasks: tuple[int, int]
+    models: tuple[int, int]
+    simulations: tuple[int, int]
+
+    def __str__(self) -> str:
+        return ", ".join(
+            f"{kept}/{total} {kind.replace('_', ' ')}"
+            for kind, (kept, total) in self._asdict().items()
+        )
 
 
 class SedMLDocument:
-    def __init__(self, file_path: str):
-        self.sedml: SedMLDoc = libsedml.readSedML(file_path)
+    def __init__(
+        self,
+        file_path: str,
+        contents: Optional[bytes] = None,
+        output_ids: Optional[Collection[str]] = None,
+    ):
+        # `contents` lets callers hand over bytes already in memory (e.g. an archive member);
+        # `file_path` is then only used for reporting
+        self.file_path: str = file_path
+        # When set, only these outputs, and what they reach, are indexed
+        self.output_ids: Optional[frozenset[str]] = (
+            None if output_ids is None else frozenset(output_ids)
+        )
+        with span("libsedml.read", file_path):
+            if contents is not None:
+                self.sedml: SedMLDoc = libsedml.readSedMLFromString(contents.decode("utf-8"))
+            else:
+                self.sedml = libsedml.readSedML(file_path)
         # Check for errors
         error_count: int = self.sedml.getNumErrors()
         if error_count > 0:
@@ -41,21 +78,66 @@ class SedMLDocument:
         self.simulation_dict: dict[str, SedMLSimulation] = {}
         self.task_dict: dict[str, SedMLAbstractTask] = {}
         self.data_gen_dict: dict[str, SedMLDataGenerator] = {}
+        self.needed_model_ids: set[str] = set()
+        self.needed_simulation_ids: set[str] = set()
         self.output_list: list[SedMLOutput] = [
             self.sedml.getOutput(output_index)
             for output_index in range(self.sedml.getNumOutputs())
+            if self.output_ids is None
+            or self.sedml.getOutput(output_index).getId() in self.output_ids
         ]
+        if self.output_ids is not None and len(self.output_list) < len(self.output_ids):
+            unknown: frozenset[str] = self.output_ids - {
+                output.getId() for output in self.output_list
+            }
+            listed: str = ", ".join(f"`{output_id}`" for output_id in sorted(unknown))
+            raise ValueError(f"No output of SedML@{file_path} is identified by {listed}")
 
         # Start basic parsing
         self._process_document()
 
+    def data_generator_engine(self) -> "DataGeneratorEngine":
+        """
+        The data generators the outputs need, compiled for vectorized evaluation
+        """
+        # NumPy is only loaded once results are evaluated, not to validate or convert
+        from sed_tooling.sed_converter.data_generators import DataGeneratorEngine
+
+        return DataGeneratorEngine(self.data_gen_dict.values())
+
+    def range_scan(self, task_id: str) -> "RangeScan":
+        """
+        The points the repeated task `task_id` runs, expanded lazily
+        """
+        from sed_tooling.sed_converter.repeated_tasks import RangeScan
+
+        return RangeScan(self.sedml, task_id)
+
     def _process_document(self) -> None:
         #  Each call grabs the needed values for the next "call"
         #  until we have parsed models and sims.
-        self._process_outputs()
-        self._process_data_gens()
-        self._process_variables_and_params()
-        self._process_tasks()
+        with span("sedml._process_outputs", self.file_path):
+            self._process_outputs()
+        with span("sedml._process_data_gens", self.file_path):
+            self._process_data_gens()
+        with span("sedml._process_variables_and_params", self.file_path):
+            self._process_variables_and_params()
+        with span("sedml._process_tasks", self.file_path):
+            self._process_tasks()
+        self.pruning: Pruning = Pruning(
+            (len(self.output_list), self.sedml.getNumOutputs()),
+            (len(self.data_gen_dict), self.sedml.getNumDataGenerators()),
+            (
+                len(self.variable_dict),
+                sum(
+                    self.sedml.getDataGenerator(i).getNumVariables()
+                    for i in range(self.sedml.getNumDataGenerators())
+                ),
+            ),
+            (len(self.task_dict), self.sedml.getNumTasks()),
+            (len(self.model_dict), self.sedml.getNumModels()),
+            (len(self.simulation_dict), self.sedml.getNumSimulations()),
+        )
 
     def _process_outputs(self) -> None:
         needed_data_gen_ids: set[str] = set()
@@ -111,35 +193,16 @@ class SedMLDocument:
                 self.task_dict[task.getId()] = task
 
     def _process_tasks(self) -> None:
-        needed_simulation_ids: set[str] = set()
-        needed_model_ids: set[str] = set()
-        for task in list(self.task_dict.values()):
-            if isinstance(task, SedMLTask):
-                needed_model_ids.add(task.getModelReference())
-                needed_simulation_ids.add(task.getSimulationReference())
-            if isinstance(task, SedMLRepeatedTask):
-                needed_model_ids, needed_simulation_ids = self.__delve_into_repeated_task(task)
+        self.task_graph: TaskGraph = TaskGraph(self.sedml)
+        self.needed_model_ids, self.needed_simulation_ids = self.task_graph.reachable_from(
+            list(self.task_dict.keys())
+        )
         model: SedMLModel
         sim: SedMLSimulation
+        # Without chosen outputs every model and simulation is kept, used by an output or not
         for model in [self.sedml.getModel(i) for i in range(0, self.sedml.getNumModels())]:
-            self.model_dict[model.getId()] = model
+            if self.output_ids is None or model.getId() in self.needed_model_ids:
+                self.model_dict[model.getId()] = model
         for sim in [self.sedml.getSimulation(i) for i in range(0, self.sedml.getNumSimulations())]:
-            self.simulation_dict[sim.getId()] = sim
-
-    def __delve_into_repeated_task(
-        self, repeated_task: SedMLRepeatedTask
-    ) -> tuple[set[SedMLModel], set[SedMLSimulation]]:
-        model_set: set[SedMLModel] = set()
-        sim_set: set[SedMLSimulation] = set()
-        subtask: SedMLSubTask
-        for subtask in [repeated_task.getSubTask(i) for i in range(0, repeated_task.getNumSubTasks())]:
-            target_task = self.sedml.getTask(subtask.getTask())  # get task by id
-            if isinstance(target_task, SedMLRepeatedTask):
-                ret_models, ret_sims = self.__delve_into_repeated_task(target_task)
-                model_set.update(ret_models)
-                sim_set.update(ret_sims)
-            elif isinstance(target_task, SedMLTask):
-                model_set.add(target_task.getModelReference())
-                sim_set.add(target_task.getSimulationReference())
-        return model_set, sim_set
-
+            if self.output_ids is None or sim.getId() in self.needed_simulation_ids:
+                self.simulation_dict[sim.getId()] = sim
@@ -0,0 +1,96 @@
+"""
+Builds SED-ML documents out of Sed documents. Only conversion needs libsedml, so this module
+is imported on demand.
+"""
+
+import re
+from typing import Optional
+
+import libsedml  # type: ignore
+from libsedml import SedDocument as SedMLDoc
+from libsedml import SedModel as SedMLModel
+
+from sed_tooling.sed_model.dependency import Dependency
+from sed_tooling.sed_model.identifier_index import REFERENCE_PREFIX, Element
+from sed_tooling.sed_model.load_action import Load
+from sed_tooling.sed_model.sed_document import SedDocument
+
+SBML_LANGUAGE = "urn:sedml:language:sbml"
+SBML_LOAD_TYPE = "sbml::load_sbml"
+UNSUPPORTED_ONTOLOGIES = {"pe", "cosim"}
+# SED-ML ids are SIds, which are stricter than Sed identifiers
+SID_PATTERN = re.compile("^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def sedml_bytes(sedml: SedMLDoc) -> bytes:
+    return libsedml.writeSedMLToString(sedml).encode("utf-8")
+
+
+def _sid(identifier: str) -> str:
+    if SID_PATTERN.match(identifier) is None:
+        raise ValueError(f"Identifier `{identifier}` is not a valid SED-ML id")
+    return identifier
+
+
+def convert_to_sedml(sed_doc: SedDocument, export_path: Optional[str] = None) -> SedMLDoc:
+    ontologies: list[str] = sed_doc.metadata.ontologies
+    # unsupported ontologies
+    if UNSUPPORTED_ONTOLOGIES.intersection(set(ontologies)):
+        raise ValueError("File contains ontologies that can not currently be converted to SedML")
+    dropped: list[str] = _unconvertible(sed_doc)
+    if dropped:
+        raise ValueError(
+            f"Only SBML model loads can currently be converted to SedML, not {', '.join(dropped)}"
+        )
+    sedml: SedMLDoc = libsedml.SedDocument(1, 4)
+    _convert_loads(sedml, sed_doc)
+    if export_path is not None:
+        libsedml.writeSedMLToFile(sedml, export_path)
+    return sedml
+
+
+def _convert_loads(sedml: SedMLDoc, sed_doc: SedDocument) -> None:
+    # Each SBML load becomes a model named after its target variable
+    for action in sed_doc.actions:
+        if not isinstance(action, Load):
+            continue
+        if action.type != SBML_LOAD_TYPE:
+            raise ValueError(
+                f"Load `{action.identifier}` is of type `{action.type}`. "
+                "Only SBML is supported at this time."
+            )
+        dependency: Element = sed_doc.resolve(action.source)
+        if not isinstance(dependency, Dependency):
+            raise ValueError(f"Load `{action.identifier}` does not load a dependency")
+        variable: Element = sed_doc.resolve(action.target)
+        model: SedMLModel = sedml.createModel()
+        model.setId(_sid(variable.identifier))
+        model.setName(variable.name)
+        model.setLanguage(SBML_LANGUAGE)
+        model.setSource(dependency.source)
+
+
+def _unconvertible(sed_doc: SedDocument) -> list[str]:
+    # Everything but loads and the model variables they fill would be lost in conversion.
+    # Outputs name no data to report, so they would only become empty reports.
+    loaded: set[str] = {
+        action.target[len(REFERENCE_PREFIX) :]
+        for action in sed_doc.actions
+        if isinstance(action, Load) and action.target.startswith(REFERENCE_PREFIX)
+    }
+    dropped: list[str] = [
+        f"constant `{constant.identifier}`" for constant in sed_doc.declarations.constants
+    ]
+    dropped.extend(
+        f"variable `{variable.identifier}`"
+        for variable in sed_doc.declarations.variables
+        if variable.identifier not in loaded
+    )
+    dropped.extend(
+        f"action `{action.identifier}` of type `{action.type}`"
+        for action in sed_doc.actions
+        if not isinstance(action, Load)
+    )
+    dropped.extend(f"input `{input_.identifier}`" for input_ in sed_doc.inputs or [])
+    dropped.extend(f"output `{output.identifier}`" for output in sed_doc.outputs or [])
+    return dropped
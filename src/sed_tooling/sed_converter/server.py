@@ -0,0 +1,227 @@
+"""
+Long-running validation and conversion service. Worker processes import pydantic and libsedml
+and build the model schemas once, then handle archive after archive.
+
+    python -m sed_tooling.sed_converter.server --socket /tmp/sed_tooling.sock
+    python -m sed_tooling.sed_converter.server --port 8765 --concurrency 4
+
+Requests are HTTP, over the Unix socket or on localhost:
+    GET  /health    {"status": "ok", "concurrency": N}
+    POST /process   {"archive": "/path/to.omex" | "archive_base64": "...",
+                     "starting_type": "sed", "convert": false, "output": "/path/to/out.omex"}
+The reply to /process is the same record a batch run writes for each archive.
+"""
+
+import base64
+import json
+import os
+import socketserver
+import tempfile
+from argparse import ArgumentParser, Namespace
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from sed_tooling.sed_converter.archive import converted_archive_path
+from sed_tooling.sed_converter.batch import process_archive
+from sed_tooling.sed_converter.core import (
+    BACKENDS,
+    STARTING_TYPES,
+    add_cache_arguments,
+    get_mode,
+    load_backend,
+)
+from sed_tooling.sed_converter.sed_core import sed_schema_version
+
+HOST = "127.0.0.1"
+HEALTH_PATH = "/health"
+PROCESS_PATH = "/process"
+UPLOAD_NAME = "upload.omex"
+
+
+def _warm_up(_: int) -> None:
+    # Import every backend (libsedml included) and build the cached schema of every release
+    for mode in BACKENDS:
+        load_backend(mode)
+    sed_schema_version()
+
+
+def process_archive_bytes(
+    contents: bytes,
+    convert: bool,
+    mode: str,
+    use_cache: bool = False,
+    cache_dir: Optional[str] = None,
+) -> dict[str, Any]:
+    """
+    `process_archive` for an uploaded archive; a converted archive is sent back base64-encoded
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        archive: Path = Path(workdir) / UPLOAD_NAME
+        archive.write_bytes(contents)
+        result: dict[str, Any] = process_archive(str(archive), convert, mode, use_cache, cache_dir)
+        converted: Path = converted_archive_path(archive)
+        if converted.is_file():
+            result["converted_base64"] = base64.b64encode(converted.read_bytes()).decode("ascii")
+    result["archive"] = UPLOAD_NAME
+    result["errors"] = {
+        (UPLOAD_NAME if file == str(archive) else file): error
+        for file, error in result["errors"].items()
+    }
+    return result
+
+
+class ArchiveService:
+    """
+    Runs requests in a pool of `concurrency` warm worker processes; requests beyond that wait
+    """
+
+    def __init__(
+        self, concurrency: int, use_cache: bool = False, cache_dir: Optional[str] = None
+    ) -> None:
+        self.concurrency: int = concurrency
+        self.use_cache: bool = use_cache
+        self.cache_dir: Optional[str] = cache_dir
+        self.executor: ProcessPoolExecutor = ProcessPoolExecutor(max_workers=concurrency)
+        # Start the workers now, before any request thread exists
+        list(self.executor.map(_warm_up, range(concurrency)))
+
+    def process(self, request: dict[str, Any]) -> dict[str, Any]:
+        starting_type: str = request.get("starting_type", "sed")
+        if starting_type not in STARTING_TYPES:
+            raise ValueError(f"`starting_type` must be one of {', '.join(STARTING_TYPES)}")
+        mode: str = get_mode(starting_type)
+        convert: bool = bool(request.get("convert", False))
+        if "archive" in request:
+            return self.executor.submit(
+                process_archive,
+                str(request["archive"]),
+                convert,
+                mode,
+                self.use_cache,
+                self.cache_dir,
+                request.get("output"),
+            ).result()
+        if "archive_base64" in request:
+            contents: bytes = base64.b64decode(request["archive_base64"], validate=True)
+            return self.executor.submit(
+                process_archive_bytes, contents, convert, mode, self.use_cache, self.cache_dir
+            ).result()
+        raise ValueError("Request names neither an `archive` path nor `archive_base64` contents")
+
+    def close(self) -> None:
+        self.executor.shutdown()
+
+
+class ArchiveRequestHandler(BaseHTTPRequestHandler):
+    server: Union["ArchiveHTTPServer", "ArchiveUnixServer"]
+
+    def do_GET(self) -> None:
+        if self.path != HEALTH_PATH:
+            self._reply(404, {"error": f"Unknown path `{self.path}`"})
+            return
+        self._reply(200, {"status": "ok", "concurrency": self.server.service.concurrency})
+
+    def do_POST(self) -> None:
+        if self.path != PROCESS_PATH:
+            self._reply(404, {"error": f"Unknown path `{self.path}`"})
+            return
+        try:
+            length: int = int(self.headers.get("Content-Length", 0))
+            request: Any = json.loads(self.rfile.read(length))
+            if not isinstance(request, dict):
+                raise TypeError("Request must be a JSON object")
+            result: dict[str, Any] = self.server.service.process(request)
+        except (TypeError, ValueError) as e:
+            self._reply(400, {"error": f"{type(e).__name__}: {e}"})
+            return
+        except Exception as e:
+            # e.g. a worker process died; the client still gets a JSON reply
+            self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+        self._reply(200, result)
+
+    def _reply(self, status: int, body: dict[str, Any]) -> None:
+        payload: bytes = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def address_string(self) -> str:
+        # Unix socket peers have no host
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass  # one line per request would drown the service's own output
+
+
+class ArchiveHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int, service: ArchiveService) -> None:
+        super().__init__((HOST, port), ArchiveRequestHandler)
+        self.service: ArchiveService = service
+
+
+class ArchiveUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, service: ArchiveService) -> None:
+        # Left over from a server that did not shut down cleanly
+        Path(socket_path).unlink(missing_ok=True)
+        super().__init__(socket_path, ArchiveRequestHandler)
+        self.socket_path: str = socket_path
+        self.service: ArchiveService = service
+
+    def server_close(self) -> None:
+        super().server_close()
+        Path(self.socket_path).unlink(missing_ok=True)
+
+
+def make_server(
+    service: ArchiveService, socket_path: Optional[str] = None, port: Optional[int] = None
+) -> Union[ArchiveHTTPServer, ArchiveUnixServer]:
+    if socket_path is not None:
+        return ArchiveUnixServer(socket_path, service)
+    if port is not None:
+        return ArchiveHTTPServer(port, service)
+    raise ValueError("Serve on either a Unix socket or a localhost port")
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Serve Sed/SED-ML validation and conversion requests")
+    transport = parser.add_mutually_exclusive_group(required=True)
+    transport.add_argument("--socket", default=None, help="the Unix socket to listen on.")
+    transport.add_argument(
+        "--port", type=int, default=None, help="the localhost port to listen on."
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=os.cpu_count() or 1,
+        metavar="N",
+        help="handle at most N archives at once; further requests wait (default: CPU count).",
+    )
+    add_cache_arguments(parser)
+    args: Namespace = parser.parse_args()
+
+    service = ArchiveService(args.concurrency, not args.no_cache, args.cache_dir)
+    server = make_server(service, args.socket, args.port)
+    if isinstance(server, ArchiveHTTPServer):
+        print(f"serving on http://{HOST}:{server.server_port}")
+    else:
+        print(f"serving on {server.socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+from libsedml import SedAbstractTask as SedMLAbstractTask  # type: ignore
+from libsedml import SedDocument as SedMLDoc
+from libsedml import SedRepeatedTask as SedMLRepeatedTask
+from libsedml import SedTask as SedMLTask
+
+
+class TaskGraph:
+    """
+    Index of the tasks of a SED-ML document, built once, that answers which models and
+    simulations each task reaches through its (possibly nested) repeated tasks.
+    Reachability is memoized per task, so shared subtrees are only walked once.
+    """
+
+    def __init__(self, sedml: SedMLDoc) -> None:
+        self.tasks: dict[str, SedMLAbstractTask] = {}
+        self.subtasks: dict[str, list[str]] = {}
+        self._direct_models: dict[str, set[str]] = {}
+        self._direct_sims: dict[str, set[str]] = {}
+        self._reachable: dict[str, tuple[frozenset[str], frozenset[str]]] = {}
+
+        for task in [sedml.getTask(i) for i in range(sedml.getNumTasks())]:
+            task_id: str = task.getId()
+            self.tasks[task_id] = task
+            self.subtasks[task_id] = []
+            self._direct_models[task_id] = set()
+            self._direct_sims[task_id] = set()
+            if isinstance(task, SedMLTask):
+                self._direct_models[task_id].add(task.getModelReference())
+                self._direct_sims[task_id].add(task.getSimulationReference())
+            if isinstance(task, SedMLRepeatedTask):
+                self.subtasks[task_id] = [
+                    task.getSubTask(i).getTask() for i in range(task.getNumSubTasks())
+                ]
+                # setValue changes reach into models too
+                for i in range(task.getNumTaskChanges()):
+                    model_reference: str = task.getTaskChange(i).getModelReference()
+                    if model_reference:
+                        self._direct_models[task_id].add(model_reference)
+
+    def reachable(self, task_id: str) -> tuple[frozenset[str], frozenset[str]]:
+        """
+        Return the ids of the models and simulations `task_id` reaches.
+        Raises ValueError if the task takes part in a cycle of repeated tasks.
+        """
+        if task_id not in self._reachable:
+            self._resolve(task_id)
+        return self._reachable[task_id]
+
+    def reachable_from(self, task_ids: list[str]) -> tuple[set[str], set[str]]:
+        models: set[str] = set()
+        sims: set[str] = set()
+        for task_id in task_ids:
+            task_models, task_sims = self.reachable(task_id)
+            models.update(task_models)
+            sims.update(task_sims)
+        return models, sims
+
+    def _resolve(self, root: str) -> None:
+        # Iterative post-order walk, so deep nesting can't hit the recursion limit
+        in_progress: set[str] = set()
+        path: list[str] = []
+        stack: list[tuple[str, bool]] = [(root, False)]
+        while stack:
+            task_id, children_done = stack.pop()
+            if task_id in self._reachable or task_id not in self.tasks:
+                continue  # already resolved, or a subtask pointing at no task
+            if children_done:
+                in_progress.discard(task_id)
+                path.pop()
+                models: set[str] = set(self._direct_models[task_id])
+                sims: set[str] = set(self._direct_sims[task_id])
+                for subtask_id in self.subtasks[task_id]:
+                    if subtask_id in self._reachable:
+                        models.update(self._reachable[subtask_id][0])
+                        sims.update(self._reachable[subtask_id][1])
+                self._reachable[task_id] = (frozenset(models), frozenset(sims))
+                continue
+            if task_id in in_progress:
+                cycle: list[str] = path[path.index(task_id) :] + [task_id]
+                raise ValueError(f"Repeated tasks form a cycle: {' -> '.join(cycle)}")
+            in_progress.add(task_id)
+            path.append(task_id)
+            stack.append((task_id, True))
+            for subtask_id in reversed(self.subtasks[task_id]):
+                stack.append((subtask_id, False))
@@ -0,0 +1,130 @@
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Set
+
+from sed_tooling.sed_model.dependency import Dependency
+from sed_tooling.sed_model.identifier_index import (
+    REFERENCE_PREFIX,
+    DanglingReference,
+    Element,
+    iter_references,
+)
+from sed_tooling.sed_model.load_action import Load
+
+if TYPE_CHECKING:
+    from sed_tooling.sed_model.sed_document import SedDocument
+
+
+class ActionPlan(NamedTuple):
+    # Action ids in order of execution; the actions of one stage do not depend on each other
+    stages: List[List[str]]
+    # Action id -> ids of the actions that must run before it
+    requires: Dict[str, List[str]]
+    # Action id -> ids of the dependencies it reads
+    reads: Dict[str, List[str]]
+
+    def to_json(self) -> Dict[str, object]:
+        return self._asdict()
+
+
+class ActionCycleError(ValueError):
+    def __init__(self, cycle: List[str]) -> None:
+        super().__init__(f"Actions form a cycle: {' -> '.join(cycle)}")
+        self.cycle: List[str] = cycle
+
+
+class MissingReferenceError(ValueError):
+    def __init__(self, missing: List[DanglingReference]) -> None:
+        listed: str = ", ".join(f"{m.owner}.{m.field} -> {m.reference}" for m in missing)
+        super().__init__(f"Actions refer to elements that do not exist: {listed}")
+        self.missing: List[DanglingReference] = missing
+
+
+def plan_actions(document: "SedDocument") -> ActionPlan:
+    """
+    Order the actions of `document` by what they read and write: a Load reads its source and
+    writes its target variable, so it runs after every action writing that source. Actions
+    writing the same variable keep their list order. Other actions read and write nothing.
+    Raises MissingReferenceError or ActionCycleError when no such order exists.
+    """
+    index = document.identifier_index
+    missing: List[DanglingReference] = [
+        DanglingReference(element.identifier, field, reference)
+        for element, field, reference in iter_references(document)
+        if isinstance(element, Load) and index.get(reference) is None
+    ]
+    if missing:
+        raise MissingReferenceError(missing)
+    duplicated: List[str] = [
+        action.identifier for action in document.actions if index.counts[action.identifier] > 1
+    ]
+    if duplicated:
+        raise ValueError(
+            f"Action identifiers are not unique: {', '.join(dict.fromkeys(duplicated))}"
+        )
+
+    # Writers of each variable, in list order
+    writers: Dict[str, List[str]] = {}
+    for action in document.actions:
+        if isinstance(action, Load):
+            writers.setdefault(_identifier(action.target), []).append(action.identifier)
+
+    requires: Dict[str, List[str]] = {}
+    reads: Dict[str, List[str]] = {}
+    for action in document.actions:
+        required: Dict[str, None] = {}
+        reads[action.identifier] = []
+        if isinstance(action, Load):
+            source: Element = index.resolve(action.source)
+            if isinstance(source, Dependency):
+                reads[action.identifier].append(source.identifier)
+            for writer in writers.get(source.identifier, []):
+                required[writer] = None
+            # The previous writer of the same variable
+            target_writers: List[str] = writers[_identifier(action.target)]
+            position: int = target_writers.index(action.identifier)
+            if position > 0:
+                required[target_writers[position - 1]] = None
+        requires[action.identifier] = list(required)
+
+    return ActionPlan(_stages(requires), requires, reads)
+
+
+def _identifier(reference: str) -> str:
+    return (
+        reference[len(REFERENCE_PREFIX) :] if reference.startswith(REFERENCE_PREFIX) else reference
+    )
+
+
+def _stages(requires: Dict[str, List[str]]) -> List[List[str]]:
+    # Kahn's algorithm, one stage per round, keeping list order within a stage
+    remaining: Dict[str, int] = {action: len(set(before)) for action, before in requires.items()}
+    dependents: Dict[str, List[str]] = {action: [] for action in requires}
+    for action, before in requires.items():
+        for required in set(before):
+            dependents[required].append(action)
+    stages: List[List[str]] = []
+    ready: List[str] = [action for action, count in remaining.items() if count == 0]
+    while ready:
+        stages.append(ready)
+        next_ready: Set[str] = set()
+        for action in ready:
+            for dependent in dependents[action]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    next_ready.add(dependent)
+        ready = [action for action in requires if action in next_ready]
+    planned: int = sum(len(stage) for stage in stages)
+    if planned != len(requires):
+        raise ActionCycleError(_find_cycle(requires, {a for stage in stages for a in stage}))
+    return stages
+
+
+def _find_cycle(requires: Dict[str, List[str]], planned: Set[str]) -> List[str]:
+    # Every unplanned action requires another unplanned one, so following them must loop
+    action: str = next(action for action in requires if action not in planned)
+    path: List[str] = []
+    seen: Dict[str, int] = {}
+    while action not in seen:
+        seen[action] = len(path)
+        path.append(action)
+        action = next(before for before in requires[action] if before not in planned)
+    return path[seen[action] :] + [action]
@@ -0,0 +1,175 @@
+import sys
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel
+
+from sed_tooling.sed_model.action import Action
+from sed_tooling.sed_model.constant import Constant
+from sed_tooling.sed_model.dependency import Dependency
+from sed_tooling.sed_model.input import Input
+from sed_tooling.sed_model.load_action import Load
+from sed_tooling.sed_model.output import Output
+from sed_tooling.sed_model.sed_document import SedDocument
+from sed_tooling.sed_model.variable import Variable
+
+# Fields holding strings that repeat across a document, stored once in a StringTable
+CODED_FIELDS = ("type",)
+
+
+class StringTable:
+    """
+    Every distinct string stored once, and referred to by its index
+    """
+
+    __slots__ = ("_codes", "strings")
+
+    def __init__(self) -> None:
+        self.strings: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, string: str) -> int:
+        code: Optional[int] = self._codes.get(string)
+        if code is None:
+            code = self._codes[string] = len(self.strings)
+            self.strings.append(sys.intern(string))
+        return code
+
+    def __getitem__(self, code: int) -> str:
+        return self.strings[code]
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+
+class ElementTable:
+    """
+    Read-only, column-oriented storage of a list of elements, each one of `classes`.
+    Coded fields are kept as an array of StringTable codes, other fields as a list per field.
+    """
+
+    __slots__ = ("classes", "columns", "fields", "kinds", "strings")
+
+    def __init__(
+        self,
+        elements: Sequence[BaseModel],
+        classes: Tuple[Type[BaseModel], ...],
+        strings: StringTable,
+    ) -> None:
+        self.classes: Tuple[Type[BaseModel], ...] = classes
+        self.fields: Tuple[str, ...] = tuple(
+            dict.fromkeys(field for cls in classes for field in cls.model_fields)
+        )
+        self.strings: StringTable = strings
+        self.kinds: "array[int]" = array(
+            "B", (classes.index(type(element)) for element in elements)
+        )
+        self.columns: Dict[str, Any] = {}
+        for field in self.fields:
+            values: List[Any] = [getattr(element, field, None) for element in elements]
+            if field in CODED_FIELDS:
+                self.columns[field] = array("I", (strings.code(value) for value in values))
+            elif field == "identifier":
+                self.columns[field] = [sys.intern(value) for value in values]
+            else:
+                self.columns[field] = values
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def column(self, field: str) -> List[Any]:
+        if field in CODED_FIELDS:
+            return [self.strings[code] for code in self.columns[field]]
+        return list(self.columns[field])
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """
+        Every element as the dict of its fields, in order
+        """
+        columns: List[Any] = [self.column(field) for field in self.fields]
+        if len(self.classes) == 1:
+            return [dict(zip(self.fields, values)) for values in zip(*columns)]
+        # Each kind only gets the fields of its own class
+        kind_fields: List[List[int]] = [
+            [i for i, field in enumerate(self.fields) if field in cls.model_fields]
+            for cls in self.classes
+        ]
+        return [
+            {self.fields[i]: values[i] for i in kind_fields[kind]}
+            for kind, values in zip(self.kinds, zip(*columns))
+        ]
+
+    def __getitem__(self, row: int) -> Any:
+        cls: Type[BaseModel] = self.classes[self.kinds[row]]
+        values: Dict[str, Any] = {}
+        for field in cls.model_fields:
+            value: Any = self.columns[field][row]
+            values[field] = self.strings[value] if field in CODED_FIELDS else value
+        # Every value was validated when the table was built
+        return cls.model_construct(**values)
+
+
+class CompactDocument:
+    """
+    Memory-compact, read-only form of a SedDocument: no per-element model objects, and repeated
+    strings stored once. `to_document` gives back an equal SedDocument of the same release.
+    """
+
+    __slots__ = (
+        "actions",
+        "constants",
+        "dependencies",
+        "inputs",
+        "level",
+        "name",
+        "ontologies",
+        "outputs",
+        "release",
+        "strings",
+        "variables",
+        "version",
+    )
+
+    def __init__(self, document: SedDocument) -> None:
+        self.release: Type[SedDocument] = type(document)
+        self.strings: StringTable = StringTable()
+        self.name: str = document.metadata.name
+        self.level: int = document.metadata.level
+        self.version: int = document.metadata.version
+        self.ontologies: Tuple[int, ...] = tuple(
+            self.strings.code(ontology) for ontology in document.metadata.ontologies
+        )
+        self.dependencies: ElementTable = self._table(document.dependencies, Dependency)
+        self.constants: ElementTable = self._table(document.declarations.constants, Constant)
+        self.variables: ElementTable = self._table(document.declarations.variables, Variable)
+        self.actions: ElementTable = self._table(document.actions, Load, Action)
+        self.inputs: Optional[ElementTable] = (
+            None if document.inputs is None else self._table(document.inputs, Input)
+        )
+        self.outputs: Optional[ElementTable] = (
+            None if document.outputs is None else self._table(document.outputs, Output)
+        )
+
+    def _table(self, elements: Sequence[BaseModel], *classes: Type[BaseModel]) -> ElementTable:
+        return ElementTable(elements, classes, self.strings)
+
+    def to_document(self) -> SedDocument:
+        # Validating plain rows in one call is faster than building every element one by one
+        return self.release.model_validate(
+            {
+                "metadata": {
+                    "name": self.name,
+                    "level": self.level,
+                    "version": self.version,
+                    "ontologies": [self.strings[code] for code in self.ontologies],
+                },
+                "dependencies": self.dependencies.rows(),
+                "declarations": {
+                    "constants": self.constants.rows(),
+                    "variables": self.variables.rows(),
+                },
+                "actions": self.actions.rows(),
+                "inputs": None if self.inputs is None else self.inputs.rows(),
+                "outputs": None if self.outputs is None else self.outputs.rows(),
+            }
+        )
@@ -0,0 +1,24 @@
+"""
+Constrained string types shared by the sed_model fields.
+The patterns run inside pydantic-core, so validating a field never calls back into Python.
+"""
+
+from typing import Annotated
+
+from pydantic import StringConstraints
+
+# First character of an identifier, or of each `::`-separated part of a type
+_PART_START = "[><A-Za-z0-9_-]"
+# The rest of a part: anything that is not a `::` separator
+_PART_REST = "(?:[^:]|:[^:])*"
+
+IDENTIFIER_PATTERN = "^[A-Za-z0-9_-]+"
+# At least two parts separated by `::`; only the last part may end on a single `:`
+TYPE_PATTERN = f"^{_PART_START}{_PART_REST}(?:::{_PART_START}{_PART_REST})+:?$"
+REFERENCE_PATTERN = "^#[><A-Za-z0-9_-]+"
+SOURCE_PATTERN = "^[A-Za-z0-9_/-]+"
+
+Identifier = Annotated[str, StringConstraints(pattern=IDENTIFIER_PATTERN)]
+TypeExpression = Annotated[str, StringConstraints(pattern=TYPE_PATTERN)]
+Reference = Annotated[str, StringConstraints(pattern=REFERENCE_PATTERN)]
+Source = Annotated[str, StringConstraints(pattern=SOURCE_PATTERN)]
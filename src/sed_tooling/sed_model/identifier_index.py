@@ -0,0 +1,109 @@
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from sed_tooling.sed_model.action import Action
+from sed_tooling.sed_model.constant import Constant
+from sed_tooling.sed_model.dependency import Dependency
+from sed_tooling.sed_model.input import Input
+from sed_tooling.sed_model.load_action import Load
+from sed_tooling.sed_model.output import Output
+from sed_tooling.sed_model.variable import Variable
+
+if TYPE_CHECKING:
+    from sed_tooling.sed_model.sed_document import SedDocument
+
+REFERENCE_PREFIX = "#"
+
+Element = Union[Dependency, Constant, Variable, Action, Input, Output]
+
+
+class DanglingReference(NamedTuple):
+    owner: str  # identifier of the element holding the reference
+    field: str
+    reference: str
+
+
+class ReferenceReport(NamedTuple):
+    dangling: List[DanglingReference]
+    duplicates: Dict[str, int]  # identifier -> number of elements declaring it
+
+    @property
+    def ok(self) -> bool:
+        return not self.dangling and not self.duplicates
+
+
+def iter_elements(document: "SedDocument") -> Iterator[Element]:
+    yield from document.dependencies
+    yield from document.declarations.constants
+    yield from document.declarations.variables
+    yield from document.actions
+    yield from document.inputs or []
+    yield from document.outputs or []
+
+
+def iter_references(document: "SedDocument") -> Iterator[Tuple[Element, str, str]]:
+    """
+    Yield (element, field, reference) for every `#identifier` reference in the document
+    """
+    for action in document.actions:
+        if isinstance(action, Load):
+            yield action, "source", action.source
+            yield action, "target", action.target
+    for input_ in document.inputs or []:
+        if input_.target.startswith(REFERENCE_PREFIX):
+            yield input_, "target", input_.target
+    for output in document.outputs or []:
+        if isinstance(output.interval, str) and output.interval.startswith(REFERENCE_PREFIX):
+            yield output, "interval", output.interval
+
+
+def _snapshot(document: "SedDocument") -> Tuple[Tuple[int, int], ...]:
+    lists: List[Optional[List[Any]]] = [
+        document.dependencies,
+        document.declarations.constants,
+        document.declarations.variables,
+        document.actions,
+        document.inputs,
+        document.outputs,
+    ]
+    return tuple((id(elements), len(elements or [])) for elements in lists)
+
+
+class IdentifierIndex:
+    """
+    Identifier -> element lookup over every list of a SedDocument, built in one pass
+    """
+
+    def __init__(self, document: "SedDocument") -> None:
+        self.elements: Dict[str, Element] = {}
+        self.counts: Dict[str, int] = {}
+        for element in iter_elements(document):
+            identifier: str = element.identifier
+            self.counts[identifier] = self.counts.get(identifier, 0) + 1
+            # With duplicates, the first declaration wins, as it would in a linear scan
+            self.elements.setdefault(identifier, element)
+        self.snapshot: Tuple[Tuple[int, int], ...] = _snapshot(document)
+
+    def is_stale(self, document: "SedDocument") -> bool:
+        return self.snapshot != _snapshot(document)
+
+    def get(self, reference: str) -> Optional[Element]:
+        if reference.startswith(REFERENCE_PREFIX):
+            reference = reference[len(REFERENCE_PREFIX) :]
+        return self.elements.get(reference)
+
+    def resolve(self, reference: str) -> Element:
+        element: Optional[Element] = self.get(reference)
+        if element is None:
+            raise KeyError(f"`{reference}` does not refer to any element of the document")
+        return element
+
+    def check_references(self, document: "SedDocument") -> ReferenceReport:
+        dangling: List[DanglingReference] = [
+            DanglingReference(element.identifier, field, reference)
+            for element, field, reference in iter_references(document)
+            if self.get(reference) is None
+        ]
+        duplicates: Dict[str, int] = {
+            identifier: count for identifier, count in self.counts.items() if count > 1
+        }
+        return ReferenceReport(dangling, duplicates)
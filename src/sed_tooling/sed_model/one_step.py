@@ -2,5 +2,12 @@ from sed_tooling.sed_model.simulation import Simulation
 
 
 class OneStep(Simulation):
-    def __init__(self, algorithm: str) -> None:
-        super(algorithm)
+    __slots__ = ("step",)
+
+    step: float
+
+    def __init__(self, algorithm: str, step: float) -> None:
+        super().__init__(algorithm)
+        if step <= 0:
+            raise ValueError(f"OneStep needs a positive step, got {step}")
+        self.step = step
@@ -1,13 +1,20 @@
-from typing import Any, List, Optional, Union
+import json
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar, Union
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr, ValidationError
 
 from sed_tooling.sed_model.action import Action
+from sed_tooling.sed_model.action_plan import ActionPlan, plan_actions
+from sed_tooling.sed_model.constant import Constant
 from sed_tooling.sed_model.declarations import Declarations
 from sed_tooling.sed_model.dependency import Dependency
+from sed_tooling.sed_model.identifier_index import Element, IdentifierIndex, ReferenceReport
 from sed_tooling.sed_model.input import Input
+from sed_tooling.sed_model.load_action import Load
 from sed_tooling.sed_model.output import Output
+from sed_tooling.sed_model.type_expression import TypeReport, check_types
 from sed_tooling.sed_model.metadata import Metadata
+from sed_tooling.sed_model.variable import Variable
 
 
 class SedDocument(BaseModel):
@@ -18,30 +25,174 @@ class SedDocument(BaseModel):
     metadata: Metadata
     dependencies: List[Dependency]
     declarations: Declarations
-    actions: List[Action]
+    # Load first, so load actions keep their source and target
+    actions: List[Union[Load, Action]]
     inputs: Optional[List[Input]] = None
     outputs: Optional[List[Output]] = None
 
+    _identifier_index: Optional[IdentifierIndex] = PrivateAttr(default=None)
+
+    def __eq__(self, other: object) -> bool:
+        # The identifier index is only a cache, so it never makes two documents differ
+        if not isinstance(other, SedDocument):
+            return NotImplemented
+        return type(self) is type(other) and self.__dict__ == other.__dict__
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in type(self).model_fields:
+            self._identifier_index = None
+
+    @property
+    def identifier_index(self) -> IdentifierIndex:
+        """
+        Built on first use; rebuilt when a field is reassigned or a list changes length.
+        Call `invalidate_index` after renaming elements in place.
+        """
+        if self._identifier_index is None or self._identifier_index.is_stale(self):
+            self._identifier_index = IdentifierIndex(self)
+        return self._identifier_index
+
+    def invalidate_index(self) -> None:
+        self._identifier_index = None
+
+    def resolve(self, reference: str) -> Element:
+        return self.identifier_index.resolve(reference)
+
+    def check_references(self) -> ReferenceReport:
+        return self.identifier_index.check_references(self)
+
+    def action_plan(self) -> ActionPlan:
+        return plan_actions(self)
+
+    def check_types(self) -> TypeReport:
+        return check_types(self)
+
 
 class SedDocumentL1V1(SedDocument, BaseModel):
     metadata: Metadata
     dependencies: List[Dependency]
     declarations: Declarations
-    actions: List[Action]
+    actions: List[Union[Load, Action]]
     inputs: Optional[List[Input]] = None
     outputs: Optional[List[Output]] = None
 
 
-def get_correct_doc(json_dict: dict[str, Any]) -> SedDocumentL1V1:
-    level_version_matrix = [[SedDocumentL1V1]]
-    document: Union[SedDocumentL1V1, SedDocument] = SedDocument(**json_dict)
-    level: int = document.metadata.level
-    version: int = document.metadata.version
-    correct_release = level_version_matrix[level - 1][version - 1]
+# Every supported release, keyed by (level, version)
+DOCUMENT_RELEASES: Dict[Tuple[int, int], Type[SedDocument]] = {
+    (1, 1): SedDocumentL1V1,
+}
+
+
+def get_release(json_dict: Dict[str, Any]) -> Tuple[int, int]:
+    """
+    Read the level and version out of the raw metadata block, without validating the document
+    """
+    metadata: Any = json_dict.get("metadata")
+    if not isinstance(metadata, dict):
+        raise ValueError("Document has no `metadata` block to read its level and version from")
+    try:
+        return int(metadata["level"]), int(metadata["version"])
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError("Document metadata does not declare a valid level and version") from e
+
+
+class _ReleaseMetadata(BaseModel):
+    level: int
+    version: int
+
+
+class _ReleaseProbe(BaseModel):
+    # Parsing JSON into this skips every other field without building Python objects for it
+    metadata: _ReleaseMetadata
+
+
+def get_release_json(contents: Union[bytes, str]) -> Tuple[int, int]:
+    """
+    Read the level and version out of raw JSON, without building the rest of the document
+    """
     try:
-        temp_doc = correct_release(**json_dict)
-        document = temp_doc
+        metadata: _ReleaseMetadata = _ReleaseProbe.model_validate_json(contents).metadata
+    except ValidationError as e:
+        raise ValueError(
+            "Document is not JSON with a metadata block declaring its level and version"
+        ) from e
+    return metadata.level, metadata.version
+
+
+def get_release_class(level: int, version: int) -> Type[SedDocument]:
+    correct_release: Optional[Type[SedDocument]] = DOCUMENT_RELEASES.get((level, version))
+    if correct_release is None:
+        supported: str = ", ".join(f"L{lvl}V{ver}" for lvl, ver in DOCUMENT_RELEASES)
+        raise ValueError(
+            f"Unsupported document level:{level} version:{version} (supported: {supported})"
+        )
+    return correct_release
+
+
+def get_correct_doc(json_dict: Dict[str, Any]) -> SedDocument:
+    level, version = get_release(json_dict)
+    correct_release: Type[SedDocument] = get_release_class(level, version)
+    try:
+        return correct_release.model_validate(json_dict)
     except Exception as e:
         print(f"Document could not be processed as level:{level} version:{version}")
         raise e
-    return document
+
+
+def get_correct_doc_json(contents: Union[bytes, str]) -> SedDocument:
+    """
+    Validate raw JSON (from a file, an archive member, ...) straight into the correct release,
+    without an intermediate dict
+    """
+    level, version = get_release_json(contents)
+    correct_release: Type[SedDocument] = get_release_class(level, version)
+    try:
+        return correct_release.model_validate_json(contents)
+    except Exception as e:
+        print(f"Document could not be processed as level:{level} version:{version}")
+        raise e
+
+
+_Model = TypeVar("_Model", bound=BaseModel)
+
+
+def _construct(model: Type[_Model], values: Dict[str, Any]) -> _Model:
+    # model_construct takes anything, so at least every required field must be there
+    missing: List[str] = [
+        name
+        for name, field in model.model_fields.items()
+        if field.is_required() and name not in values
+    ]
+    if missing:
+        raise ValueError(f"{model.__name__} dump is missing {', '.join(missing)}")
+    return model.model_construct(**values)
+
+
+def rebuild_validated_doc(contents: Union[bytes, str]) -> SedDocument:
+    """
+    Rebuild a document from the JSON dump of one that was already validated (such as a cached
+    result) without validating it again. Never use this on JSON that was not validated; a dump
+    missing required fields raises a ValueError.
+    """
+    dump: Dict[str, Any] = json.loads(contents)
+    metadata: Metadata = _construct(Metadata, dump["metadata"])
+    release: Type[SedDocument] = get_release_class(metadata.level, metadata.version)
+    declarations: Dict[str, Any] = dump["declarations"]
+    inputs: Optional[List[Dict[str, Any]]] = dump.get("inputs")
+    outputs: Optional[List[Dict[str, Any]]] = dump.get("outputs")
+    return release.model_construct(
+        metadata=metadata,
+        dependencies=[_construct(Dependency, values) for values in dump["dependencies"]],
+        declarations=Declarations.model_construct(
+            constants=[_construct(Constant, values) for values in declarations["constants"]],
+            variables=[_construct(Variable, values) for values in declarations["variables"]],
+        ),
+        # Only loads are dumped with a source
+        actions=[
+            _construct(Load if "source" in values else Action, values)
+            for values in dump["actions"]
+        ],
+        inputs=None if inputs is None else [_construct(Input, values) for values in inputs],
+        outputs=(None if outputs is None else [_construct(Output, values) for values in outputs]),
+    )
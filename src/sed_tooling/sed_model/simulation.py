@@ -1,4 +1,7 @@
 class Simulation:
+    # Parameter scans create huge numbers of simulations, so they carry no per-instance dict
+    __slots__ = ("algorithm",)
+
     algorithm: str
 
     def __init__(self, algorithm: str):
@@ -2,5 +2,7 @@ from sed_tooling.sed_model.simulation import Simulation
 
 
 class SteadyState(Simulation):
+    __slots__ = ()
+
     def __init__(self, algorithm: str) -> None:
         super().__init__(algorithm)
@@ -0,0 +1,203 @@
+"""
+Parsed type expressions, `org::name<args>`, e.g. `Model<sbml::SBMLFile>`.
+
+Structurally equal types are interned to one TypeExpr object, so comparing two parsed types is
+an identity check and they can key dicts and caches.
+"""
+
+import weakref
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from sed_tooling.sed_model.dependency import Dependency
+from sed_tooling.sed_model.identifier_index import iter_elements
+from sed_tooling.sed_model.load_action import Load
+from sed_tooling.sed_model.variable import Variable
+
+if TYPE_CHECKING:
+    from sed_tooling.sed_model.sed_document import SedDocument
+
+SEPARATOR = "::"
+_DELIMITERS = "<>,"
+
+
+class TypeExpr:
+    """
+    A qualified name, `org::...::name`, with optional type arguments
+    """
+
+    __slots__ = ("__weakref__", "args", "name", "namespace")
+
+    namespace: Tuple[str, ...]
+    name: str
+    args: Tuple["TypeExpr", ...]
+
+    def __new__(cls, *_: object) -> "TypeExpr":
+        raise TypeError("Type expressions are built with `parse_type` or `make_type`")
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError("Type expressions are immutable")
+
+    @property
+    def qualified_name(self) -> str:
+        return SEPARATOR.join((*self.namespace, self.name))
+
+    def __repr__(self) -> str:
+        return f"TypeExpr({str(self)!r})"
+
+    def __str__(self) -> str:
+        if not self.args:
+            return self.qualified_name
+        return f"{self.qualified_name}<{','.join(str(arg) for arg in self.args)}>"
+
+    def __reduce__(self) -> Tuple[object, Tuple[object, ...]]:
+        # Unpickled copies are interned again
+        return make_type, (self.namespace, self.name, self.args)
+
+
+_TypeKey = Tuple[Tuple[str, ...], str, Tuple[TypeExpr, ...]]
+# Weak, so a type is dropped once nothing (e.g. parse_type's bounded cache) refers to it
+_INTERNED: "weakref.WeakValueDictionary[_TypeKey, TypeExpr]" = weakref.WeakValueDictionary()
+
+
+def make_type(namespace: Tuple[str, ...], name: str, args: Tuple[TypeExpr, ...] = ()) -> TypeExpr:
+    key: _TypeKey = (namespace, name, args)
+    interned: Optional[TypeExpr] = _INTERNED.get(key)
+    if interned is None:
+        interned = object.__new__(TypeExpr)
+        object.__setattr__(interned, "namespace", namespace)
+        object.__setattr__(interned, "name", name)
+        object.__setattr__(interned, "args", args)
+        interned = _INTERNED.setdefault(key, interned)
+    return interned
+
+
+def _tokens(text: str) -> Iterator[str]:
+    start: int = 0
+    for i, char in enumerate(text):
+        if char in _DELIMITERS:
+            if i > start:
+                yield text[start:i]
+            yield char
+            start = i + 1
+    if start < len(text):
+        yield text[start:]
+
+
+@lru_cache(maxsize=1024)
+def parse_type(text: str) -> TypeExpr:
+    """
+    Parse `text` into its interned TypeExpr; raises ValueError if it is not a type expression
+    """
+    tokens: List[str] = [token.strip() for token in _tokens(text)]
+    position: int = 0
+
+    def expression() -> TypeExpr:
+        nonlocal position
+        if position >= len(tokens) or tokens[position] in _DELIMITERS:
+            raise ValueError(f"Expected a type name at token {position} of `{text}`")
+        parts: List[str] = tokens[position].split(SEPARATOR)
+        if not all(parts):
+            raise ValueError(f"Empty name part in `{tokens[position]}` of `{text}`")
+        position += 1
+        args: List[TypeExpr] = []
+        if position < len(tokens) and tokens[position] == "<":
+            position += 1
+            args.append(expression())
+            while position < len(tokens) and tokens[position] == ",":
+                position += 1
+                args.append(expression())
+            if position >= len(tokens) or tokens[position] != ">":
+                raise ValueError(f"Unclosed `<` in `{text}`")
+            position += 1
+        return make_type(tuple(parts[:-1]), parts[-1], tuple(args))
+
+    parsed: TypeExpr = expression()
+    if position != len(tokens):
+        raise ValueError(f"Unexpected `{tokens[position]}` in `{text}`")
+    return parsed
+
+
+@lru_cache(maxsize=4096)
+def is_compatible(expected: TypeExpr, actual: TypeExpr) -> bool:
+    """
+    Whether a value of type `actual` can be used where `expected` is required. A type given
+    without arguments accepts any arguments, so `Model` accepts `Model<sbml::SBMLFile>`.
+    """
+    if expected is actual:
+        return True
+    if expected.namespace != actual.namespace or expected.name != actual.name:
+        return False
+    if not expected.args:
+        return True
+    return len(expected.args) == len(actual.args) and all(
+        is_compatible(e, a) for e, a in zip(expected.args, actual.args)
+    )
+
+
+class ActionSignature(NamedTuple):
+    source: TypeExpr  # type of the dependency or variable the action reads
+    target: TypeExpr  # type of the variable the action writes
+
+
+# What each known action type reads and writes, keyed by the action's parsed type
+ACTION_SIGNATURES: Dict[TypeExpr, ActionSignature] = {}
+
+
+def register_action_signature(action_type: str, source: str, target: str) -> None:
+    ACTION_SIGNATURES[parse_type(action_type)] = ActionSignature(
+        parse_type(source), parse_type(target)
+    )
+
+
+register_action_signature("sbml::load_sbml", "sbml::SBMLFile", "Model<sbml::SBMLFile>")
+
+
+class TypeMismatch(NamedTuple):
+    owner: str  # identifier of the element whose type does not fit
+    field: str
+    expected: str
+    actual: str
+
+
+class TypeReport(NamedTuple):
+    malformed: Dict[str, str]  # identifier -> why its type could not be parsed
+    mismatches: List[TypeMismatch]
+
+    @property
+    def ok(self) -> bool:
+        return not self.malformed and not self.mismatches
+
+
+def check_types(document: "SedDocument") -> TypeReport:
+    """
+    Parse the type of every element and check each Load of a known action type against its
+    signature, in one pass over the document
+    """
+    malformed: Dict[str, str] = {}
+    types: Dict[str, TypeExpr] = {}
+    for element in iter_elements(document):
+        try:
+            types.setdefault(element.identifier, parse_type(element.type))
+        except ValueError as e:
+            malformed[element.identifier] = str(e)
+
+    mismatches: List[TypeMismatch] = []
+    index = document.identifier_index
+    for action in document.actions:
+        action_type: Optional[TypeExpr] = types.get(action.identifier)
+        signature: Optional[ActionSignature] = (
+            None if action_type is None else ACTION_SIGNATURES.get(action_type)
+        )
+        if signature is None or not isinstance(action, Load):
+            continue
+        for field, expected in (("source", signature.source), ("target", signature.target)):
+            referenced = index.get(getattr(action, field))
+            if not isinstance(referenced, (Dependency, Variable)):
+                continue  # dangling references are check_references' business
+            actual: Optional[TypeExpr] = types.get(referenced.identifier)
+            if actual is not None and not is_compatible(expected, actual):
+                mismatches.append(
+                    TypeMismatch(action.identifier, field, str(expected), str(actual))
+                )
+    return TypeReport(malformed, mismatches)
@@ -1,8 +1,17 @@
+from typing import Dict, List, Sequence
+
+import numpy as np
+import numpy.typing as npt
+
 from sed_tooling.sed_model.simulation import Simulation
 
+TimeGrid = npt.NDArray[np.float64]
+
 
 class UniformTimeCourse(Simulation):
-    num_of_points: float
+    __slots__ = ("end_time", "num_of_points", "output_start_time", "start_time")
+
+    num_of_points: int
     end_time: float
     start_time: float
     output_start_time: float
@@ -16,7 +25,57 @@ class UniformTimeCourse(Simulation):
         output_start_time: float = 0.0,
     ):
         super().__init__(algorithm)
+        if num_of_points < 1 or num_of_points != int(num_of_points):
+            raise ValueError(f"num_of_points must be a positive whole number, got {num_of_points}")
+        if not start_time <= output_start_time <= end_time:
+            raise ValueError(
+                "Expected start_time <= output_start_time <= end_time, got "
+                f"{start_time}, {output_start_time}, {end_time}"
+            )
         self.start_time = start_time
         self.end_time = end_time
         self.output_start_time = output_start_time
-        self.num_of_points = num_of_points
+        self.num_of_points = int(num_of_points)
+
+    def time_points(self) -> TimeGrid:
+        """
+        The output time points: `num_of_points` equal intervals from output_start_time to
+        end_time, so `num_of_points + 1` values
+        """
+        return time_grid_matrix(
+            np.array([self.output_start_time]), np.array([self.end_time]), self.num_of_points
+        )[0]
+
+
+def time_grid_matrix(
+    output_start_times: npt.ArrayLike, end_times: npt.ArrayLike, num_of_points: int
+) -> TimeGrid:
+    """
+    Time grids of many time courses with the same number of points, one row per time course
+    """
+    starts: TimeGrid = np.asarray(output_start_times, dtype=np.float64)
+    ends: TimeGrid = np.asarray(end_times, dtype=np.float64)
+    fractions: TimeGrid = np.linspace(0.0, 1.0, num_of_points + 1)
+    grid: TimeGrid = starts[:, np.newaxis] + np.outer(ends - starts, fractions)
+    grid[:, -1] = ends  # exact end times, whatever the rounding
+    return grid
+
+
+def time_grids(simulations: Sequence[UniformTimeCourse]) -> List[TimeGrid]:
+    """
+    The time points of every simulation, in order; simulations that share a number of points
+    are computed together as one matrix
+    """
+    rows_by_points: Dict[int, List[int]] = {}
+    for row, simulation in enumerate(simulations):
+        rows_by_points.setdefault(simulation.num_of_points, []).append(row)
+    grids: List[TimeGrid] = [np.empty(0)] * len(simulations)
+    for num_of_points, rows in rows_by_points.items():
+        matrix: TimeGrid = time_grid_matrix(
+            [simulations[row].output_start_time for row in rows],
+            [simulations[row].end_time for row in rows],
+            num_of_points,
+        )
+        for row, grid in zip(rows, matrix):
+            grids[row] = grid
+    return grids
@@ -0,0 +1,86 @@
+import copy
+from typing import Any, Callable
+
+import libsedml  # type: ignore
+import pytest
+
+_SED_JSON: dict[str, Any] = {
+    "metadata": {"name": "test", "level": 1, "version": 1, "ontologies": ["sed"]},
+    "dependencies": [
+        {"name": "depname", "identifier": "depid", "type": "org1::mytype", "source": "mysource"}
+    ],
+    "declarations": {
+        "constants": [],
+        "variables": [{"name": "var1", "identifier": "var1id", "type": "org1::mytype"}],
+    },
+    "actions": [{"name": "action1", "identifier": "act1id", "type": "org1::mytype"}],
+}
+_SBML_SED_JSON: dict[str, Any] = {
+    "metadata": {"name": "sbml", "level": 1, "version": 1, "ontologies": ["sed", "sbml"]},
+    "dependencies": [
+        {
+            "name": "model file",
+            "identifier": "dep_model0",
+            "type": "sbml::SBMLFile",
+            "source": "models/model0.xml",
+        }
+    ],
+    "declarations": {
+        "constants": [],
+        "variables": [
+            {"name": "model 0", "identifier": "model0", "type": "Model<sbml::SBMLFile>"}
+        ],
+    },
+    "actions": [
+        {
+            "name": "load model 0",
+            "identifier": "load_model0",
+            "type": "sbml::load_sbml",
+            "source": "#dep_model0",
+            "target": "#model0",
+        }
+    ],
+}
+
+
+@pytest.fixture
+def sed_json() -> dict[str, Any]:
+    """
+    A valid Sed document with one dependency, variable and action
+    """
+    return copy.deepcopy(_SED_JSON)
+
+
+@pytest.fixture
+def sbml_sed_json() -> dict[str, Any]:
+    """
+    A convertible Sed document loading one SBML model
+    """
+    return copy.deepcopy(_SBML_SED_JSON)
+
+
+def _add_basic_task(doc: libsedml.SedDocument, index: int) -> str:
+    model = doc.createModel()
+    model.setId(f"model{index}")
+    model.setLanguage("urn:sedml:language:sbml.level-3.version-1")
+    model.setSource(f"model{index}.xml")
+    sim = doc.createUniformTimeCourse()
+    sim.setId(f"sim{index}")
+    sim.setInitialTime(0)
+    sim.setOutputStartTime(0)
+    sim.setOutputEndTime(10)
+    sim.setNumberOfPoints(10)
+    sim.createAlgorithm().setKisaoID("KISAO:0000019")
+    task = doc.createTask()
+    task.setId(f"task{index}")
+    task.setModelReference(f"model{index}")
+    task.setSimulationReference(f"sim{index}")
+    return f"task{index}"
+
+
+@pytest.fixture
+def add_basic_task() -> Callable[[libsedml.SedDocument, int], str]:
+    """
+    Adds model, simulation and task `<kind>{index}` to a SED-ML document, returning the task id
+    """
+    return _add_basic_task
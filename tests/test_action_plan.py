@@ -0,0 +1,59 @@
+import json
+from pathlib import Path
+from typing import Any
+from zipfile import ZipFile
+
+import pytest
+
+from sed_tooling.sed_converter.core import SED_MODE, setup
+from sed_tooling.sed_model.action_plan import ActionCycleError, MissingReferenceError
+from sed_tooling.sed_model.sed_document import get_correct_doc
+
+
+def _load(identifier: str, source: str, target: str) -> dict[str, Any]:
+    return {
+        "name": identifier,
+        "identifier": identifier,
+        "type": "sbml::load_sbml",
+        "source": f"#{source}",
+        "target": f"#{target}",
+    }
+
+
+@pytest.fixture
+def models_a_and_b(sbml_sed_json: dict[str, Any]) -> dict[str, Any]:
+    sbml_sed_json["declarations"]["variables"] += [
+        {"name": name, "identifier": name, "type": "Model<sbml::SBMLFile>"} for name in ("a", "b")
+    ]
+    return sbml_sed_json
+
+
+def test_actions_are_staged_by_what_they_read_and_write(models_a_and_b: dict[str, Any]) -> None:
+    models_a_and_b["actions"] += [_load("load_b", "a", "b"), _load("load_a", "model0", "a")]
+
+    plan = get_correct_doc(models_a_and_b).action_plan()
+
+    assert plan.stages == [["load_model0"], ["load_a"], ["load_b"]]
+    assert plan.requires == {"load_model0": [], "load_b": ["load_a"], "load_a": ["load_model0"]}
+    assert plan.reads["load_model0"] == ["dep_model0"]
+
+
+def test_cycles_and_missing_references_are_reported(
+    tmp_path: Path, models_a_and_b: dict[str, Any]
+) -> None:
+    archive_path = tmp_path / "plan.omex"
+    with ZipFile(archive_path, "w") as omex:
+        omex.writestr("simulation.sed", json.dumps(models_a_and_b))
+    assert setup(str(archive_path), False, SED_MODE, plan=True) == {}
+
+    loads = models_a_and_b["actions"]
+    models_a_and_b["actions"] = loads + [_load("load_a", "b", "a"), _load("load_b", "a", "b")]
+    cyclic = get_correct_doc(models_a_and_b)
+    with pytest.raises(ActionCycleError) as cycle:
+        cyclic.action_plan()
+    assert cycle.value.cycle == ["load_a", "load_b", "load_a"]
+
+    models_a_and_b["actions"] = loads + [_load("load_a", "nowhere", "a")]
+    dangling = get_correct_doc(models_a_and_b)
+    with pytest.raises(MissingReferenceError):
+        dangling.action_plan()
@@ -0,0 +1,131 @@
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+import pytest
+
+from sed_tooling.sed_converter import archive
+from sed_tooling.sed_converter.archive import (
+    OmexArchive,
+    OmexWriter,
+    manifest_formats,
+    update_manifest,
+)
+from sed_tooling.sed_converter.sed_core import SedCore
+
+
+def test_archive_reads_members_in_memory(tmp_path: Path, sed_json: dict[str, Any]) -> None:
+    archive_path = tmp_path / "test.omex"
+    with ZipFile(archive_path, "w") as omex:
+        omex.writestr("manifest.xml", "<omexManifest/>")
+        omex.writestr("model/model.xml", "<sbml/>")
+        omex.writestr("experiments/", "")
+        omex.writestr("experiments/simulation.sed", json.dumps(sed_json))
+
+    with OmexArchive(str(archive_path)) as archive:
+        assert archive.members == [
+            "manifest.xml",
+            "model/model.xml",
+            "experiments/simulation.sed",
+        ]
+        assert archive.sed_members == ["experiments/simulation.sed"]
+        assert archive.sedml_members == []
+
+        sed_core = SedCore(sed_files=archive.sed_members, archive=archive)
+        sed_core.validate_all_files()
+
+    assert sed_core.parsed_files["experiments/simulation.sed"].metadata.name == "test"
+    assert list(tmp_path.iterdir()) == [archive_path]
+
+
+def test_parallel_validation_keeps_order_and_reports_errors(
+    tmp_path: Path, sed_json: dict[str, Any]
+) -> None:
+    archive_path = tmp_path / "test.omex"
+    with ZipFile(archive_path, "w") as omex:
+        for i in range(3):
+            omex.writestr(f"sim{i}.sed", json.dumps(sed_json))
+        omex.writestr("broken.sed", "{")
+
+    with OmexArchive(str(archive_path)) as archive:
+        sed_core = SedCore(sed_files=archive.sed_members, archive=archive, jobs=2)
+        sed_core.validate_all_files()
+
+    assert list(sed_core.parsed_files) == ["sim0.sed", "sim1.sed", "sim2.sed"]
+    assert list(sed_core.errors) == ["broken.sed"]
+    assert sed_core.errors["broken.sed"].startswith("ValueError")
+
+
+def _write_source(path: Path) -> None:
+    with ZipFile(path, "w", ZIP_DEFLATED) as omex:
+        for i in range(4):
+            omex.writestr(f"models/model{i}.xml", f"<sbml id='{i}'/>" * 5000)
+        omex.writestr("stored.txt", "kept as is", compress_type=ZIP_STORED)
+
+
+def test_members_are_copied_raw_or_recompressed(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    source_path = tmp_path / "source.omex"
+    _write_source(source_path)
+    with ZipFile(source_path) as source_zip:
+        expected = {name: source_zip.read(name) for name in source_zip.namelist()}
+        stored = {info.filename: info for info in source_zip.infolist()}
+
+    with ZipFile(tmp_path / "probe.zip", "w") as probe:
+        assert archive.can_write_raw(probe) == ((3, 9) <= sys.version_info[:2] < (3, 14))
+
+    for raw in (True, False):
+        monkeypatch.setattr(archive, "can_write_raw", lambda _, raw=raw: raw)
+        target_path = tmp_path / f"raw_{raw}.omex"
+        with OmexArchive(str(source_path)) as source, OmexWriter(str(target_path)) as writer:
+            writer.write("first.txt", b"written before the copies")
+            for member in source.members:
+                writer.copy_compressed(source, member)
+            writer.write("last.txt", b"written after them")
+        with ZipFile(target_path) as target:
+            assert target.testzip() is None
+            assert target.read("last.txt") == b"written after them"
+            for name, data in expected.items():
+                assert target.read(name) == data
+                if raw:
+                    assert target.getinfo(name).compress_size == stored[name].compress_size
+
+
+def test_raw_reads_do_not_disturb_concurrent_reads(tmp_path: Path) -> None:
+    source_path = tmp_path / "source.omex"
+    _write_source(source_path)
+    with ZipFile(source_path) as source_zip:
+        expected = {
+            info.filename: (source_zip.read(info.filename), info.compress_size)
+            for info in source_zip.infolist()
+        }
+
+    with OmexArchive(str(source_path)) as source:
+
+        def read_both(member: str) -> bool:
+            for _ in range(20):
+                raw: bytes = b"".join(source.iter_compressed(member))
+                if len(raw) != expected[member][1] or source.read(member) != expected[member][0]:
+                    return False
+            return True
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            assert all(pool.map(read_both, list(expected) * 2))
+
+
+def test_manifest_entries_are_matched_by_normalized_location() -> None:
+    manifest = b"""<omexManifest xmlns="http://identifiers.org/combine.specifications/omex-manifest">
+  <content location="/doc.sed" format="application/json"/>
+  <content location="./a/../other.sed" format="application/json"/>
+</omexManifest>"""
+
+    updated = update_manifest(
+        manifest, {"doc.sed": "doc.sedml", "other.sed": "other.sedml"}, "sedml"
+    )
+
+    assert updated.count(b"<content") == 2
+    assert manifest_formats(updated) == {"doc.sedml": "sedml", "other.sedml": "sedml"}
@@ -0,0 +1,81 @@
+import zlib
+from pathlib import Path
+from typing import Callable
+from zipfile import ZipFile
+
+import libsedml  # type: ignore
+
+from sed_tooling.sed_converter.archive import SEDML_FORMAT, OmexArchive
+from sed_tooling.sed_converter.core import SEDML_MODE, setup
+
+MANIFEST = """<?xml version="1.0" encoding="UTF-8"?>
+<omexManifest xmlns="http://identifiers.org/combine.specifications/omex-manifest">
+  <content location="." format="http://identifiers.org/combine.specifications/omex"/>
+  <content location="./experiments/simulation.xml" format="{sedml}/level-1-version-4"/>
+  <content location="./experiments/notes.sedml" format="http://purl.org/NET/mediatypes/text/plain"/>
+  <content location="./models/model0.xml" format="http://identifiers.org/combine.specifications/sbml"/>
+</omexManifest>
+""".format(sedml=SEDML_FORMAT)
+
+
+def _document(add_basic_task: Callable[[libsedml.SedDocument, int], str], *sources: str) -> bytes:
+    doc = libsedml.SedDocument(1, 4)
+    for index, source in enumerate(sources):
+        add_basic_task(doc, index)
+        doc.getModel(index).setSource(source)
+    return libsedml.writeSedMLToString(doc).encode()
+
+
+def test_index_holds_declared_format_size_and_crc(
+    tmp_path: Path, add_basic_task: Callable[[libsedml.SedDocument, int], str]
+) -> None:
+    archive_path = tmp_path / "test.omex"
+    with ZipFile(archive_path, "w") as omex:
+        omex.writestr("manifest.xml", MANIFEST)
+        omex.writestr("models/", "")
+        omex.writestr("models/model0.xml", "<sbml/>")
+        omex.writestr(
+            "experiments/simulation.xml", _document(add_basic_task, "../models/model0.xml")
+        )
+        omex.writestr("experiments/notes.sedml", "not a document")
+        omex.writestr(
+            "experiments/other.sedml", _document(add_basic_task, "urn:miriam:biomodels.db:X", "#m")
+        )
+
+    with OmexArchive(str(archive_path)) as archive:
+        index = archive.index
+        assert "models/" not in index
+        entry = index.entries["models/model0.xml"]
+        assert entry.format == "http://identifiers.org/combine.specifications/sbml"
+        assert (entry.size, entry.crc) == (7, zlib.crc32(b"<sbml/>"))
+        assert index.format_of("experiments/other.sedml") is None
+        # Declared formats win over extensions; undeclared members fall back to them
+        assert index.documents(".sedml", SEDML_FORMAT) == [
+            "experiments/simulation.xml",
+            "experiments/other.sedml",
+        ]
+        assert index.resolve("experiments/simulation.xml", "../models/model0.xml") == (
+            "models/model0.xml"
+        )
+        assert index.resolve("experiments/simulation.xml", "models/model0.xml") == (
+            "models/model0.xml"
+        )
+        assert index.missing_sources(
+            "experiments/other.sedml", ["urn:miriam:biomodels.db:X", "#m", "model1.xml"]
+        ) == ["model1.xml"]
+
+    assert setup(str(archive_path), False, SEDML_MODE) == {}
+
+
+def test_model_sources_missing_from_the_archive_are_errors(
+    tmp_path: Path, add_basic_task: Callable[[libsedml.SedDocument, int], str]
+) -> None:
+    archive_path = tmp_path / "test.omex"
+    with ZipFile(archive_path, "w") as omex:
+        omex.writestr("model0.xml", "<sbml/>")
+        omex.writestr("simulation.sedml", _document(add_basic_task, "model0.xml", "missing.xml"))
+
+    errors = setup(str(archive_path), False, SEDML_MODE)
+
+    assert list(errors) == ["simulation.sedml"]
+    assert "`missing.xml`" in errors["simulation.sedml"]
@@ -0,0 +1,31 @@
+import json
+from pathlib import Path
+from typing import Any
+from zipfile import ZipFile
+
+from sed_tooling.sed_converter.batch import collect_archives, run_batch
+from sed_tooling.sed_converter.core import SED_MODE
+
+
+def _write_archive(path: Path, sed_contents: str) -> None:
+    with ZipFile(path, "w") as omex:
+        omex.writestr("simulation.sed", sed_contents)
+
+
+def test_batch_resumes_from_checkpoint(tmp_path: Path, sed_json: dict[str, Any]) -> None:
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    _write_archive(corpus / "a.omex", json.dumps(sed_json))
+    _write_archive(corpus / "b.omex", "{")
+    output = str(tmp_path / "results.jsonl")
+
+    assert run_batch(collect_archives(str(corpus)), output, False, SED_MODE, jobs=2) == 2
+
+    _write_archive(corpus / "c.omex", json.dumps(sed_json))
+    assert run_batch(collect_archives(str(corpus / "*.omex")), output, False, SED_MODE) == 1
+
+    with Path(output).open("r") as results:
+        lines = [json.loads(line) for line in results]
+    statuses = {Path(line["archive"]).name: line["status"] for line in lines}
+    assert statuses == {"a.omex": "valid", "b.omex": "invalid", "c.omex": "valid"}
+    assert all(line["seconds"] >= 0 for line in lines)
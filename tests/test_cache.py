@@ -0,0 +1,125 @@
+import json
+import sqlite3
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+from zipfile import ZipFile
+
+import pytest
+
+from sed_tooling.sed_converter import cache as cache_module
+from sed_tooling.sed_converter import sed_core as sed_core_module
+from sed_tooling.sed_converter.archive import OmexArchive
+from sed_tooling.sed_converter.cache import CACHE_FILE_NAME, CachedResult, ResultCache
+from sed_tooling.sed_converter.sed_core import SedCore, sed_schema_version
+from sed_tooling.sed_converter.sedml_core import SedMLCore
+from sed_tooling.sed_model.load_action import Load
+from sed_tooling.sed_model.sed_document import SedDocument
+
+
+def test_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = ResultCache(str(tmp_path), max_bytes=10)
+    cache.put("a", CachedResult("12345", None))
+    cache.put("b", CachedResult(None, "12345"))
+    assert cache.get("a") == CachedResult("12345", None)  # "a" is now the most recently used
+    cache.put("c", CachedResult("12345", None))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    cache.close()
+
+
+def test_sed_core_reuses_cached_results(tmp_path: Path, sed_json: dict[str, Any]) -> None:
+    archive_path = tmp_path / "test.omex"
+    with ZipFile(archive_path, "w") as omex:
+        omex.writestr("good.sed", json.dumps(sed_json))
+        omex.writestr("broken.sed", "{")
+    cache = ResultCache(str(tmp_path / "cache"))
+
+    for _ in range(2):
+        with OmexArchive(str(archive_path)) as archive:
+            sed_core = SedCore(sed_files=archive.sed_members, archive=archive, cache=cache)
+            sed_core.validate_all_files()
+        assert sed_core.parsed_files["good.sed"].metadata.name == "test"
+        assert sed_core.errors["broken.sed"].startswith("ValueError")
+
+    key = cache.key(sed_schema_version(), json.dumps(sed_json).encode())
+    cached = cache.get(key)
+    assert cached is not None
+    assert cached.document == sed_core.parsed_files["good.sed"].model_dump_json()
+    cache.close()
+
+
+def test_cache_hits_are_not_validated_again(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, sbml_sed_json: dict[str, Any]
+) -> None:
+    archive_path = tmp_path / "test.omex"
+    with ZipFile(archive_path, "w") as omex:
+        omex.writestr("good.sed", json.dumps(sbml_sed_json))
+    cache = ResultCache(str(tmp_path / "cache"))
+    validated: dict[str, SedDocument] = {}
+    for run in range(2):
+        with OmexArchive(str(archive_path)) as archive:
+            sed_core = SedCore(sed_files=archive.sed_members, archive=archive, cache=cache)
+            sed_core.validate_all_files()
+        validated[f"run{run}"] = sed_core.parsed_files["good.sed"]
+        # Any validation on the second run fails it
+        monkeypatch.setattr(sed_core_module, "get_correct_doc_json", None)
+    cache.close()
+
+    assert validated["run1"] == validated["run0"]
+    assert type(validated["run1"]) is type(validated["run0"])
+    assert isinstance(validated["run1"].actions[0], Load)
+    assert validated["run1"].resolve("#model0").type == "Model<sbml::SBMLFile>"
+
+
+def test_cache_hits_are_recorded_in_batches(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    cache = ResultCache(str(tmp_path))
+    cache.put("a", CachedResult("12345", None))
+    database = sqlite3.connect(str(tmp_path / CACHE_FILE_NAME))
+    stored = database.execute("SELECT last_used FROM results").fetchone()[0]
+
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(time=lambda: stored + 60))
+    assert cache.get("a") is not None
+    assert database.execute("SELECT last_used FROM results").fetchone()[0] == stored
+    cache.flush()
+    assert database.execute("SELECT last_used FROM results").fetchone()[0] == stored + 60
+    database.close()
+    cache.close()
+
+
+def test_cached_errors_name_the_file_they_are_read_for(tmp_path: Path) -> None:
+    archive_path = tmp_path / "test.omex"
+    with ZipFile(archive_path, "w") as omex:
+        omex.writestr("a.sedml", "<sedML/>")
+        omex.writestr("b.sedml", "<sedML/>")
+    cache = ResultCache(str(tmp_path / "cache"))
+
+    for _ in range(2):
+        with OmexArchive(str(archive_path)) as archive:
+            sedml_core = SedMLCore(archive.sedml_members, archive=archive, cache=cache)
+            sedml_core.validate_all_files()
+        assert "SedML@a.sedml" in sedml_core.errors["a.sedml"]
+        assert "SedML@b.sedml" in sedml_core.errors["b.sedml"]
+    cache.close()
+
+
+def test_damaged_entries_are_validated_again(tmp_path: Path, sed_json: dict[str, Any]) -> None:
+    archive_path = tmp_path / "test.omex"
+    with ZipFile(archive_path, "w") as omex:
+        omex.writestr("good.sed", json.dumps(sed_json))
+    cache = ResultCache(str(tmp_path / "cache"))
+    key = cache.key(sed_schema_version(), json.dumps(sed_json).encode())
+    cache.put(key, CachedResult('{"metadata": {}}', None))
+
+    with OmexArchive(str(archive_path)) as archive:
+        sed_core = SedCore(sed_files=archive.sed_members, archive=archive, cache=cache)
+        sed_core.validate_all_files()
+
+    assert sed_core.parsed_files["good.sed"].metadata.name == "test"
+    cached = cache.get(key)
+    assert cached is not None
+    assert cached.document == sed_core.parsed_files["good.sed"].model_dump_json()
+    cache.close()
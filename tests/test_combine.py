@@ -0,0 +1,80 @@
+from pathlib import Path
+from typing import Any, Callable
+from zipfile import ZipFile
+
+import libsedml  # type: ignore
+import pytest
+
+from sed_tooling.sed_converter.archive import OmexArchive
+from sed_tooling.sed_converter.sed_core import combine_sed_documents
+from sed_tooling.sed_converter.sedml_core import SedMLCore
+from sed_tooling.sed_model.load_action import Load
+from sed_tooling.sed_model.sed_document import get_correct_doc
+
+
+def test_shared_models_are_loaded_once_and_collisions_renamed(
+    sbml_sed_json: dict[str, Any],
+) -> None:
+    first = get_correct_doc(sbml_sed_json)
+    second = sbml_sed_json
+    second["dependencies"][0]["identifier"] = "dep_other"
+    second["declarations"]["variables"] = [
+        {"name": "same model", "identifier": "other", "type": "Model<sbml::SBMLFile>"}
+    ]
+    second["actions"][0].update(identifier="load_other", source="#dep_other", target="#other")
+    second["declarations"]["constants"] = [
+        {"name": "steps", "identifier": "model0", "type": "core::int", "value": "1"}
+    ]
+    second["outputs"] = [
+        {"name": "report", "identifier": "report0", "type": "output::csv", "interval": "#model0"}
+    ]
+
+    combined = combine_sed_documents([first, get_correct_doc(second)], "both")
+
+    assert combined.metadata.name == "both"
+    assert [d.identifier for d in combined.dependencies] == ["dep_model0"]
+    assert [a.identifier for a in combined.actions if isinstance(a, Load)] == ["load_model0"]
+    assert [v.identifier for v in combined.declarations.variables] == ["model0"]
+    assert [c.identifier for c in combined.declarations.constants] == ["model0_2"]
+    assert combined.outputs is not None
+    assert [(o.identifier, o.interval) for o in combined.outputs] == [("report0", "#model0_2")]
+    assert combined.check_references().ok
+
+
+def _sedml(
+    add_basic_task: Callable[[libsedml.SedDocument, int], str], *sources: str, first: int = 0
+) -> bytes:
+    doc = libsedml.SedDocument(1, 4)
+    for index, source in enumerate(sources, first):
+        add_basic_task(doc, index)
+        doc.getModel(index - first).setSource(source)
+    return libsedml.writeSedMLToString(doc).encode()
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_converted_documents_share_dependencies_by_source(
+    tmp_path: Path, jobs: int, add_basic_task: Callable[[libsedml.SedDocument, int], str]
+) -> None:
+    archive_path = tmp_path / "test.omex"
+    with ZipFile(archive_path, "w") as omex:
+        omex.writestr("model.xml", "<sbml/>")
+        omex.writestr("other.xml", "<sbml/>")
+        omex.writestr("a.sedml", _sedml(add_basic_task, "model.xml"))
+        omex.writestr("b.sedml", _sedml(add_basic_task, "model.xml", "model.xml", first=1))
+        omex.writestr("c.sedml", _sedml(add_basic_task, "other.xml", "model.xml"))
+
+    with OmexArchive(str(archive_path)) as archive:
+        core = SedMLCore(archive.sedml_members, archive=archive, jobs=jobs)
+        a, b, c = core.convert_all_to_sed()
+
+    assert len(b.dependencies) == 1
+    assert b.dependencies[0] is a.dependencies[0]
+    assert [load.source for load in b.actions if isinstance(load, Load)] == ["#dep_model0"] * 2
+    # `dep_model0` already names the dependency on other.xml in the third document
+    assert [d.identifier for d in c.dependencies] == ["dep_model0", "dep_model1"]
+    assert [load.source for load in c.actions if isinstance(load, Load)] == [
+        "#dep_model0",
+        "#dep_model1",
+    ]
+    assert b.check_references().ok
+    assert c.check_references().ok
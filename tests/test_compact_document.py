@@ -0,0 +1,43 @@
+from typing import Any
+
+import pytest
+
+from sed_tooling.sed_model.compact_document import CompactDocument
+from sed_tooling.sed_model.sed_document import SedDocument, get_correct_doc
+
+
+@pytest.fixture
+def document(sbml_sed_json: dict[str, Any]) -> SedDocument:
+    sbml_sed_json["declarations"]["constants"] = [
+        {"name": "c", "identifier": "c0", "type": "sed::float", "value": "1.5"}
+    ]
+    sbml_sed_json["declarations"]["variables"] += [
+        {"name": f"v{i}", "identifier": f"v{i}", "type": "sed::float"} for i in range(5)
+    ]
+    sbml_sed_json["actions"] += [{"name": "run", "identifier": "run0", "type": "sim::run"}]
+    sbml_sed_json["outputs"] = [
+        {"name": "report", "identifier": "report0", "type": "output::csv", "interval": 1}
+    ]
+    sbml_sed_json["inputs"] = [
+        {"name": "in", "identifier": "in0", "type": "sed::float", "target": "#c0"}
+    ]
+    return get_correct_doc(sbml_sed_json)
+
+
+def test_compact_document_round_trips(document: SedDocument) -> None:
+    compact = CompactDocument(document)
+
+    restored = compact.to_document()
+    assert type(restored) is type(document)
+    assert restored == document
+    assert restored.model_dump_json() == document.model_dump_json()
+    assert restored.resolve("#model0").name == "model 0"
+    assert compact.outputs is not None
+    assert len(compact.outputs) == 1
+
+
+def test_compact_document_stores_repeated_types_once(document: SedDocument) -> None:
+    compact = CompactDocument(document)
+    assert compact.variables.column("type") == ["Model<sbml::SBMLFile>"] + ["sed::float"] * 5
+    assert len(set(compact.variables.columns["type"])) == 2
+    assert compact.strings.strings.count("sed::float") == 1
@@ -0,0 +1,123 @@
+from pathlib import Path
+
+import libsedml  # type: ignore
+import numpy as np
+import pytest
+
+from sed_tooling.sed_converter.data_generators import (
+    CompiledDataGenerator,
+    DataGeneratorEngine,
+    load_results,
+)
+
+MATHML_DOCUMENT = """<?xml version="1.0" encoding="UTF-8"?>
+<sedML xmlns="http://sed-ml.org/sed-ml/level1/version4" level="1" version="4">
+  <listOfDataGenerators>
+    <dataGenerator id="squared">
+      <listOfVariables><variable id="S1" symbol="urn:sedml:symbol:time"/></listOfVariables>
+      <math xmlns="http://www.w3.org/1998/Math/MathML">
+        <apply><power/><ci>S1</ci><cn>2</cn></apply>
+      </math>
+    </dataGenerator>
+    <dataGenerator id="empty_sum">
+      <listOfVariables><variable id="S1" symbol="urn:sedml:symbol:time"/></listOfVariables>
+      <math xmlns="http://www.w3.org/1998/Math/MathML">
+        <apply><plus/></apply>
+      </math>
+    </dataGenerator>
+    <dataGenerator id="empty_product">
+      <listOfVariables><variable id="S1" symbol="urn:sedml:symbol:time"/></listOfVariables>
+      <math xmlns="http://www.w3.org/1998/Math/MathML">
+        <apply><times/></apply>
+      </math>
+    </dataGenerator>
+  </listOfDataGenerators>
+</sedML>
+"""
+
+
+def _data_generator(
+    doc: libsedml.SedDocument,
+    identifier: str,
+    math: str,
+    variables: list[str],
+    **parameters: float
+) -> libsedml.SedDataGenerator:
+    data_gen = doc.createDataGenerator()
+    data_gen.setId(identifier)
+    for variable_id in variables:
+        data_gen.createVariable().setId(variable_id)
+    for parameter_id, value in parameters.items():
+        parameter = data_gen.createParameter()
+        parameter.setId(parameter_id)
+        parameter.setValue(value)
+    data_gen.setMath(libsedml.parseL3Formula(math))
+    return data_gen
+
+
+def test_generators_evaluate_csv_and_npz_results(tmp_path: Path) -> None:
+    time = np.linspace(0, 10, 1001)
+    species = np.exp(-time)
+    np.savez(tmp_path / "results.npz", time=time, S1=species)
+    np.savetxt(
+        tmp_path / "results.csv",
+        np.column_stack([time, species]),
+        delimiter=",",
+        header="time,S1",
+        comments="",
+    )
+    doc = libsedml.SedDocument(1, 4)
+    engine = DataGeneratorEngine(
+        [
+            _data_generator(doc, "scaled", "k * S1 / 2 ^ 2", ["S1"], k=8.0),
+            _data_generator(doc, "clipped", "piecewise(S1, time < 5, 0)", ["time", "S1"]),
+            _data_generator(doc, "log_ratio", "log(10, S1) - ln(S1) / ln(10)", ["S1"]),
+            _data_generator(doc, "constant", "pi", ["time"]),
+        ]
+    )
+
+    for results in (
+        load_results(tmp_path / "results.npz"),
+        load_results(tmp_path / "results.csv"),
+    ):
+        values = engine.evaluate(results)
+        np.testing.assert_allclose(values["scaled"], 2 * species)
+        np.testing.assert_allclose(values["clipped"], np.where(time < 5, species, 0))
+        np.testing.assert_allclose(values["log_ratio"], 0, atol=1e-12)
+        np.testing.assert_allclose(values["constant"], np.full(time.shape, np.pi))
+
+        chunks = list(engine.evaluate_chunks(results, 300))
+        assert len(chunks) == 4
+        for identifier, value in values.items():
+            np.testing.assert_allclose(np.concatenate([c[identifier] for c in chunks]), value)
+
+
+def test_aggregates_and_unknown_symbols() -> None:
+    doc = libsedml.SedDocument(1, 4)
+    normalized = CompiledDataGenerator(_data_generator(doc, "norm", "S1 / max(S1)", ["S1"]))
+    results = {"S1": np.array([1.0, 4.0, 2.0])}
+
+    np.testing.assert_allclose(normalized.evaluate(results), [0.25, 1.0, 0.5])
+    with pytest.raises(ValueError, match="can't be chunked"):
+        list(normalized.evaluate_chunks(results, 2))
+    with pytest.raises(ValueError, match="neither a variable nor a parameter"):
+        CompiledDataGenerator(_data_generator(doc, "bad", "S1 * S2", ["S1"]))
+
+
+def test_mathml_read_from_a_document() -> None:
+    doc = libsedml.readSedMLFromString(MATHML_DOCUMENT)
+    engine = DataGeneratorEngine(
+        doc.getDataGenerator(i) for i in range(doc.getNumDataGenerators())
+    )
+    results = {"S1": np.array([1.0, 2.0, 3.0])}
+
+    values = engine.evaluate(results)
+    np.testing.assert_allclose(values["squared"], [1.0, 4.0, 9.0])
+    np.testing.assert_allclose(values["empty_sum"], [0.0, 0.0, 0.0])
+    np.testing.assert_allclose(values["empty_product"], [1.0, 1.0, 1.0])
+
+    written = libsedml.SedDocument(1, 4)
+    _data_generator(written, "cubed", "S1 ^ 3", ["S1"])
+    read_back = libsedml.readSedMLFromString(libsedml.writeSedMLToString(written))
+    cubed = CompiledDataGenerator(read_back.getDataGenerator(0))
+    np.testing.assert_allclose(cubed.evaluate(results), [1.0, 8.0, 27.0])
@@ -0,0 +1,65 @@
+import pytest
+
+from sed_tooling.sed_model.action import Action
+from sed_tooling.sed_model.declarations import Declarations
+from sed_tooling.sed_model.dependency import Dependency
+from sed_tooling.sed_model.identifier_index import DanglingReference
+from sed_tooling.sed_model.input import Input
+from sed_tooling.sed_model.load_action import Load
+from sed_tooling.sed_model.metadata import Metadata
+from sed_tooling.sed_model.sed_document import SedDocument
+from sed_tooling.sed_model.variable import Variable
+
+
+def _document() -> SedDocument:
+    return SedDocument(
+        metadata=Metadata(name="test", level=1, version=1, ontologies=["sed"]),
+        dependencies=[
+            Dependency(name="dep", identifier="dep", type="sbml::SBMLFile", source="model")
+        ],
+        declarations=Declarations(
+            constants=[],
+            variables=[Variable(name="model", identifier="model", type="Model<sbml::SBMLFile>")],
+        ),
+        actions=[
+            Load(
+                name="load",
+                identifier="load",
+                type="sbml::load_sbml",
+                source="#dep",
+                target="#model",
+            )
+        ],
+        inputs=[Input(name="in", identifier="in", type="org::input", target="#missing")],
+    )
+
+
+def test_resolve_and_check_references() -> None:
+    doc = _document()
+    assert doc.resolve("#dep") is doc.dependencies[0]
+    assert doc.resolve("model") is doc.declarations.variables[0]
+    with pytest.raises(KeyError):
+        doc.resolve("#missing")
+
+    report = doc.check_references()
+    assert report.dangling == [DanglingReference("in", "target", "#missing")]
+    assert report.duplicates == {}
+    assert not report.ok
+
+
+def test_index_follows_document_changes() -> None:
+    doc = _document()
+    assert doc.check_references().dangling
+
+    doc.declarations.variables.append(Variable(name="x", identifier="missing", type="a::b"))
+    assert doc.check_references().ok
+
+    doc.actions = [Action(name="dup", identifier="dep", type="org::action")]
+    assert doc.resolve("#dep") is doc.dependencies[0]
+    assert doc.check_references().duplicates == {"dep": 2}
+
+
+def test_load_actions_survive_json_round_trip() -> None:
+    doc = _document()
+    doc.resolve("#dep")  # building the index must not affect equality
+    assert SedDocument.model_validate_json(doc.model_dump_json()) == doc
@@ -0,0 +1,39 @@
+import subprocess
+import sys
+
+# Generous, so only a heavy new import (such as libsedml) on the Sed path trips it
+SED_IMPORT_BUDGET_SECONDS = 1.0
+SED_STARTUP = (
+    "from sed_tooling.sed_converter.core import SED_MODE, load_backend; load_backend(SED_MODE)"
+)
+
+
+def import_times(code: str) -> dict[str, int]:
+    """
+    Cumulative import time, in microseconds, of every module `code` imports
+    """
+    stderr: str = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    times: dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:") :].split("|")
+        times[module[1:].rstrip()] = int(cumulative)
+    return times
+
+
+def test_sed_startup_skips_libsedml_and_stays_in_budget() -> None:
+    times = import_times(SED_STARTUP)
+    modules = {module.strip() for module in times}
+    # importlib.import_module is not itself logged, but what the backend imports is
+    assert "sed_tooling.sed_model.sed_document" in modules
+    assert not {module for module in modules if module.split(".")[0] == "libsedml"}
+    assert "sed_tooling.sed_converter.sedml_document" not in modules
+    # Top-level imports have no indentation, and their times include everything below them
+    total = sum(time for module, time in times.items() if not module.startswith(" "))
+    assert total < SED_IMPORT_BUDGET_SECONDS * 1_000_000
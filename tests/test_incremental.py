@@ -0,0 +1,126 @@
+import json
+import re
+from pathlib import Path
+from typing import Any, Callable
+from zipfile import ZipFile
+
+import libsedml  # type: ignore
+import pytest
+
+from sed_tooling.sed_converter.core import SED_MODE, SEDML_MODE, setup
+from sed_tooling.sed_converter.incremental import state_path
+
+
+def _write_archive(path: Path, document: dict[str, Any], model1: str) -> None:
+    contents = json.dumps(document)
+    with ZipFile(path, "w") as omex:
+        omex.writestr("models/model0.xml", "<sbml/>")
+        omex.writestr("models/model1.xml", model1)
+        omex.writestr("a.sed", contents)
+        omex.writestr("b.sed", "{")
+        omex.writestr("c.sed", contents.replace("model0.xml", "model1.xml"))
+
+
+def _validated(capsys: pytest.CaptureFixture[str]) -> list[str]:
+    return re.findall(r"^parsing (\S+):", capsys.readouterr().out, re.MULTILINE)
+
+
+def test_incremental_runs_only_revalidate_what_changed(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], sbml_sed_json: dict[str, Any]
+) -> None:
+    archive = tmp_path / "test.omex"
+    _write_archive(archive, sbml_sed_json, "<sbml/>")
+    assert list(setup(str(archive), False, SED_MODE, incremental=True)) == ["b.sed"]
+    assert _validated(capsys) == ["a.sed", "b.sed", "c.sed"]
+    assert state_path(archive).is_file()
+
+    assert list(setup(str(archive), False, SED_MODE, incremental=True)) == ["b.sed"]
+    assert _validated(capsys) == []
+
+    # c.sed loads model1.xml; b.sed never parsed, so any change outside the documents counts
+    _write_archive(archive, sbml_sed_json, "<sbml><model/></sbml>")
+    assert list(setup(str(archive), False, SED_MODE, incremental=True)) == ["b.sed"]
+    assert _validated(capsys) == ["b.sed", "c.sed"]
+
+
+def test_state_that_can_not_be_saved_only_warns(
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+    monkeypatch: pytest.MonkeyPatch,
+    sbml_sed_json: dict[str, Any],
+) -> None:
+    def read_only(_: Path, __: str) -> int:
+        raise PermissionError("read-only file system")
+
+    archive = tmp_path / "test.omex"
+    _write_archive(archive, sbml_sed_json, "<sbml/>")
+    monkeypatch.setattr(Path, "write_text", read_only)
+
+    assert list(setup(str(archive), False, SED_MODE, incremental=True)) == ["b.sed"]
+    assert "Could not save the incremental state" in capsys.readouterr().out
+    assert not state_path(archive).exists()
+
+
+def test_documents_missing_a_model_are_validated_again_once_it_is_added(
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+    add_basic_task: Callable[[libsedml.SedDocument, int], str],
+) -> None:
+    doc = libsedml.SedDocument(1, 4)
+    add_basic_task(doc, 0)
+    archive = tmp_path / "test.omex"
+    with ZipFile(archive, "w") as omex:
+        omex.writestr("a.sedml", libsedml.writeSedMLToString(doc))
+    errors = setup(str(archive), False, SEDML_MODE, incremental=True)
+    assert "`model0.xml`" in errors["a.sedml"]
+    assert list(setup(str(archive), False, SEDML_MODE, incremental=True)) == ["a.sedml"]
+    assert _validated(capsys) == ["a.sedml"]
+
+    with ZipFile(archive, "a") as omex:
+        omex.writestr("model0.xml", "<sbml/>")
+    assert setup(str(archive), False, SEDML_MODE, incremental=True) == {}
+    assert _validated(capsys) == ["a.sedml"]
+
+
+def test_only_sources_of_the_chosen_outputs_are_dependencies(
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+    add_basic_task: Callable[[libsedml.SedDocument, int], str],
+) -> None:
+    doc = libsedml.SedDocument(1, 4)
+    add_basic_task(doc, 0)
+    data_gen = doc.createDataGenerator()
+    data_gen.setId("dg1")
+    variable = data_gen.createVariable()
+    variable.setId("time1")
+    variable.setTaskReference(add_basic_task(doc, 1))
+    variable.setSymbol("urn:sedml:symbol:time")
+    data_gen.setMath(libsedml.parseL3Formula("time1"))
+    report = doc.createReport()
+    report.setId("report1")
+    data_set = report.createDataSet()
+    data_set.setId("ds1")
+    data_set.setLabel("time")
+    data_set.setDataReference("dg1")
+    archive = tmp_path / "test.omex"
+    with ZipFile(archive, "w") as omex:
+        omex.writestr("a.sedml", libsedml.writeSedMLToString(doc))
+
+    def run() -> dict[str, str]:
+        return setup(str(archive), False, SEDML_MODE, incremental=True, outputs=["report1"])
+
+    error: str = run()["a.sedml"]
+    assert "`model1.xml`" in error
+    assert "`model0.xml`" not in error
+    assert _validated(capsys) == ["a.sedml"]
+
+    # model0 is pruned away: adding it changes nothing the result depends on
+    with ZipFile(archive, "a") as omex:
+        omex.writestr("model0.xml", "<sbml/>")
+    assert list(run()) == ["a.sedml"]
+    assert _validated(capsys) == []
+
+    with ZipFile(archive, "a") as omex:
+        omex.writestr("model1.xml", "<sbml/>")
+    assert run() == {}
+    assert _validated(capsys) == ["a.sedml"]
@@ -0,0 +1,124 @@
+import json
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Any
+from zipfile import ZIP_DEFLATED, ZipFile
+
+import pytest
+
+from sed_tooling.sed_converter import sed_core, sedml_core
+from sed_tooling.sed_converter.archive import OmexArchive, OmexWriter
+from sed_tooling.sed_converter.core import SED_MODE, SEDML_MODE, setup
+from sed_tooling.sed_converter.sed_core import SedCore
+from sed_tooling.sed_converter.sedml_writer import sedml_bytes
+from sed_tooling.sed_model.sed_document import get_correct_doc
+
+
+def _archive(path: Path, document: dict[str, Any], documents: int) -> str:
+    with ZipFile(path, "w", ZIP_DEFLATED) as omex:
+        for i in range(documents):
+            omex.writestr(f"doc{i}.sed", json.dumps(document))
+    return str(path)
+
+
+def _convertible_archive(path: Path, document: dict[str, Any], documents: int) -> str:
+    with ZipFile(path, "w", ZIP_DEFLATED) as omex:
+        omex.writestr("models/model0.xml", "<sbml/>")
+        for i in range(documents):
+            omex.writestr(f"doc{i}.sed", json.dumps(document))
+    return str(path)
+
+
+def _validation_peak(archive: str) -> int:
+    tracemalloc.start()
+    try:
+        assert setup(archive, False, SED_MODE) == {}
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_validation_memory_does_not_grow_with_the_number_of_documents(
+    tmp_path: Path, sbml_sed_json: dict[str, Any]
+) -> None:
+    sbml_sed_json["declarations"]["variables"] += [
+        {"name": f"v{i}", "identifier": f"v{i}", "type": "core::float"} for i in range(2000)
+    ]
+    few: int = _validation_peak(_archive(tmp_path / "few.omex", sbml_sed_json, 2))
+    many: int = _validation_peak(_archive(tmp_path / "many.omex", sbml_sed_json, 16))
+
+    # Keeping every parsed document alive would need about 8 times as much
+    assert many < 1.5 * few
+
+
+def _counting(monkeypatch: pytest.MonkeyPatch, module: Any, name: str) -> Counter[str]:
+    calls: Counter[str] = Counter()
+    original = getattr(module, name)
+
+    def counted(file: str, *args: Any, **kwargs: Any) -> Any:
+        calls[file] += 1
+        return original(file, *args, **kwargs)
+
+    monkeypatch.setattr(module, name, counted)
+    return calls
+
+
+def test_converting_parses_each_document_once(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, sbml_sed_json: dict[str, Any]
+) -> None:
+    sed_parses = _counting(monkeypatch, sed_core, "parse_sed_file")
+    assert (
+        setup(_convertible_archive(tmp_path / "sed.omex", sbml_sed_json, 3), True, SED_MODE) == {}
+    )
+    assert sed_parses == {f"doc{i}.sed": 1 for i in range(3)}
+
+    sedml_parses = _counting(monkeypatch, sedml_core, "parse_sedml_file")
+    archive_path = tmp_path / "sedml.omex"
+    with ZipFile(archive_path, "w") as omex:
+        omex.writestr("models/model0.xml", "<sbml/>")
+        for i in range(3):
+            omex.writestr(
+                f"doc{i}.sedml",
+                sedml_bytes(SedCore.convert_to_sedml(get_correct_doc(sbml_sed_json))),
+            )
+    assert setup(str(archive_path), True, SEDML_MODE) == {}
+    assert sedml_parses == {f"doc{i}.sedml": 1 for i in range(3)}
+
+
+def test_a_conversion_stopped_early_still_completes_the_archive(
+    tmp_path: Path, sbml_sed_json: dict[str, Any]
+) -> None:
+    archive_path = _convertible_archive(tmp_path / "test.omex", sbml_sed_json, 3)
+    output_path = tmp_path / "converted.omex"
+    with OmexArchive(archive_path) as archive:
+        sed_core_ = SedCore(sed_files=archive.sed_members, archive=archive)
+        results = sed_core_.iter_convert(str(output_path))
+        assert next(results).value == "doc0.sedml"
+        results.close()
+
+    with ZipFile(output_path) as converted:
+        assert converted.testzip() is None
+        assert sorted(converted.namelist()) == [
+            "doc0.sedml",
+            "doc1.sed",
+            "doc2.sed",
+            "models/model0.xml",
+        ]
+
+
+def test_a_failed_conversion_leaves_no_partial_archive(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, sbml_sed_json: dict[str, Any]
+) -> None:
+    archive_path = _convertible_archive(tmp_path / "test.omex", sbml_sed_json, 3)
+    output_path = tmp_path / "converted.omex"
+
+    def full_disk(*_: Any) -> None:
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(OmexWriter, "write", full_disk)
+    with OmexArchive(archive_path) as archive:
+        sed_core_ = SedCore(sed_files=archive.sed_members, archive=archive)
+        with pytest.raises(OSError, match="No space left"):
+            sed_core_.convert_all(str(output_path))
+    assert not output_path.exists()
@@ -0,0 +1,107 @@
+from pathlib import Path
+from typing import Callable
+from zipfile import ZipFile
+
+import libsedml  # type: ignore
+import pytest
+
+from sed_tooling.sed_converter.archive import OmexArchive
+from sed_tooling.sed_converter.cache import ResultCache
+from sed_tooling.sed_converter.core import SEDML_MODE, setup
+from sed_tooling.sed_converter.sedml_core import SedMLCore
+from sed_tooling.sed_converter.sedml_document import Pruning, SedMLDocument
+
+
+@pytest.fixture
+def two_report_document(add_basic_task: Callable[[libsedml.SedDocument, int], str]) -> bytes:
+    doc = libsedml.SedDocument(1, 4)
+    for index in range(2):
+        task_id = add_basic_task(doc, index)
+        data_gen = doc.createDataGenerator()
+        data_gen.setId(f"dg{index}")
+        variable = data_gen.createVariable()
+        variable.setId(f"time{index}")
+        variable.setTaskReference(task_id)
+        variable.setSymbol("urn:sedml:symbol:time")
+        data_gen.setMath(libsedml.parseL3Formula(f"time{index}"))
+        report = doc.createReport()
+        report.setId(f"report{index}")
+        data_set = report.createDataSet()
+        data_set.setId(f"ds{index}")
+        data_set.setLabel("time")
+        data_set.setDataReference(f"dg{index}")
+    return libsedml.writeSedMLToString(doc).encode()
+
+
+def test_only_what_chosen_outputs_reach_is_indexed(
+    tmp_path: Path, two_report_document: bytes
+) -> None:
+    contents = two_report_document
+
+    full = SedMLDocument("scan.sedml", contents)
+    pruned = SedMLDocument("scan.sedml", contents, output_ids={"report1"})
+
+    assert sorted(full.model_dict) == ["model0", "model1"]
+    assert sorted(pruned.model_dict) == ["model1"]
+    assert sorted(pruned.simulation_dict) == ["sim1"]
+    assert pruned.pruning == Pruning((1, 2), (1, 2), (1, 2), (1, 2), (1, 2), (1, 2))
+    converted = SedMLCore.convert_to_sed(pruned)
+    assert [variable.identifier for variable in converted.declarations.variables] == ["model1"]
+
+    archive_path = tmp_path / "scan.omex"
+    with ZipFile(archive_path, "w") as omex:
+        omex.writestr("scan.sedml", contents)
+        for index in range(2):
+            omex.writestr(f"model{index}.xml", "<sbml/>")
+    assert setup(str(archive_path), True, SEDML_MODE, outputs=["report1"]) == {}
+
+
+def test_outputs_missing_from_the_document_are_errors(
+    tmp_path: Path, two_report_document: bytes
+) -> None:
+    contents = two_report_document
+    with pytest.raises(ValueError, match="identified by `typo`"):
+        SedMLDocument("scan.sedml", contents, output_ids={"report1", "typo"})
+
+    archive_path = tmp_path / "scan.omex"
+    with ZipFile(archive_path, "w") as omex:
+        omex.writestr("scan.sedml", contents)
+    errors = setup(str(archive_path), False, SEDML_MODE, outputs=["typo"])
+    assert list(errors) == ["scan.sedml"]
+
+
+def test_pruning_is_reported_for_cached_results(
+    tmp_path: Path, two_report_document: bytes
+) -> None:
+    archive_path = tmp_path / "scan.omex"
+    with ZipFile(archive_path, "w") as omex:
+        omex.writestr("scan.sedml", two_report_document)
+        for index in range(2):
+            omex.writestr(f"model{index}.xml", "<sbml/>")
+    cache = ResultCache(str(tmp_path / "cache"))
+
+    pruning: list[Pruning] = []
+    for output_ids in (["report1"], ["report1"], ["report0", "report1"]):
+        with OmexArchive(str(archive_path)) as archive:
+            core = SedMLCore(
+                archive.sedml_members, archive=archive, cache=cache, output_ids=output_ids
+            )
+            assert [result.error for result in core.iter_validate()] == [None]
+        pruning.append(core.pruning["scan.sedml"])
+    cache.close()
+
+    assert pruning[0] == pruning[1] == Pruning((1, 2), (1, 2), (1, 2), (1, 2), (1, 2), (1, 2))
+    assert pruning[2] == Pruning((2, 2), (2, 2), (2, 2), (2, 2), (2, 2), (2, 2))
+
+
+def test_only_sources_of_the_chosen_outputs_must_be_in_the_archive(
+    tmp_path: Path, two_report_document: bytes
+) -> None:
+    archive_path = tmp_path / "scan.omex"
+    with ZipFile(archive_path, "w") as omex:
+        omex.writestr("scan.sedml", two_report_document)
+        omex.writestr("model1.xml", "<sbml/>")
+
+    assert setup(str(archive_path), False, SEDML_MODE, outputs=["report1"]) == {}
+    errors = setup(str(archive_path), False, SEDML_MODE, outputs=["report0"])
+    assert "`model0.xml`" in errors["scan.sedml"]
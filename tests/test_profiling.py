@@ -0,0 +1,43 @@
+import json
+from pathlib import Path
+from typing import Any
+from zipfile import ZipFile
+
+from sed_tooling.sed_converter.core import SED_MODE, profile_setup
+from sed_tooling.sed_converter.profiling import Profiler, SpanRecord, span
+
+
+def test_nested_spans_inherit_file_and_call_hooks() -> None:
+    finished: list[SpanRecord] = []
+    with Profiler(hooks=[finished.append]) as profiler:
+        with span("outer", "a.sed"):
+            with span("inner"):
+                data = [0] * 100_000
+            del data
+    with span("ignored"):  # no profiler active
+        pass
+
+    assert [(r.name, r.file, r.depth) for r in finished] == [
+        ("inner", "a.sed", 1),
+        ("outer", "a.sed", 0),
+    ]
+    inner_peak, outer_peak = finished[0].peak_bytes, finished[1].peak_bytes
+    assert inner_peak is not None
+    assert outer_peak is not None
+    assert inner_peak >= 800_000
+    assert outer_peak >= inner_peak
+    assert set(profiler.report()["files"]["a.sed"]["spans"]) == {"outer", "inner"}
+
+
+def test_profile_setup_reports_each_file(tmp_path: Path, sed_json: dict[str, Any]) -> None:
+    archive_path = tmp_path / "test.omex"
+    with ZipFile(archive_path, "w") as omex:
+        omex.writestr("a.sed", json.dumps(sed_json))
+        omex.writestr("b.sed", "{")
+    report = profile_setup(str(archive_path), False, SED_MODE)
+
+    assert set(report["errors"]) == {"b.sed"}
+    assert set(report["files"]) == {"a.sed", "b.sed"}
+    assert {"archive.read", "sed.validate"} <= set(report["files"]["a.sed"]["spans"])
+    assert report["spans"][0]["name"] == "setup"
+    json.dumps(report)
@@ -0,0 +1,88 @@
+from typing import Callable
+
+import libsedml  # type: ignore
+import numpy as np
+import pytest
+
+from sed_tooling.sed_converter.repeated_tasks import RangeScan
+
+
+def _add_scan(
+    doc: libsedml.SedDocument, task_id: str, subtask_ids: list[str], steps: int
+) -> libsedml.SedRepeatedTask:
+    repeated = doc.createRepeatedTask()
+    repeated.setId(task_id)
+    uniform = repeated.createUniformRange()
+    uniform.setId(f"{task_id}_range")
+    uniform.setStart(0)
+    uniform.setEnd(steps)
+    uniform.setNumberOfSteps(steps)
+    uniform.setType("linear")
+    repeated.setRangeId(f"{task_id}_range")
+    for order, subtask_id in enumerate(subtask_ids):
+        subtask = repeated.createSubTask()
+        subtask.setTask(subtask_id)
+        subtask.setOrder(order)
+    return repeated
+
+
+def test_nested_scan_points_run_in_order(
+    add_basic_task: Callable[[libsedml.SedDocument, int], str],
+) -> None:
+    doc = libsedml.SedDocument(1, 4)
+    task0, task1 = add_basic_task(doc, 0), add_basic_task(doc, 1)
+    inner = doc.createRepeatedTask()
+    inner.setId("inner")
+    vector = inner.createVectorRange()
+    vector.setId("v")
+    vector.setValues([1.0, 2.0, 3.0])
+    functional = inner.createFunctionalRange()
+    functional.setId("f")
+    functional.setRange("v")
+    functional.setMath(libsedml.parseL3Formula("2 * v"))
+    inner.setRangeId("v")
+    set_value = inner.createTaskChange()
+    set_value.setModelReference("model0")
+    set_value.setTarget("k")
+    set_value.setRange("v")
+    set_value.setMath(libsedml.parseL3Formula("v * 10"))
+    inner.createSubTask().setTask(task0)
+    _add_scan(doc, "outer", ["inner", task1], 1)
+
+    scan = RangeScan(doc, "outer")
+    block = scan.block(0, scan.count)
+
+    assert scan.count == 8
+    assert [scan.leaf_tasks[leaf] for leaf in block.leaves] == (["task0"] * 3 + ["task1"]) * 2
+    np.testing.assert_array_equal(block.ranges["outer_range"], [0, 0, 0, 0, 1, 1, 1, 1])
+    np.testing.assert_array_equal(block.ranges["f"], [2, 4, 6, np.nan] * 2)
+    np.testing.assert_array_equal(block.changes[("model0", "k")], [10, 20, 30, np.nan] * 2)
+    chunks = list(scan.iter_blocks(3))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 2]
+    np.testing.assert_array_equal(
+        np.concatenate([c.ranges["v"] for c in chunks]), block.ranges["v"]
+    )
+
+
+def test_huge_scans_are_counted_without_enumerating(
+    add_basic_task: Callable[[libsedml.SedDocument, int], str],
+) -> None:
+    doc = libsedml.SedDocument(1, 4)
+    top = add_basic_task(doc, 0)
+    for level in range(4):
+        top = _add_scan(doc, f"scan{level}", [top], 999).getId()
+
+    scan = RangeScan(doc, top)
+    last = scan.block(scan.count - 2, scan.count)
+
+    assert scan.count == 1000**4
+    for level in range(4):
+        np.testing.assert_array_equal(last.ranges[f"scan{level}_range"], [999 - (level == 0), 999])
+
+
+def test_cycles_are_rejected() -> None:
+    doc = libsedml.SedDocument(1, 4)
+    _add_scan(doc, "a", ["b"], 1)
+    _add_scan(doc, "b", ["a"], 1)
+    with pytest.raises(ValueError, match="cycle"):
+        RangeScan(doc, "a")
@@ -0,0 +1,90 @@
+import json
+from pathlib import Path
+from typing import Any
+from zipfile import ZIP_DEFLATED, ZipFile
+
+import pytest
+
+from sed_tooling.sed_converter.archive import OmexArchive
+from sed_tooling.sed_converter.core import SED_MODE, DocumentCore, setup
+from sed_tooling.sed_converter.sed_core import SedCore
+from sed_tooling.sed_converter.sedml_core import SedMLCore
+from sed_tooling.sed_converter.sedml_document import SedMLDocument
+from sed_tooling.sed_model.sed_document import get_correct_doc
+
+REPORT = {"name": "report", "identifier": "report0", "type": "output::csv", "interval": 1}
+MANIFEST = """<?xml version="1.0" encoding="UTF-8"?>
+<omexManifest xmlns="http://identifiers.org/combine.specifications/omex-manifest">
+  <content location="./models/model0.xml" format="http://identifiers.org/combine.specifications/sbml"/>
+  <content location="./simulation.sed" format="application/json"/>
+</omexManifest>
+"""
+
+
+def test_sed_archive_is_converted_into_a_new_archive(
+    tmp_path: Path, sbml_sed_json: dict[str, Any]
+) -> None:
+    archive_path = tmp_path / "test.omex"
+    with ZipFile(archive_path, "w", ZIP_DEFLATED) as omex:
+        omex.writestr("manifest.xml", MANIFEST)
+        omex.writestr("models/model0.xml", "<sbml/>" * 1000)
+        omex.writestr("simulation.sed", json.dumps(sbml_sed_json))
+        omex.writestr("broken.sed", "{")
+        omex.writestr("report.sed", json.dumps({**sbml_sed_json, "outputs": [REPORT]}))
+    output_path = tmp_path / "converted.omex"
+
+    errors = setup(str(archive_path), True, SED_MODE, output_location=str(output_path))
+
+    assert sorted(errors) == ["broken.sed", "report.sed"]
+    # Outputs name no data, so converting them would only drop what they report
+    assert errors["report.sed"].startswith("ValueError")
+    assert "output `report0`" in errors["report.sed"]
+    with ZipFile(archive_path) as source, ZipFile(output_path) as converted:
+        assert converted.testzip() is None
+        assert sorted(converted.namelist()) == [
+            "broken.sed",
+            "manifest.xml",
+            "models/model0.xml",
+            "report.sed",
+            "simulation.sedml",
+        ]
+        # Unchanged members keep their compressed bytes
+        for member in ("models/model0.xml", "broken.sed"):
+            assert converted.getinfo(member).CRC == source.getinfo(member).CRC
+            assert converted.getinfo(member).compress_size == source.getinfo(member).compress_size
+        assert b'location="./simulation.sedml"' in converted.read("manifest.xml")
+        sedml_bytes = converted.read("simulation.sedml")
+
+    sed_doc = SedMLCore.convert_to_sed(SedMLDocument("simulation.sedml", sedml_bytes))
+    assert [dependency.source for dependency in sed_doc.dependencies] == ["models/model0.xml"]
+    assert sed_doc.resolve("#model0").type == "Model<sbml::SBMLFile>"
+
+
+def test_only_sed_archives_are_converted_into_an_output_archive(
+    tmp_path: Path, sbml_sed_json: dict[str, Any]
+) -> None:
+    archive_path = tmp_path / "test.omex"
+    with ZipFile(archive_path, "w") as omex:
+        omex.writestr("models/model0.xml", "<sbml/>")
+        omex.writestr("simulation.sed", json.dumps(sbml_sed_json))
+
+    with OmexArchive(str(archive_path)) as archive:
+        sed_core: DocumentCore = SedCore(archive.sed_members, archive=archive)
+        sed_core.convert_all()
+        sedml_core: DocumentCore = SedMLCore(archive.sedml_members, archive=archive)
+        with pytest.raises(ValueError, match="only converted in memory"):
+            sedml_core.convert_all(str(tmp_path / "converted.omex"))
+
+    with ZipFile(tmp_path / "test_sedml.omex") as converted:
+        assert sorted(converted.namelist()) == ["models/model0.xml", "simulation.sedml"]
+    assert not (tmp_path / "converted.omex").exists()
+
+
+def test_what_sedml_can_not_express_is_refused(sbml_sed_json: dict[str, Any]) -> None:
+    with_report = get_correct_doc({**sbml_sed_json, "outputs": [REPORT]})
+    with pytest.raises(ValueError, match="Only SBML model loads"):
+        SedCore.convert_to_sedml(with_report)
+
+    sbml_sed_json["metadata"]["ontologies"].append("pe")
+    with pytest.raises(ValueError, match="ontologies that can not currently be converted"):
+        SedCore.convert_to_sedml(get_correct_doc(sbml_sed_json))
@@ -1,3 +1,8 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
 from sed_tooling.sed_model.action import Action
 from sed_tooling.sed_model.constant import Constant
 from sed_tooling.sed_model.declarations import Declarations
@@ -6,7 +11,12 @@ from sed_tooling.sed_model.dependency import Dependency
 from sed_tooling.sed_model.input import Input
 from sed_tooling.sed_model.output import Output
 from sed_tooling.sed_model.metadata import Metadata
-from sed_tooling.sed_model.sed_document import SedDocument
+from sed_tooling.sed_model.sed_document import (
+    SedDocument,
+    SedDocumentL1V1,
+    get_correct_doc,
+    get_correct_doc_json,
+)
 
 
 def test_create() -> None:
@@ -57,3 +67,56 @@ def test_create() -> None:
 
     doc2: SedDocument = SedDocument.model_validate_json(model_json)
     assert doc2 == doc
+
+
+def test_get_correct_doc_dispatches_on_release() -> None:
+    json_dict = {
+        "metadata": {"name": "test", "level": 1, "version": 1, "ontologies": ["sed"]},
+        "dependencies": [],
+        "declarations": {"constants": [], "variables": []},
+        "actions": [],
+    }
+    assert isinstance(get_correct_doc(json_dict), SedDocumentL1V1)
+
+    json_dict["metadata"] = {"name": "test", "level": 2, "version": 1, "ontologies": ["sed"]}
+    with pytest.raises(ValueError, match="Unsupported document level:2 version:1"):
+        get_correct_doc(json_dict)
+
+
+@pytest.mark.parametrize(
+    ("type_", "valid"),
+    [
+        ("org1::mytype", True),
+        ("Model<sbml::SBMLFile>", True),
+        ("a:b::c", True),
+        ("a::b:", True),
+        ("mytype", False),
+        ("a:::b", False),
+        ("a::::b", False),
+        ("a::", False),
+        ("::a", False),
+    ],
+)
+def test_type_constraint(type_: str, valid: bool) -> None:
+    if valid:
+        Variable(name="var", identifier="varid", type=type_)
+    else:
+        with pytest.raises(ValidationError):
+            Variable(name="var", identifier="varid", type=type_)
+
+
+def test_get_correct_doc_json_matches_dict_path() -> None:
+    json_dict = {
+        "metadata": {"name": "test", "level": 1, "version": 1, "ontologies": ["sed"]},
+        "dependencies": [],
+        "declarations": {
+            "constants": [],
+            "variables": [{"name": "var1", "identifier": "var1id", "type": "org1::mytype"}],
+        },
+        "actions": [],
+    }
+    contents = json.dumps(json_dict).encode()
+    assert get_correct_doc_json(contents) == get_correct_doc(json_dict)
+
+    with pytest.raises(ValueError, match="metadata block"):
+        get_correct_doc_json(b'{"dependencies": []}')
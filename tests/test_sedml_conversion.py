@@ -0,0 +1,44 @@
+from typing import Callable
+
+import libsedml  # type: ignore
+
+from sed_tooling.sed_converter.sedml_core import SedMLCore
+from sed_tooling.sed_converter.sedml_document import SedMLDocument
+from sed_tooling.sed_model.load_action import Load
+from sed_tooling.sed_model.sed_document import SedDocumentL1V1
+
+
+def _document(add_basic_task: Callable[[libsedml.SedDocument, int], str]) -> bytes:
+    doc = libsedml.SedDocument(1, 4)
+    add_basic_task(doc, 0)
+    doc.getModel(0).setName("the model")
+    return libsedml.writeSedMLToString(doc).encode()
+
+
+def test_sedml_models_become_dependencies_variables_and_loads(
+    add_basic_task: Callable[[libsedml.SedDocument, int], str],
+) -> None:
+    converted = SedMLCore.convert_to_sed(
+        SedMLDocument("experiments/scan.sedml", _document(add_basic_task))
+    )
+
+    assert isinstance(converted, SedDocumentL1V1)
+    assert (converted.metadata.name, converted.metadata.level, converted.metadata.version) == (
+        "scan",
+        1,
+        1,
+    )
+    # Metadata only accepts the unversioned sbml ontology
+    assert converted.metadata.ontologies == ["KiSAO", "sbml"]
+    assert [(d.identifier, d.type, d.source) for d in converted.dependencies] == [
+        ("dep_model0", "sbml::SBMLFile", "model0.xml")
+    ]
+    assert [(v.identifier, v.name, v.type) for v in converted.declarations.variables] == [
+        ("model0", "the model", "Model<sbml::SBMLFile>")
+    ]
+    assert [
+        (action.identifier, action.type, action.source, action.target)
+        for action in converted.actions
+        if isinstance(action, Load)
+    ] == [("load_model0", "sbml::load_sbml", "#dep_model0", "#model0")]
+    assert converted.check_references().ok
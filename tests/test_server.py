@@ -0,0 +1,80 @@
+import json
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any
+from zipfile import ZipFile
+
+import pytest
+
+from sed_tooling.sed_converter.client import process_remotely, send_request
+from sed_tooling.sed_converter.server import (
+    ArchiveHTTPServer,
+    ArchiveService,
+    ArchiveUnixServer,
+    make_server,
+)
+
+
+def test_server_processes_paths_and_uploads(
+    tmp_path: Path, sed_json: dict[str, Any], sbml_sed_json: dict[str, Any]
+) -> None:
+    valid = tmp_path / "valid.omex"
+    with ZipFile(valid, "w") as omex:
+        omex.writestr("simulation.sed", json.dumps(sbml_sed_json))
+    invalid = tmp_path / "invalid.omex"
+    with ZipFile(invalid, "w") as omex:
+        omex.writestr("simulation.sed", json.dumps({**sed_json, "actions": [{}]}))
+
+    service = ArchiveService(concurrency=1)
+    socket_path = str(tmp_path / "server.sock")
+    unix_server = make_server(service, socket_path=socket_path)
+    http_server = make_server(service, port=0)
+    assert isinstance(unix_server, ArchiveUnixServer)
+    assert isinstance(http_server, ArchiveHTTPServer)
+    servers = [unix_server, http_server]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        port: int = http_server.server_port
+
+        result = process_remotely(str(valid), "sed", False, socket_path=socket_path)
+        assert (result["status"], result["errors"]) == ("valid", {})
+        result = process_remotely(str(invalid), "sed", False, port=port)
+        assert result["status"] == "invalid"
+        assert list(result["errors"]) == ["simulation.sed"]
+
+        output = tmp_path / "converted.omex"
+        result = process_remotely(
+            str(valid), "sed", True, port=port, upload=True, output=str(output)
+        )
+        assert (result["archive"], result["status"]) == ("upload.omex", "valid")
+        with ZipFile(output) as converted:
+            assert converted.namelist() == ["simulation.sedml"]
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+        service.close()
+    assert not (tmp_path / "server.sock").exists()
+
+
+def test_server_replies_to_failed_requests_with_json_errors(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def broken(_: ArchiveService, __: dict[str, Any]) -> dict[str, Any]:
+        raise BrokenProcessPool("a worker process died")
+
+    service = ArchiveService(concurrency=1)
+    server = ArchiveHTTPServer(0, service)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with pytest.raises(RuntimeError, match="`starting_type` must be one of"):
+            send_request({"starting_type": "xml", "archive": "a.omex"}, port=server.server_port)
+        monkeypatch.setattr(ArchiveService, "process", broken)
+        with pytest.raises(RuntimeError, match="BrokenProcessPool: a worker process died"):
+            process_remotely(str(tmp_path / "a.omex"), "sed", False, port=server.server_port)
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.close()
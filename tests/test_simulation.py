@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from sed_tooling.sed_model.one_step import OneStep
+from sed_tooling.sed_model.steady_state import SteadyState
+from sed_tooling.sed_model.uniform_time_course import UniformTimeCourse, time_grids
+
+
+def test_simulations_are_slotted() -> None:
+    one_step = OneStep("KISAO:0000019", step=0.5)
+    assert (one_step.algorithm, one_step.step) == ("KISAO:0000019", 0.5)
+    assert SteadyState("KISAO:0000407").algorithm == "KISAO:0000407"
+    for simulation in (one_step, UniformTimeCourse("KISAO:0000019", 10, 1.0)):
+        assert not hasattr(simulation, "__dict__")
+    with pytest.raises(ValueError, match="output_start_time <= end_time"):
+        UniformTimeCourse("KISAO:0000019", 10, end_time=1.0, output_start_time=2.0)
+
+
+def test_time_grids_match_linspace() -> None:
+    simulations = [
+        UniformTimeCourse("KISAO:0000019", points, end, output_start_time=start)
+        for points, start, end in [(10, 0.0, 1.0), (4, 2.0, 3.0), (10, 5.0, 7.5), (1, 0.0, 0.1)]
+    ]
+    grids = time_grids(simulations)
+    for simulation, grid in zip(simulations, grids):
+        expected = np.linspace(
+            simulation.output_start_time, simulation.end_time, simulation.num_of_points + 1
+        )
+        np.testing.assert_allclose(grid, expected)
+        assert grid[-1] == simulation.end_time
+        np.testing.assert_array_equal(simulation.time_points(), grid)
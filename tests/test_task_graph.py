@@ -0,0 +1,73 @@
+from typing import Callable
+
+import libsedml  # type: ignore
+import pytest
+
+from sed_tooling.sed_converter.sedml_document import SedMLDocument
+from sed_tooling.sed_converter.task_graph import TaskGraph
+
+
+def _add_repeated_task(doc: libsedml.SedDocument, task_id: str, subtask_ids: list[str]) -> str:
+    repeated = doc.createRepeatedTask()
+    repeated.setId(task_id)
+    for order, subtask_id in enumerate(subtask_ids):
+        subtask = repeated.createSubTask()
+        subtask.setTask(subtask_id)
+        subtask.setOrder(order)
+    return task_id
+
+
+def _add_report(doc: libsedml.SedDocument, task_id: str) -> None:
+    data_gen = doc.createDataGenerator()
+    data_gen.setId("dg")
+    variable = data_gen.createVariable()
+    variable.setId("time")
+    variable.setTaskReference(task_id)
+    variable.setSymbol("urn:sedml:symbol:time")
+    data_gen.setMath(libsedml.parseL3Formula("time"))
+    data_set = doc.createReport().createDataSet()
+    data_set.setId("ds")
+    data_set.setLabel("time")
+    data_set.setDataReference("dg")
+
+
+def test_diamond_lattice_is_walked_once_per_task(
+    add_basic_task: Callable[[libsedml.SedDocument, int], str],
+) -> None:
+    # Every layer's two repeated tasks share both tasks of the next layer:
+    # an unmemoized walk would visit the bottom 2**depth times
+    doc = libsedml.SedDocument(1, 4)
+    depth = 40
+    layer = [add_basic_task(doc, 0), add_basic_task(doc, 1)]
+    for level in range(depth):
+        layer = [_add_repeated_task(doc, f"rt{level}_{side}", layer) for side in range(2)]
+    _add_report(doc, layer[0])
+
+    sedml_doc = SedMLDocument("lattice.sedml", libsedml.writeSedMLToString(doc).encode())
+    assert sedml_doc.needed_model_ids == {"model0", "model1"}
+    assert sedml_doc.needed_simulation_ids == {"sim0", "sim1"}
+
+
+def test_deep_and_wide_repeated_tasks(
+    add_basic_task: Callable[[libsedml.SedDocument, int], str],
+) -> None:
+    doc = libsedml.SedDocument(1, 4)
+    leaves = [add_basic_task(doc, i) for i in range(200)]
+    fans = [_add_repeated_task(doc, f"fan{i}", leaves) for i in range(50)]
+    top = _add_repeated_task(doc, "deep0", fans)
+    for level in range(1, 3000):
+        top = _add_repeated_task(doc, f"deep{level}", [top])
+
+    graph = TaskGraph(doc)
+    models, sims = graph.reachable(top)
+    assert len(models) == len(sims) == 200
+
+
+def test_cycles_are_reported(add_basic_task: Callable[[libsedml.SedDocument, int], str]) -> None:
+    doc = libsedml.SedDocument(1, 4)
+    leaf = add_basic_task(doc, 0)
+    _add_repeated_task(doc, "a", [leaf, "b"])
+    _add_repeated_task(doc, "b", ["a"])
+
+    with pytest.raises(ValueError, match="a -> b -> a"):
+        TaskGraph(doc).reachable("a")
@@ -0,0 +1,70 @@
+import gc
+import pickle
+import weakref
+from typing import Any
+
+import pytest
+
+from sed_tooling.sed_model.sed_document import get_correct_doc
+from sed_tooling.sed_model.type_expression import (
+    TypeMismatch,
+    is_compatible,
+    make_type,
+    parse_type,
+)
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("sbml::load_sbml", (("sbml",), "load_sbml", 0)),
+        ("Model<sbml::SBMLFile>", ((), "Model", 1)),
+        ("core::Map<core::str, core::List<core::float>>", (("core",), "Map", 2)),
+    ],
+)
+def test_types_are_parsed_and_interned(
+    text: str, expected: tuple[tuple[str, ...], str, int]
+) -> None:
+    parsed = parse_type(text)
+
+    assert (parsed.namespace, parsed.name, len(parsed.args)) == expected
+    assert parse_type(str(parsed)) is parsed
+    assert pickle.loads(pickle.dumps(parsed)) is parsed
+    assert {parsed: text}[parse_type(text.replace(" ", ""))] == text
+
+
+@pytest.mark.parametrize(
+    ("text", "message"),
+    [
+        ("Model<sbml::SBMLFile", "Unclosed `<`"),
+        ("Model<>", "Expected a type name at token 2"),
+        ("a::", "Empty name part in `a::`"),
+        ("Model<a>b", "Unexpected `b`"),
+    ],
+)
+def test_malformed_types_are_rejected(text: str, message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        parse_type(text)
+
+
+def test_types_nothing_refers_to_are_no_longer_interned() -> None:
+    transient = weakref.ref(make_type(("test",), "Transient"))
+    gc.collect()
+
+    assert transient() is None
+    assert make_type(("test",), "Kept") is make_type(("test",), "Kept", ())
+
+
+def test_load_targets_are_checked_against_the_action_type(
+    sbml_sed_json: dict[str, Any],
+) -> None:
+    assert is_compatible(parse_type("Model"), parse_type("Model<sbml::SBMLFile>"))
+    assert not is_compatible(parse_type("Model<sbml::SBMLFile>"), parse_type("Model<cellml::X>"))
+    assert get_correct_doc(sbml_sed_json).check_types().ok
+
+    sbml_sed_json["declarations"]["variables"][0]["type"] = "Model<cellml::CellMLFile>"
+    report = get_correct_doc(sbml_sed_json).check_types()
+
+    assert report.mismatches == [
+        TypeMismatch("load_model0", "target", "Model<sbml::SBMLFile>", "Model<cellml::CellMLFile>")
+    ]